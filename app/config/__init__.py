@@ -1,16 +1,36 @@
-from .io import config_paths, ensure_dir, read_yaml, backup, restore_backup, dump_effective_log, FileLock
+import time
+from .io import config_paths, snapshot_path, ensure_dir, read_yaml, backup, restore_backup, dump_effective_log, FileLock
 from .merge import merge_layers, env_layer
 from .schema import AppConfig
 from .cli import cli_layer
-from app.ui.onboarding_tk import run_onboarding_tk
+from .snapshot import snapshot_key, load_snapshot, save_snapshot
+from app.core.log import get_logger, setup_logging
+
+log = get_logger("config")
 
 def load_effective_config() -> AppConfig:
+    t0 = time.perf_counter()
     path, bak, lock = config_paths()
     ensure_dir(path.parent)
+    env, cli = env_layer(), cli_layer()
+
+    # 빠른 경로: config.yaml/ENV/CLI가 지난번과 같으면 검증된 스냅샷을 그대로 사용
+    # (잠금, YAML 파싱, 검증, 백업 모두 생략 - 파일이 바뀌지 않았으므로 백업도 최신)
+    snap = snapshot_path()
+    key = snapshot_key(path, env, cli, AppConfig.model_fields)
+    cached = load_snapshot(snap, key) if key else None
+    if cached is not None:
+        model = AppConfig.model_construct(**cached)
+        if not bak.exists():
+            backup(path, bak)
+        setup_logging(model.LOG_LEVEL)
+        log.debug("설정 스냅샷 사용 (%.1fms)", (time.perf_counter() - t0) * 1000)
+        return model
 
     file_cfg = {}
     if not path.exists():
-        # 첫 실행: 온보딩으로 파일 생성
+        # 첫 실행: 온보딩으로 파일 생성 (tkinter 온보딩 UI는 이때만 import)
+        from app.ui.onboarding_tk import run_onboarding_tk
         model = run_onboarding_tk()
         if model is None:
             raise SystemExit("온보딩이 취소되었습니다.")
@@ -28,13 +48,24 @@ def load_effective_config() -> AppConfig:
                     file_cfg = {}
 
     # 최종 병합: 파일 < ENV < CLI
-    merged = merge_layers(file_cfg, env_layer(), cli_layer())
+    merged = merge_layers(file_cfg, env, cli)
     model = AppConfig(**merged)
 
-    # 백업 최신화 (파일이 있을 때만)
+    # 백업 최신화 (파일이 있을 때만) - 스냅샷이 맞지 않았을 때만 오므로 파일이 바뀐 경우
     if path.exists():
         backup(path, bak)
 
-    # 시작 로그(민감정보 제외는 dump_effective_log가 처리)
-    dump_effective_log(model.model_dump())
+    # LOG_LEVEL 반영 후 시작 로그(민감정보 제외는 dump_effective_log가 처리)
+    setup_logging(model.LOG_LEVEL)
+    effective = model.model_dump()
+    dump_effective_log(effective)
+
+    # 복구/온보딩 후 파일 mtime 기준으로 다시 키를 잡아 저장
+    key = snapshot_key(path, env, cli, AppConfig.model_fields)
+    if key:
+        try:
+            save_snapshot(snap, key, effective)
+        except OSError as e:
+            log.warning("설정 스냅샷 저장 실패: %s", e)
+    log.debug("설정 로드 (%.1fms)", (time.perf_counter() - t0) * 1000)
     return model
@@ -27,6 +27,12 @@ def parse_cli_args(argv: list[str] | None = None) -> dict:
     p.add_argument("--udp-dm-port", type=int, dest="UDP_DM_PORT")
     p.add_argument("--broadcast-ip", dest="BROADCAST_IP")
     p.add_argument("--tz", dest="TZ")
+    p.add_argument("--net-transport", choices=["broadcast","multicast"], dest="NET_TRANSPORT")
+    p.add_argument("--mcast-group", dest="MCAST_GROUP")
+    p.add_argument("--mcast-group-span", type=int, dest="MCAST_GROUP_SPAN")
+    p.add_argument("--mcast-room-groups", dest="MCAST_ROOM_GROUPS")
+    p.add_argument("--mcast-ttl", type=int, dest="MCAST_TTL")
+    p.add_argument("--mcast-iface", dest="MCAST_IFACE")
 
     # 알림/창
     p.add_argument("--topmost-default", type=_str2bool, dest="TOPMOST_DEFAULT")
@@ -35,6 +41,8 @@ def parse_cli_args(argv: list[str] | None = None) -> dict:
     p.add_argument("--auto-open-dm", type=_str2bool, dest="AUTO_OPEN_DM")
     p.add_argument("--auto-focus-on-dm", choices=["true","false","mention"], dest="AUTO_FOCUS_ON_DM")
     p.add_argument("--sound-on-dm", type=_str2bool, dest="SOUND_ON_DM")
+    p.add_argument("--dm-reliable", type=_str2bool, dest="DM_RELIABLE")
+    p.add_argument("--net-backend", choices=["reactor","asyncio"], dest="NET_BACKEND")
 
     # 기타
     p.add_argument("--log-level", choices=["INFO","DEBUG","WARN","ERROR"], dest="LOG_LEVEL")
@@ -10,12 +10,21 @@ DEFAULTS = {
     "UDP_DM_PORT": 5003,
     "BROADCAST_IP": "192.168.100.255",
     "TZ": "Asia/Seoul",
+    "NET_TRANSPORT": "broadcast",    # broadcast | multicast (룸마다 멀티캐스트 그룹)
+    "MCAST_GROUP": "239.255.77.0",   # 룸 그룹 기준 주소
+    "MCAST_GROUP_SPAN": 256,         # 룸 그룹 = 기준 + crc32(room) % span (1이면 한 그룹)
+    "MCAST_ROOM_GROUPS": "",         # 룸별 그룹 직접 지정: "lobby=239.255.77.1,dev=239.255.77.2"
+    "MCAST_TTL": 1,                  # 1이면 로컬 세그먼트만
+    "MCAST_IFACE": "",               # 멀티캐스트 인터페이스 IPv4 주소 (비우면 OS 기본)
     "TOPMOST_DEFAULT": False,
     "TOPMOST_ON_NOTIFY": True,
     "TOPMOST_ON_NOTIFY_MS": 3000,
     "AUTO_OPEN_DM": True,
     "AUTO_FOCUS_ON_DM": "mention",
     "SOUND_ON_DM": True,
+    "DM_RELIABLE": False,            # DM ack + 재전송 모드
+    "COMPRESS_THRESHOLD": 0,         # 이 크기(바이트) 초과 메시지는 zlib 압축, 0이면 끔 (구버전 피어는 해제 불가)
+    "NET_BACKEND": "reactor",        # reactor(selectors 스레드) | asyncio(이벤트 루프)
     "SEQ_GAP_WAIT_MS": 300,
     "LOG_LEVEL": "INFO",
     # 서버 관련 설정
@@ -23,7 +32,12 @@ DEFAULTS = {
     "SERVER_HOST": "127.0.0.1",
     "SERVER_HTTP_PORT": 8080,
     "SERVER_UDP_PORT": 5002,
+    "SERVER_CONNECT_TIMEOUT": 1.5,   # HTTP connect 타임아웃(초)
+    "SERVER_TIMEOUT": 5.0,           # HTTP read 타임아웃(초)
     "SERVER_DB_PATH": "tipoff.db",
     "LOAD_HISTORY_ON_START": True,
     "HISTORY_LIMIT": 50,
+    "HISTORY_PAGE_SIZE": 20,
+    "HISTORY_CACHE_ENABLED": True,   # ~/.tipoff/history.db 로컬 캐시
+    "HISTORY_CACHE_MAX": 10000,      # 로컬 캐시 최대 메시지 수 (초과 시 오래된 것부터 삭제)
 }
@@ -1,6 +1,9 @@
-import os, yaml, tempfile, json, fcntl
+import os, tempfile, json, fcntl, logging
 from pathlib import Path
 from typing import Tuple
+from app.core.log import get_logger
+
+log = get_logger("config")
 
 def get_config_dir() -> Path:
     return Path.home() / ".tipoff"
@@ -12,13 +15,18 @@ def config_paths() -> Tuple[Path, Path, Path]:
     d = get_config_dir()
     return d / "config.yaml", d / "config.yaml.bak", d / "config.lock"
 
+def snapshot_path() -> Path:
+    return get_config_dir() / "config.snapshot.json"
+
 def read_yaml(path: Path) -> dict:
     if not path.exists():
         return {}
+    import yaml  # 스냅샷이 맞으면 YAML을 읽지 않으므로 필요할 때만 import
     with path.open("r", encoding="utf-8") as f:
         return yaml.safe_load(f) or {}
 
 def atomic_write_yaml(path: Path, data: dict) -> None:
+    import yaml
     tmp_fd, tmp_path = tempfile.mkstemp(prefix=path.name, dir=str(path.parent))
     try:
         with os.fdopen(tmp_fd, "w", encoding="utf-8") as tmp:
@@ -57,4 +65,6 @@ def restore_backup(path: Path, bak: Path) -> bool:
     return False
 
 def dump_effective_log(effective: dict):
-    print("[config] effective:\n", json.dumps(effective, ensure_ascii=False, indent=2))
+    if not log.isEnabledFor(logging.DEBUG):
+        return  # 직렬화 비용도 건너뜀
+    log.debug("effective:\n%s", json.dumps(effective, ensure_ascii=False, indent=2))
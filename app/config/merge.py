@@ -4,11 +4,12 @@ import os
 INT_KEYS = {
     "CONFIG_VERSION",
     "ZMQ_PORT", "UDP_PORT", "UDP_CHAT_PORT", "UDP_DM_PORT",
-    "TOPMOST_ON_NOTIFY_MS", "SEQ_GAP_WAIT_MS",
+    "TOPMOST_ON_NOTIFY_MS", "SEQ_GAP_WAIT_MS", "COMPRESS_THRESHOLD",
+    "MCAST_GROUP_SPAN", "MCAST_TTL",
 }
 BOOL_KEYS = {
     "TOPMOST_DEFAULT", "TOPMOST_ON_NOTIFY",
-    "AUTO_OPEN_DM", "SOUND_ON_DM",
+    "AUTO_OPEN_DM", "SOUND_ON_DM", "DM_RELIABLE",
 }
 # 문자열이지만 제한된 선택지가 있는 키는 스키마에서 최종 검증
 
@@ -29,8 +30,9 @@ def env_layer() -> dict:
         "UDP_PORT","UDP_CHAT_PORT","UDP_DM_PORT",
         "BROADCAST_IP","TZ",
         "TOPMOST_DEFAULT","TOPMOST_ON_NOTIFY","TOPMOST_ON_NOTIFY_MS",
-        "AUTO_OPEN_DM","AUTO_FOCUS_ON_DM","SOUND_ON_DM",
-        "SEQ_GAP_WAIT_MS","LOG_LEVEL",
+        "AUTO_OPEN_DM","AUTO_FOCUS_ON_DM","SOUND_ON_DM","DM_RELIABLE",
+        "SEQ_GAP_WAIT_MS","LOG_LEVEL","COMPRESS_THRESHOLD","NET_BACKEND",
+        "NET_TRANSPORT","MCAST_GROUP","MCAST_GROUP_SPAN","MCAST_ROOM_GROUPS","MCAST_TTL","MCAST_IFACE",
     }
     for k in keys:
         if k in os.environ:
@@ -19,6 +19,14 @@ class AppConfig(BaseModel):
     BROADCAST_IP: str = "192.168.100.255"
     TZ: str = "Asia/Seoul"
 
+    # presence/로비 전송 방식 (multicast면 룸마다 그룹, app/net/mcast.py)
+    NET_TRANSPORT: Literal["broadcast", "multicast"] = "broadcast"
+    MCAST_GROUP: str = "239.255.77.0"
+    MCAST_GROUP_SPAN: int = 256
+    MCAST_ROOM_GROUPS: str = ""
+    MCAST_TTL: int = 1
+    MCAST_IFACE: str = ""
+
     TOPMOST_DEFAULT: bool = False
     TOPMOST_ON_NOTIFY: bool = True
     TOPMOST_ON_NOTIFY_MS: int = 3000
@@ -26,9 +34,27 @@ class AppConfig(BaseModel):
     AUTO_FOCUS_ON_DM: Literal["true", "false", "mention"] | str = "mention"
     SOUND_ON_DM: bool = True
 
+    DM_RELIABLE: bool = False
+    COMPRESS_THRESHOLD: int = 0
+    NET_BACKEND: Literal["reactor", "asyncio"] = "reactor"
+
     SEQ_GAP_WAIT_MS: int = 300
     LOG_LEVEL: Literal["INFO", "DEBUG", "WARN", "ERROR"] = "INFO"
 
+    # 서버 연동
+    SERVER_ENABLED: bool = True
+    SERVER_HOST: str = "127.0.0.1"
+    SERVER_HTTP_PORT: int = 8080
+    SERVER_UDP_PORT: int = 5002
+    SERVER_CONNECT_TIMEOUT: float = 1.5
+    SERVER_TIMEOUT: float = 5.0
+    SERVER_DB_PATH: str = "tipoff.db"
+    LOAD_HISTORY_ON_START: bool = True
+    HISTORY_LIMIT: int = 50
+    HISTORY_PAGE_SIZE: int = 20
+    HISTORY_CACHE_ENABLED: bool = True
+    HISTORY_CACHE_MAX: int = 10000
+
     @field_validator("USER_ID")
     @classmethod
     def validate_user_id(cls, v: str):
@@ -61,6 +87,41 @@ class AppConfig(BaseModel):
         ipaddress.IPv4Address(v)
         return v
 
+    @field_validator("MCAST_GROUP")
+    @classmethod
+    def validate_mcast_group(cls, v: str):
+        if not ipaddress.IPv4Address(v).is_multicast:
+            raise ValueError("MCAST_GROUP은 멀티캐스트 주소(224.0.0.0/4)")
+        return v
+
+    @field_validator("MCAST_GROUP_SPAN")
+    @classmethod
+    def validate_mcast_span(cls, v: int):
+        if not (1 <= v <= 65536):
+            raise ValueError("MCAST_GROUP_SPAN은 1–65536")
+        return v
+
+    @field_validator("MCAST_ROOM_GROUPS")
+    @classmethod
+    def validate_room_groups(cls, v: str):
+        from app.net.mcast import parse_room_groups
+        parse_room_groups(v)
+        return v
+
+    @field_validator("MCAST_TTL")
+    @classmethod
+    def validate_mcast_ttl(cls, v: int):
+        if not (0 <= v <= 255):
+            raise ValueError("MCAST_TTL은 0–255")
+        return v
+
+    @field_validator("MCAST_IFACE")
+    @classmethod
+    def validate_mcast_iface(cls, v: str):
+        if v:
+            ipaddress.IPv4Address(v)
+        return v
+
     @field_validator("AUTO_FOCUS_ON_DM")
     @classmethod
     def normalize_focus(cls, v):
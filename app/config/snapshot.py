@@ -0,0 +1,54 @@
+"""
+검증된 설정 스냅샷 - 시작 시 YAML 파싱/pydantic 검증/파일 잠금을 건너뛰는 빠른 경로
+- ~/.tipoff/config.snapshot.json 에 병합·검증이 끝난 설정(model_dump)을 저장
+- 키: config.yaml의 mtime_ns + 크기, ENV/CLI 레이어, 스키마 필드 목록
+  → 하나라도 다르면 스냅샷을 버리고 원래 경로(잠금 → 파싱 → 검증)로 다시 만듦
+- 손상/형식 오류는 조용히 무시 (스냅샷은 캐시일 뿐, 원본은 항상 config.yaml)
+"""
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+SNAPSHOT_VERSION = 1
+
+
+def snapshot_key(path: Path, env: dict, cli: dict, fields) -> Optional[dict]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return {
+        "version": SNAPSHOT_VERSION,
+        "mtime_ns": st.st_mtime_ns,
+        "size": st.st_size,
+        "env": env,
+        "cli": cli,
+        "fields": sorted(fields),
+    }
+
+
+def load_snapshot(snap: Path, key: dict) -> Optional[dict]:
+    """키가 같으면 저장된 설정 dict, 아니면 None"""
+    try:
+        with snap.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("key") != key:
+        return None
+    config = data.get("config")
+    return config if isinstance(config, dict) else None
+
+
+def save_snapshot(snap: Path, key: dict, config: dict) -> None:
+    tmp_fd, tmp_path = tempfile.mkstemp(prefix=snap.name, dir=str(snap.parent))
+    try:
+        with os.fdopen(tmp_fd, "w", encoding="utf-8") as tmp:
+            json.dump({"key": key, "config": config}, tmp, ensure_ascii=False)
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, snap)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
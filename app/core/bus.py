@@ -7,6 +7,9 @@ EventBus: 네트워크 스레드가 발생시키는 이벤트를 Tk 메인스레
 from __future__ import annotations
 import queue
 from typing import Callable, Dict, List
+from app.core.log import get_logger
+
+log = get_logger("bus")
 
 class EventBus:
     def __init__(self, root):
@@ -32,7 +35,7 @@ class EventBus:
                 try:
                     h(payload)
                 except Exception as e:
-                    print(f"[bus] handler error on {evt}: {e}")
+                    log.exception("handler error on %s: %s", evt, e)
 
     def pump(self) -> None:
         if self._stopped:
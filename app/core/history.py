@@ -1,27 +1,278 @@
 """
 메시지 히스토리 관리
+- 실시간 메시지의 로컬 저장은 쓰기 큐 + 백그라운드 스레드에서 모아서 처리 (Tk 스레드에서 디스크 쓰기 없음)
 """
-from typing import List, Dict, Any, Optional
+import queue
+import threading
+import time
+from typing import List, Dict, Any, Optional, Iterator
 from datetime import datetime
+from app.core.log import get_logger
 from app.net.server_client import ServerClient, ServerConfig
+from app.core.store import LocalHistoryStore, lobby_conv, dm_conv
+
+log = get_logger("history")
 
 class HistoryManager:
     """메시지 히스토리 관리자"""
     
-    def __init__(self, server_client: Optional[ServerClient] = None):
+    def __init__(self, server_client: Optional[ServerClient] = None,
+                 store: Optional[LocalHistoryStore] = None):
         self.server_client = server_client
+        self.store = store
+        # DM 대화별 페이지 캐시: conv -> {"messages", "ids", "loaded", "exhausted", "loading"}
+        self._dm_cache: Dict[str, Dict[str, Any]] = {}
+        self._dm_lock = threading.Lock()
+        # 실시간 메시지 로컬 저장 큐 (conv, formatted) - 첫 record_live 때 writer 스레드 시작
+        self._writes: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
 
     def load_lobby_history(self, room_id: str = "lobby", limit: int = 50) -> List[Dict[str, Any]]:
         """로비 히스토리 로드"""
-        if not self.server_client or not self.server_client.is_server_available():
+        if not self.server_client:
             return []
             
         messages = self.server_client.get_lobby_messages(room_id, limit)
         return self._format_messages(messages)
 
+    def iter_lobby_history(self, room_id: str = "lobby", limit: int = 50,
+                           page_size: int = 20) -> Iterator[List[Dict[str, Any]]]:
+        """
+        로비 히스토리를 최신 페이지부터 차례로 반환 (각 페이지는 시간 오름차순).
+        - health 체크 없이 바로 조회 (실패 시 빈 페이지로 종료)
+        """
+        if not self.server_client:
+            return
+        before = before_id = None
+        remaining = limit
+        while remaining > 0:
+            n = min(page_size, remaining)
+            messages = self.server_client.get_lobby_messages(room_id, n, before, before_id=before_id)
+            if not messages:
+                return
+            yield self._format_messages(messages)
+            remaining -= len(messages)
+            if len(messages) < n:
+                return
+            before, before_id = messages[0].get("timestamp"), messages[0].get("id")
+
+    def load_lobby_history_async(self, bus, room_id: str = "lobby", limit: int = 50,
+                                 page_size: int = 20) -> threading.Thread:
+        """
+        백그라운드 스레드에서 로비 히스토리를 페이지 단위로 받아 EventBus로 전달.
+        - 로컬 저장소가 있으면 캐시를 먼저 그리고, 서버에서는 마지막 동기화 id 이후만 조회
+        - history_page(target=None, messages=[...], older=bool) : 페이지 도착 시마다
+          (older=True: 기존 히스토리 위쪽, older=False: 기존 히스토리 아래쪽에 삽입)
+        - history_done(target=None, count=N, elapsed_ms=...) : 완료(실패 포함)
+        """
+        def _worker():
+            t0 = time.perf_counter()
+            count = 0
+            try:
+                count = self._load_lobby_pages(bus, room_id, limit, page_size, t0)
+            except Exception as e:
+                log.warning("로비 히스토리 로드 오류: %s", e)
+            bus.post("history_done", target=None, count=count,
+                     elapsed_ms=(time.perf_counter() - t0) * 1000)
+
+        th = threading.Thread(target=_worker, name="history-load", daemon=True)
+        th.start()
+        return th
+
+    def _load_lobby_pages(self, bus, room_id: str, limit: int, page_size: int, t0: float) -> int:
+        conv = lobby_conv(room_id)
+        count = 0
+        last_id = None
+        if self.store:
+            cached = self.store.get_recent(conv, limit)
+            last_id = self.store.last_synced_id(conv)
+            if cached and last_id is None and self.server_client:
+                # 실시간 메시지만 있는 캐시(서버 id 없음): 서버 페이지를 위에 끼우면 순서가 어긋나므로
+                # 서버 히스토리를 먼저 저장하고 합친 결과를 한 번에 그림
+                for page in self.iter_lobby_history(room_id, limit, page_size):
+                    self._store_page(conv, page)
+                merged = self.store.get_recent(conv, limit)
+                bus.post("history_page", target=None, messages=merged, older=True)
+                return len(merged)
+            if cached:
+                count += len(cached)
+                bus.post("history_page", target=None, messages=cached, older=True)
+                log.info("로컬 캐시 %d개 (%.0fms)", len(cached), (time.perf_counter() - t0) * 1000)
+
+        if not self.server_client:
+            return count
+
+        if last_id is not None:
+            # 증분 동기화: 마지막으로 받은 서버 id 이후를 오래된 것부터 페이지 단위로
+            # (오프라인 동안 limit개보다 많이 쌓여도 짧은 페이지가 올 때까지 이어받아 빈 구간이 없음)
+            while True:
+                messages = self.server_client.get_lobby_messages(room_id, limit, after_id=last_id)
+                page = self._store_page(conv, self._format_messages(messages))
+                if page:
+                    count += len(page)
+                    bus.post("history_page", target=None, messages=page, older=False)
+                next_id = messages[-1].get("id") if messages else None
+                if len(messages) < limit or not isinstance(next_id, int) or next_id <= last_id:
+                    return count
+                last_id = next_id
+
+        for page in self.iter_lobby_history(room_id, limit, page_size):
+            page = self._store_page(conv, page)
+            if page:
+                count += len(page)
+                bus.post("history_page", target=None, messages=page, older=True)
+        return count
+
+    def _store_page(self, conv: str, page: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """로컬 저장소에 기록하고 아직 화면에 없던(새로 저장된) 메시지만 반환"""
+        if not self.store:
+            return page
+        return self.store.add_messages(conv, page)
+
+    def record_live(self, msg: Dict[str, Any]):
+        """실시간 로비/DM 메시지(와이어 형식)를 로컬 저장소와 DM 캐시에 기록"""
+        is_dm = msg.get("type") == "dm"
+        if is_dm:
+            conv = dm_conv(msg.get("from"), msg.get("to"))
+        else:
+            conv = lobby_conv(msg.get("room_id") or "lobby")
+        formatted = {
+            "msg_id": msg.get("msg_id"),
+            "type": "dm" if is_dm else "lobby",
+            "from_uid": msg.get("from", ""),
+            "to_uid": msg.get("to"),
+            "nick": msg.get("nick", ""),
+            "text": msg.get("text", ""),
+            "ts": msg.get("ts"),
+        }
+        if is_dm:
+            self._append_dm_cache(conv, formatted)
+        if not self.store:
+            return
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="history-writer", daemon=True)
+                self._writer.start()
+        self._writes.put((conv, formatted))
+
+    def _write_loop(self):
+        """쓰기 큐를 비우며 대화별로 묶어 한 번에 저장 (None이면 종료)"""
+        while True:
+            items = [self._writes.get()]
+            while True:
+                try:
+                    items.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in items
+            by_conv: Dict[str, List[Dict[str, Any]]] = {}
+            for item in items:
+                if item is not None:
+                    by_conv.setdefault(item[0], []).append(item[1])
+            for conv, msgs in by_conv.items():
+                try:
+                    self.store.add_messages(conv, msgs)
+                except Exception as e:
+                    log.warning("로컬 저장 오류: %s", e)
+            if stop:
+                return
+
+    def close(self, timeout: float = 1.0):
+        """남은 실시간 메시지를 저장하고 writer 스레드 종료 (최대 timeout초 대기)"""
+        with self._writer_lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._writes.put(None)
+            writer.join(timeout)
+
+    # === DM 히스토리 (탭 단위 지연 로드 + 스크롤백) ===
+    def _dm_entry(self, conv: str) -> Dict[str, Any]:
+        entry = self._dm_cache.get(conv)
+        if entry is None:
+            entry = {"messages": [], "ids": set(), "loaded": False,
+                     "exhausted": False, "loading": False}
+            self._dm_cache[conv] = entry
+        return entry
+
+    def _append_dm_cache(self, conv: str, msg: Dict[str, Any]):
+        """실시간 DM을 캐시 끝에 추가 (이후 서버 페이지와 중복 렌더 방지)"""
+        with self._dm_lock:
+            entry = self._dm_entry(conv)
+            if msg.get("msg_id") in entry["ids"]:
+                return
+            ts = msg.get("ts")
+            cached = dict(msg)
+            if isinstance(ts, (int, float)):
+                cached["timestamp"] = datetime.fromtimestamp(ts).isoformat()
+            entry["ids"].add(msg.get("msg_id"))
+            entry["messages"].append(cached)
+
+    def open_dm_history(self, bus, user_id: str, peer_id: str, page_size: int = 20):
+        """
+        DM 탭이 열릴 때 호출.
+        - 캐시에 받아둔 페이지가 있으면 네트워크 없이 바로 전달
+        - 없으면 최신 한 페이지를 백그라운드로 조회
+        """
+        conv = dm_conv(user_id, peer_id)
+        with self._dm_lock:
+            entry = self._dm_entry(conv)
+            if entry["loaded"]:
+                cached = list(entry["messages"])
+                if cached:
+                    bus.post("history_page", target=peer_id, messages=cached, older=True)
+                return
+        self._fetch_dm_page(bus, user_id, peer_id, page_size)
+
+    def load_older_dm_history(self, bus, user_id: str, peer_id: str, page_size: int = 20):
+        """DM 탭을 맨 위까지 스크롤했을 때 호출 - 이전 페이지 조회"""
+        conv = dm_conv(user_id, peer_id)
+        with self._dm_lock:
+            entry = self._dm_entry(conv)
+            if not entry["loaded"] or entry["exhausted"]:
+                return
+        self._fetch_dm_page(bus, user_id, peer_id, page_size)
+
+    def _fetch_dm_page(self, bus, user_id: str, peer_id: str, page_size: int):
+        if not self.server_client:
+            return
+        conv = dm_conv(user_id, peer_id)
+        with self._dm_lock:
+            entry = self._dm_entry(conv)
+            if entry["loading"]:
+                return
+            entry["loading"] = True
+            before = before_id = None
+            if entry["loaded"]:
+                history = [m for m in entry["messages"] if m.get("timestamp")]
+                if history:
+                    before, before_id = history[0]["timestamp"], history[0].get("id")
+
+        def _worker():
+            page: List[Dict[str, Any]] = []
+            raw: List[Dict[str, Any]] = []
+            try:
+                raw = self.server_client.get_dm_messages(user_id, peer_id, page_size, before, before_id)
+            except Exception as e:
+                log.warning("DM 히스토리 로드 오류: %s", e)
+            with self._dm_lock:
+                for msg in self._format_messages(raw):
+                    if msg.get("msg_id") in entry["ids"]:
+                        continue
+                    entry["ids"].add(msg.get("msg_id"))
+                    page.append(msg)
+                entry["messages"][:0] = page
+                entry["loaded"] = True
+                entry["exhausted"] = len(raw) < page_size
+                entry["loading"] = False
+            if page:
+                bus.post("history_page", target=peer_id, messages=page, older=True)
+
+        threading.Thread(target=_worker, name="dm-history-load", daemon=True).start()
+
     def load_dm_history(self, user1: str, user2: str, limit: int = 50) -> List[Dict[str, Any]]:
         """DM 히스토리 로드"""
-        if not self.server_client or not self.server_client.is_server_available():
+        if not self.server_client:
             return []
             
         messages = self.server_client.get_dm_messages(user1, user2, limit)
@@ -32,6 +283,8 @@ class HistoryManager:
         formatted = []
         for msg in messages:
             formatted.append({
+                "id": msg.get("id"),
+                "msg_id": msg.get("msg_id"),
                 "text": msg.get("text", ""),
                 "nick": msg.get("nick", ""),
                 "from_uid": msg.get("from", ""),
@@ -44,6 +297,6 @@ class HistoryManager:
 
     def get_server_stats(self) -> Dict[str, Any]:
         """서버 통계 조회"""
-        if not self.server_client or not self.server_client.is_server_available():
+        if not self.server_client:
             return {}
         return self.server_client.get_stats()
\ No newline at end of file
@@ -0,0 +1,165 @@
+"""
+로깅 - 서버/클라이언트 공용
+- setup_logging(level): "tipoff" 로거에 큐 기반 핸들러 설치
+  호출 스레드는 큐에 넣기만 하고, 실제 출력(stderr)은 리스너 스레드가 담당
+  → 수신 스레드가 터미널/journald 쓰기에 막히지 않음. 큐가 차면 버리고 dropped 카운트
+- LOG_LEVEL: DEBUG / INFO / WARN / ERROR
+- get_logger("server") → "tipoff.server", 출력 형식: 시각 레벨 [server] 메시지 k=v ...
+- 구조화 필드: log.info("...", extra=fields(room=..., n=...))
+- RateLimitedLogger: 메시지별 로그처럼 잦은 로그를 키별 초당 rate개로 제한
+"""
+from __future__ import annotations
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Dict, Optional
+
+ROOT = "tipoff"
+LEVELS = {"DEBUG": logging.DEBUG, "INFO": logging.INFO, "WARN": logging.WARNING,
+          "WARNING": logging.WARNING, "ERROR": logging.ERROR}
+FORMAT = "%(asctime)s %(levelname)-5s [%(tag)s] %(message)s%(fields)s"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_handler: Optional["_DropQueueHandler"] = None
+_setup_lock = threading.Lock()
+
+
+def get_logger(tag: str) -> logging.Logger:
+    return logging.getLogger(f"{ROOT}.{tag}")
+
+
+def fields(**kv) -> dict:
+    """extra=fields(...)로 넘기면 메시지 뒤에 key=value로 붙음"""
+    return {"kv": kv}
+
+
+class _Formatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        name = record.name
+        record.tag = name[len(ROOT) + 1:] if name.startswith(ROOT + ".") else name
+        kv = getattr(record, "kv", None)
+        record.fields = "".join(f" {k}={v}" for k, v in kv.items()) if kv else ""
+        return super().format(record)
+
+
+class _DropQueueHandler(logging.handlers.QueueHandler):
+    """큐가 가득 차면 블로킹/예외 없이 버림"""
+    def __init__(self, q: queue.Queue):
+        super().__init__(q)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def parse_level(level) -> int:
+    if isinstance(level, int):
+        return level
+    return LEVELS.get(str(level or "INFO").upper(), logging.INFO)
+
+
+def setup_logging(level="INFO", stream=None, queue_size: int = 10000) -> logging.Logger:
+    """
+    "tipoff" 로거 설정 (여러 번 호출하면 레벨만 갱신).
+    프로세스 종료 시 리스너를 멈춰 남은 로그를 비움.
+    """
+    global _listener, _handler
+    root = logging.getLogger(ROOT)
+    root.setLevel(parse_level(level))
+    with _setup_lock:
+        if _listener is not None:
+            return root
+        out = logging.StreamHandler(stream or sys.stderr)
+        out.setFormatter(_Formatter(FORMAT, "%H:%M:%S"))
+        q: queue.Queue = queue.Queue(queue_size)
+        _handler = _DropQueueHandler(q)
+        _listener = logging.handlers.QueueListener(q, out, respect_handler_level=True)
+        _listener.start()
+        root.addHandler(_handler)
+        root.propagate = False
+        atexit.register(shutdown_logging)
+    return root
+
+
+def shutdown_logging():
+    global _listener, _handler
+    with _setup_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        logging.getLogger(ROOT).removeHandler(_handler)
+        _listener = _handler = None
+
+
+def _reinit_after_fork():
+    """fork된 자식에는 리스너 스레드가 없으므로 새 큐/리스너로 다시 설치 (레벨/출력 대상 유지)"""
+    global _listener, _handler, _setup_lock
+    _setup_lock = threading.Lock()
+    if _listener is None:
+        return
+    stream = _listener.handlers[0].stream
+    root = logging.getLogger(ROOT)
+    root.removeHandler(_handler)
+    _listener = _handler = None
+    setup_logging(root.level, stream)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reinit_after_fork)
+
+
+def dropped_count() -> int:
+    return _handler.dropped if _handler else 0
+
+
+class RateLimitedLogger:
+    """
+    키별 토큰 버킷 (초당 rate개, 최대 burst개 연속).
+    억제된 건수는 다음에 통과하는 로그에 suppressed=N 필드로 붙음.
+    레벨이 꺼져 있으면 버킷 계산 없이 바로 반환 (핫 패스 비용 최소화)
+    """
+    def __init__(self, logger: logging.Logger, rate: float = 1.0, burst: int = 5):
+        self.logger = logger
+        self.rate = rate
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, list] = {}  # key -> [tokens, last, suppressed]
+
+    def log(self, level: int, key: str, msg: str, *args, **kv):
+        if not self.logger.isEnabledFor(level):
+            return
+        now = time.monotonic()
+        with self._lock:
+            b = self._buckets.get(key)
+            if b is None:
+                b = self._buckets[key] = [float(self.burst), now, 0]
+            b[0] = min(float(self.burst), b[0] + (now - b[1]) * self.rate)
+            b[1] = now
+            if b[0] < 1.0:
+                b[2] += 1
+                return
+            b[0] -= 1.0
+            suppressed, b[2] = b[2], 0
+        if suppressed:
+            kv["suppressed"] = suppressed
+        self.logger.log(level, msg, *args, extra={"kv": kv} if kv else None)
+
+    def debug(self, key: str, msg: str, *args, **kv):
+        self.log(logging.DEBUG, key, msg, *args, **kv)
+
+    def info(self, key: str, msg: str, *args, **kv):
+        self.log(logging.INFO, key, msg, *args, **kv)
+
+    def warning(self, key: str, msg: str, *args, **kv):
+        self.log(logging.WARNING, key, msg, *args, **kv)
+
+    def error(self, key: str, msg: str, *args, **kv):
+        self.log(logging.ERROR, key, msg, *args, **kv)
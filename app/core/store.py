@@ -0,0 +1,153 @@
+"""
+로컬 메시지 저장소 (~/.tipoff/history.db)
+- 서버 히스토리 + 실시간 로비/DM 메시지를 디스크에 보관
+- 시작 시 즉시 렌더링용으로 사용하고, 서버와는 마지막 동기화 id 이후만 증분 조회
+- 전체 메시지 수가 max_messages를 넘으면 오래된 것부터 삭제
+  (개수는 메모리에서 세고, 여유분 EVICT_SLACK만큼 더 넘었을 때 한 번에 삭제 - 저장마다 COUNT/DELETE 하지 않음)
+"""
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Iterable
+
+EVICT_SLACK = 0.1  # max_messages의 이 비율만큼 넘으면 max_messages까지 삭제
+
+
+def lobby_conv(room_id: str) -> str:
+    """로비 대화 키"""
+    return f"room:{room_id}"
+
+
+def dm_conv(user1: str, user2: str) -> str:
+    """DM 대화 키 (참여자 순서와 무관)"""
+    a, b = sorted((user1 or "", user2 or ""))
+    return f"dm:{a}:{b}"
+
+
+class LocalHistoryStore:
+    """로컬 히스토리 저장소"""
+
+    def __init__(self, db_path: str, max_messages: int = 10000):
+        self.db_path = db_path
+        self.max_messages = max_messages
+        self._count_lock = threading.Lock()
+        self._init_database()
+        with self._get_connection() as conn:
+            self._count = conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+
+    def _init_database(self):
+        with self._get_connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS messages (
+                    msg_id TEXT PRIMARY KEY,
+                    conv TEXT NOT NULL,
+                    server_id INTEGER,
+                    type TEXT NOT NULL,
+                    from_uid TEXT NOT NULL,
+                    to_uid TEXT,
+                    nick TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    ts REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_conv_ts ON messages (conv, ts)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_conv_server_id ON messages (conv, server_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_ts ON messages (ts)")
+            conn.commit()
+
+    @contextmanager
+    def _get_connection(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    # === 쓰기 ===
+    def add_messages(self, conv: str, messages: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        포맷된 메시지(HistoryManager._format_messages 형식) 저장.
+        - 이미 있는 msg_id는 server_id만 갱신
+        - 새로 추가된 메시지만 반환 (UI 중복 렌더 방지용)
+        """
+        added = []
+        with self._get_connection() as conn, self._count_lock:
+            for msg in messages:
+                msg_id = msg.get("msg_id")
+                if not msg_id:
+                    continue
+                cur = conn.execute("""
+                    INSERT OR IGNORE INTO messages
+                    (msg_id, conv, server_id, type, from_uid, to_uid, nick, text, ts)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    msg_id, conv, msg.get("id"), msg.get("type", "lobby"),
+                    msg.get("from_uid") or "", msg.get("to_uid"),
+                    msg.get("nick") or "", msg.get("text") or "",
+                    self._ts_of(msg),
+                ))
+                if cur.rowcount:
+                    added.append(msg)
+                elif msg.get("id") is not None:
+                    conn.execute("UPDATE messages SET server_id = ? WHERE msg_id = ?",
+                                 (msg.get("id"), msg_id))
+            self._count += len(added)
+            self._evict(conn)
+            conn.commit()
+        return added
+
+    def _evict(self, conn):
+        """최대 개수를 여유분 이상 넘었으면 max_messages까지 오래된 순으로 삭제 (_count_lock 안에서 호출)"""
+        if self._count <= self.max_messages + int(self.max_messages * EVICT_SLACK):
+            return
+        cur = conn.execute("""
+            DELETE FROM messages WHERE msg_id IN (
+                SELECT msg_id FROM messages ORDER BY ts ASC LIMIT ?
+            )
+        """, (self._count - self.max_messages,))
+        self._count -= cur.rowcount
+
+    # === 읽기 ===
+    def get_recent(self, conv: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """대화의 최근 메시지 (시간 오름차순)"""
+        with self._get_connection() as conn:
+            rows = conn.execute("""
+                SELECT * FROM messages WHERE conv = ?
+                ORDER BY ts DESC LIMIT ?
+            """, (conv, limit)).fetchall()
+            return [self._row_to_dict(row) for row in reversed(rows)]
+
+    def last_synced_id(self, conv: str) -> Optional[int]:
+        """서버에서 받아온 메시지 중 가장 큰 서버 id"""
+        with self._get_connection() as conn:
+            return conn.execute("SELECT MAX(server_id) FROM messages WHERE conv = ?",
+                                (conv,)).fetchone()[0]
+
+    def _row_to_dict(self, row) -> Dict[str, Any]:
+        return {
+            "id": row["server_id"],
+            "msg_id": row["msg_id"],
+            "text": row["text"],
+            "nick": row["nick"],
+            "from_uid": row["from_uid"],
+            "to_uid": row["to_uid"],
+            "timestamp": datetime.fromtimestamp(row["ts"]).isoformat(),
+            "type": row["type"],
+            "is_history": True,
+        }
+
+    @staticmethod
+    def _ts_of(msg: Dict[str, Any]) -> float:
+        ts = msg.get("ts")
+        if isinstance(ts, (int, float)):
+            return float(ts)
+        raw = msg.get("timestamp")
+        if raw:
+            try:
+                return datetime.fromisoformat(raw).timestamp()
+            except ValueError:
+                pass
+        return time.time()
@@ -0,0 +1,320 @@
+"""
+콜드 스토리지 - 오래된 메시지를 압축된 불변 세그먼트 파일로 옮겨 hot 테이블을 작게 유지
+- archive_older_than(): timestamp < cutoff 메시지를 대화(conv) → timestamp → id 순으로 정렬해
+  세그먼트 하나로 기록(임시 파일 → fsync → rename)한 뒤, 한 트랜잭션에서
+  archive_segments 목록 등록 + hot 행 삭제 (목록에 없는 세그먼트 파일은 무시/정리됨)
+- 세그먼트 형식:
+    [블록 0][블록 1]...[인덱스][트레일러]
+    블록     = zlib(JSON 배열, 행은 transfer.EXPORT_COLUMNS 순서), BLOCK_ROWS개씩
+    인덱스   = zlib(JSON) - 블록마다 [첫 키, 마지막 키, offset, length] (희소 인덱스)
+    트레일러 = struct TRAILER (인덱스 offset, length, 행 수, MAGIC)
+    키       = [conv, timestamp, id], conv는 로비 "L:<room>", DM "D:<작은 id>|<큰 id>"
+- 읽기는 mmap → 필요한 블록만 잘라 압축 해제. 인덱스만 메모리에 유지
+- DatabaseManager의 히스토리 조회는 hot 페이지가 limit보다 적으면 여기서 나머지를 채움
+
+    python run_server.py archive --older-than-days 180
+"""
+from __future__ import annotations
+import bisect
+import json
+import mmap
+import os
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.core.log import get_logger
+from .conv import CONV_SQL, lobby_conv, dm_conv
+from .transfer import EXPORT_COLUMNS
+
+log = get_logger("archive")
+
+MAGIC = b"TOSEG001"
+TRAILER = struct.Struct("!QIQ8s")   # index_offset, index_len, rows, MAGIC
+BLOCK_ROWS = 512
+BLOCK_CACHE = 16  # 세그먼트당 압축 해제해 둘 블록 수 (연속 페이지 조회는 같은 블록을 다시 읽음)
+SUFFIX = ".seg"
+
+COL_ID = EXPORT_COLUMNS.index("id")
+COL_TS = EXPORT_COLUMNS.index("timestamp")
+COL_TYPE = EXPORT_COLUMNS.index("message_type")
+COL_ROOM = EXPORT_COLUMNS.index("room_id")
+COL_FROM = EXPORT_COLUMNS.index("from_user_id")
+COL_TO = EXPORT_COLUMNS.index("to_user_id")
+
+def default_archive_dir(db_path: str) -> str:
+    return db_path + ".archive"
+
+
+# === 기록 ===
+class SegmentWriter:
+    """(conv, row) 를 정렬된 순서로 받아 블록 단위로 기록"""
+    def __init__(self, path: str, level: int = 6):
+        self.path = path
+        self.level = level
+        self._f = open(path, "wb")
+        self._index: List[list] = []
+        self._block: List[tuple] = []
+        self._first = self._last = None
+        self.rows = 0
+        self.min_ts = self.max_ts = None
+        self.max_id = 0
+
+    def add(self, conv: str, row: tuple):
+        key = [conv, row[COL_TS], row[COL_ID]]
+        if self._first is None:
+            self._first = key
+        self._last = key
+        self._block.append(row)
+        self.rows += 1
+        ts = row[COL_TS]
+        self.min_ts = ts if self.min_ts is None else min(self.min_ts, ts)
+        self.max_ts = ts if self.max_ts is None else max(self.max_ts, ts)
+        self.max_id = max(self.max_id, row[COL_ID])
+        if len(self._block) >= BLOCK_ROWS:
+            self._flush_block()
+
+    def _flush_block(self):
+        if not self._block:
+            return
+        data = zlib.compress(json.dumps(self._block, ensure_ascii=False).encode("utf-8"), self.level)
+        self._index.append([self._first, self._last, self._f.tell(), len(data)])
+        self._f.write(data)
+        self._block = []
+        self._first = self._last = None
+
+    def close(self):
+        self._flush_block()
+        index = zlib.compress(json.dumps(self._index, ensure_ascii=False).encode("utf-8"))
+        offset = self._f.tell()
+        self._f.write(index)
+        self._f.write(TRAILER.pack(offset, len(index), self.rows, MAGIC))
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self._f.close()
+
+
+# === 읽기 ===
+class Segment:
+    """mmap한 세그먼트 + 희소 인덱스"""
+    def __init__(self, path: str, block_cache: int = BLOCK_CACHE):
+        self.path = path
+        self.block_cache = block_cache
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        index_off, index_len, self.rows, magic = TRAILER.unpack(self._mm[-TRAILER.size:])
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"세그먼트 형식 오류: {path}")
+        index = json.loads(zlib.decompress(self._mm[index_off:index_off + index_len]))
+        self._first_keys = [tuple(e[0]) for e in index]
+        self._last_keys = [tuple(e[1]) for e in index]
+        self._spans = [(e[2], e[3]) for e in index]
+        self._cache: "OrderedDict[int, List[list]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+    def _block(self, i: int) -> List[list]:
+        with self._cache_lock:
+            rows = self._cache.get(i)
+            if rows is not None:
+                self._cache.move_to_end(i)
+                return rows
+        off, length = self._spans[i]
+        rows = json.loads(zlib.decompress(self._mm[off:off + length]))
+        with self._cache_lock:
+            self._cache[i] = rows
+            while len(self._cache) > self.block_cache:
+                self._cache.popitem(last=False)
+        return rows
+
+    def page_before(self, conv: str, before: Optional[float], limit: int,
+                    before_id: Optional[int] = None) -> List[list]:
+        """conv의 timestamp < before 행 중 최신 limit개 (오래된 순), before_id가 있으면 (timestamp, id) < 커서"""
+        if before is None:
+            upper: tuple = (conv, float("inf"))
+        elif before_id is None:
+            upper = (conv, before)
+        else:
+            upper = (conv, before, before_id)
+        # upper보다 작은 키로 시작하는 마지막 블록부터 거꾸로 훑음
+        i = bisect.bisect_left(self._first_keys, upper) - 1
+        out: List[list] = []
+        while i >= 0 and len(out) < limit:
+            if self._last_keys[i][0] < conv:
+                break
+            for row in reversed(self._block(i)):
+                key = (row_conv(row), row[COL_TS], row[COL_ID])
+                if key[0] != conv or (before is not None and key[:len(upper)] >= upper):
+                    continue
+                out.append(row)
+                if len(out) >= limit:
+                    break
+            i -= 1
+        out.reverse()
+        return out
+
+    def iter_rows(self) -> Iterator[list]:
+        """전체 행 (세그먼트 순서: conv → timestamp → id), 블록 캐시를 거치지 않음"""
+        for off, length in self._spans:
+            yield from json.loads(zlib.decompress(self._mm[off:off + length]))
+
+
+def row_conv(row: list) -> str:
+    if row[COL_TYPE] == "lobby":
+        return lobby_conv(row[COL_ROOM])
+    return dm_conv(row[COL_FROM], row[COL_TO])
+
+
+class ArchiveReader:
+    """
+    archive_segments 목록 기준으로 세그먼트를 열어 두고 조회.
+    다른 프로세스(CLI)가 세그먼트를 추가해도 조회 시 목록을 다시 읽어 반영.
+    """
+    def __init__(self, archive_dir: str, block_cache: int = BLOCK_CACHE):
+        self.archive_dir = archive_dir
+        self.block_cache = block_cache
+        self._lock = threading.Lock()
+        self._segments: Dict[str, Segment] = {}
+
+    def _refresh(self, conn: sqlite3.Connection) -> List[Tuple[Segment, float, float]]:
+        rows = conn.execute(
+            "SELECT name, min_ts, max_ts FROM archive_segments ORDER BY max_ts DESC").fetchall()
+        out = []
+        with self._lock:
+            for name, min_ts, max_ts in rows:
+                seg = self._segments.get(name)
+                if seg is None:
+                    try:
+                        seg = self._segments[name] = Segment(os.path.join(self.archive_dir, name),
+                                                             self.block_cache)
+                    except (OSError, ValueError) as e:
+                        log.error("세그먼트 열기 실패 %s: %s", name, e)
+                        continue
+                out.append((seg, min_ts, max_ts))
+        return out
+
+    def segments(self, conn: sqlite3.Connection) -> List[Tuple[Segment, float, float]]:
+        """등록된 세그먼트 (segment, min_ts, max_ts) 목록"""
+        return self._refresh(conn)
+
+    def page_before(self, conn: sqlite3.Connection, conv: str, before: Optional[float],
+                    limit: int, before_id: Optional[int] = None) -> List[list]:
+        """모든 세그먼트에서 conv의 커서 이전 최신 limit개 (오래된 순, 행은 EXPORT_COLUMNS 순서)"""
+        found: List[list] = []
+        for seg, min_ts, _ in self._refresh(conn):
+            if before is not None and (min_ts > before or (min_ts == before and before_id is None)):
+                continue
+            found += seg.page_before(conv, before, limit, before_id)
+        found.sort(key=lambda r: (r[COL_TS], r[COL_ID]))
+        return found[-limit:]
+
+    def close(self):
+        with self._lock:
+            for seg in self._segments.values():
+                seg.close()
+            self._segments.clear()
+
+
+def iter_by_id(segments: List[Tuple[Segment, float, float]], after_id: int,
+               match: Callable[[Sequence], bool], since: Optional[float] = None,
+               until: Optional[float] = None) -> Iterator[tuple]:
+    """
+    세그먼트 행 중 id > after_id이고 match(row)인 행을 id 순으로 (내보내기용).
+    세그먼트는 대화 순서로 정렬돼 있으므로 임시 SQLite 파일에 id 키로 옮겨 정렬 (메모리 사용 일정)
+    since/until 구간과 겹치지 않는 세그먼트는 열지 않음
+    """
+    segments = [seg for seg, min_ts, max_ts in segments
+                if (since is None or max_ts >= since) and (until is None or min_ts < until)]
+    if not segments:
+        return
+    with tempfile.TemporaryDirectory(prefix="tipoff-export-") as tmp:
+        sort_db = sqlite3.connect(os.path.join(tmp, "sort.db"))
+        try:
+            sort_db.execute("CREATE TABLE r (id INTEGER PRIMARY KEY, row TEXT NOT NULL)")
+            with sort_db:
+                for seg in segments:
+                    sort_db.executemany("INSERT OR IGNORE INTO r VALUES (?, ?)", (
+                        (row[COL_ID], json.dumps(row, ensure_ascii=False))
+                        for row in seg.iter_rows() if row[COL_ID] > after_id and match(row)))
+            for (raw,) in sort_db.execute("SELECT row FROM r ORDER BY id"):
+                yield tuple(json.loads(raw))
+        finally:
+            sort_db.close()
+
+
+# === 티어링 작업 ===
+def archive_older_than(conn: sqlite3.Connection, archive_dir: str, cutoff: float) -> dict:
+    """
+    timestamp < cutoff 메시지를 새 세그먼트로 옮김.
+    반환: {"segment", "rows", "bytes", "elapsed_ms"} (옮길 게 없으면 segment=None)
+    """
+    t0 = time.perf_counter()
+    os.makedirs(archive_dir, exist_ok=True)
+    _remove_orphans(conn, archive_dir)
+
+    name = time.strftime("%Y%m%d-%H%M%S", time.gmtime()) + f"-{os.getpid()}{SUFFIX}"
+    path = os.path.join(archive_dir, name)
+    tmp = path + ".tmp"
+    writer = SegmentWriter(tmp)
+    try:
+        cur = conn.execute(
+            f"SELECT {CONV_SQL} AS conv, {', '.join(EXPORT_COLUMNS)} FROM messages "
+            f"WHERE timestamp < ? ORDER BY conv, timestamp, id", (cutoff,))
+        for row in cur:
+            row = tuple(row)
+            writer.add(row[0], row[1:])
+        writer.close()
+    except BaseException:
+        writer._f.close()
+        os.unlink(tmp)
+        raise
+
+    if writer.rows == 0:
+        os.unlink(tmp)
+        return {"segment": None, "rows": 0, "bytes": 0,
+                "elapsed_ms": round((time.perf_counter() - t0) * 1000, 1)}
+
+    os.replace(tmp, path)
+    prev_isolation = conn.isolation_level
+    conn.isolation_level = None
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO archive_segments (name, min_ts, max_ts, max_id, rows, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (name, writer.min_ts, writer.max_ts, writer.max_id, writer.rows, time.time()))
+            # 스냅샷 이후 들어온 행(id > max_id)은 남김
+            deleted = conn.execute("DELETE FROM messages WHERE timestamp < ? AND id <= ?",
+                                   (cutoff, writer.max_id)).rowcount
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.isolation_level = prev_isolation
+    if deleted != writer.rows:
+        log.warning("세그먼트 행 수(%d)와 삭제 행 수(%d)가 다름", writer.rows, deleted)
+    size = os.path.getsize(path)
+    log.info("세그먼트 %s: %d건, %.1fMB", name, writer.rows, size / 1e6)
+    return {"segment": name, "rows": writer.rows, "bytes": size,
+            "elapsed_ms": round((time.perf_counter() - t0) * 1000, 1)}
+
+
+def _remove_orphans(conn: sqlite3.Connection, archive_dir: str):
+    """등록 전에 중단된 세그먼트(목록에 없는 파일) 삭제 - 티어링 작업은 한 번에 하나만 실행할 것"""
+    known = {r[0] for r in conn.execute("SELECT name FROM archive_segments")}
+    for fn in os.listdir(archive_dir):
+        if (fn.endswith(SUFFIX) and fn not in known) or fn.endswith(SUFFIX + ".tmp"):
+            log.warning("미등록 세그먼트 삭제: %s", fn)
+            os.unlink(os.path.join(archive_dir, fn))
+
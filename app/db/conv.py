@@ -0,0 +1,24 @@
+"""
+대화(conversation) 키 - 아카이브 정렬 키, 읽음 커서, 안 읽은 수 계산에 공용
+- 로비: "L:<room_id>"
+- DM:   "D:<작은 user_id>|<큰 user_id>" (방향 무관)
+"""
+
+# SQL로 계산한 conv 키 (컬럼 이름 앞에 붙일 접두어, 예: "new.")
+def conv_sql(prefix: str = "") -> str:
+    p = prefix
+    return (f"CASE {p}message_type WHEN 'lobby' THEN 'L:' || {p}room_id "
+            f"ELSE 'D:' || min({p}from_user_id, ifnull({p}to_user_id, '')) || '|' "
+            f"|| max({p}from_user_id, ifnull({p}to_user_id, '')) END")
+
+
+CONV_SQL = conv_sql()
+
+
+def lobby_conv(room_id: str) -> str:
+    return "L:" + room_id
+
+
+def dm_conv(user1: str, user2: str) -> str:
+    a, b = sorted((user1, user2 or ""))
+    return f"D:{a}|{b}"
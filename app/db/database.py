@@ -1,69 +1,48 @@
 """
 SQLite 데이터베이스 관리
 """
+import heapq
+import itertools
 import sqlite3
 import os
+from operator import itemgetter
 from datetime import datetime
-from typing import List, Optional, Tuple
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
 from contextlib import contextmanager
-from .models import Message, MessageType, User, Room
+from pathlib import Path
+from .models import Message, MessageType, User, Room, RoomSummary
+from .migrations import migrate
+from .transfer import INSERT_SQL, EXPORT_COLUMNS, export_match, export_query
+from . import archive
+from .conv import lobby_conv, dm_conv
+
+MESSAGE_COLUMNS = ", ".join(EXPORT_COLUMNS)
 
 class DatabaseManager:
-    def __init__(self, db_path: str = "tipoff.db"):
+    def __init__(self, db_path: str = "tipoff.db", archive_dir: Optional[str] = None,
+                 read_only: bool = False, archive_block_cache: int = archive.BLOCK_CACHE):
         self.db_path = db_path
-        self._init_database()
+        # 읽기 전용: 멀티 프로세스 모드의 API 워커 (마이그레이션/쓰기는 수집기 프로세스 담당)
+        self.read_only = read_only
+        self._uri = Path(db_path).absolute().as_uri() + "?mode=ro" if read_only else None
+        # 콜드 스토리지 세그먼트 (hot 페이지가 모자랄 때만 조회)
+        self.archive = archive.ArchiveReader(archive_dir or archive.default_archive_dir(db_path),
+                                             block_cache=archive_block_cache)
+        if not read_only:
+            self._init_database()
 
     def _init_database(self):
-        """데이터베이스 초기화 및 테이블 생성"""
+        """데이터베이스 초기화 - 버전 기반 마이그레이션 적용"""
         with self._get_connection() as conn:
-            # 메시지 테이블
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS messages (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    msg_id TEXT UNIQUE NOT NULL,
-                    room_id TEXT NOT NULL,
-                    message_type TEXT NOT NULL,
-                    from_user_id TEXT NOT NULL,
-                    to_user_id TEXT,
-                    nick TEXT NOT NULL,
-                    text TEXT NOT NULL,
-                    timestamp REAL NOT NULL,
-                    created_at REAL NOT NULL
-                )
-            """)
-            
-            # 인덱스 생성
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_room_timestamp ON messages (room_id, timestamp)")
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_dm_users ON messages (from_user_id, to_user_id, timestamp)")
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_msg_id ON messages (msg_id)")
-
-            # 사용자 테이블
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS users (
-                    user_id TEXT PRIMARY KEY,
-                    anon_nick TEXT NOT NULL,
-                    last_seen REAL NOT NULL,
-                    ip TEXT,
-                    dm_port INTEGER,
-                    room_id TEXT NOT NULL DEFAULT 'lobby'
-                )
-            """)
-
-            # 룸 테이블
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS rooms (
-                    room_id TEXT PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    created_at REAL NOT NULL
-                )
-            """)
-
-            conn.commit()
+            migrate(conn, verbose=True)
 
     @contextmanager
     def _get_connection(self):
         """DB 연결 컨텍스트 매니저"""
-        conn = sqlite3.connect(self.db_path)
+        if self._uri:
+            conn = sqlite3.connect(self._uri, uri=True)
+        else:
+            conn = sqlite3.connect(self.db_path)
         conn.row_factory = sqlite3.Row
         try:
             yield conn
@@ -76,8 +55,8 @@ class DatabaseManager:
         with self._get_connection() as conn:
             cursor = conn.execute("""
                 INSERT OR IGNORE INTO messages 
-                (msg_id, room_id, message_type, from_user_id, to_user_id, nick, text, timestamp, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                (msg_id, room_id, message_type, from_user_id, to_user_id, nick, text, timestamp, created_at, seq, sess)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (
                 message.msg_id,
                 message.room_id,
@@ -87,49 +66,143 @@ class DatabaseManager:
                 message.nick,
                 message.text,
                 message.timestamp.timestamp(),
-                message.created_at.timestamp()
+                message.created_at.timestamp(),
+                message.seq,
+                message.sess
             ))
             conn.commit()
             return cursor.lastrowid
 
-    def get_lobby_messages(self, room_id: str, limit: int = 100, before_timestamp: Optional[datetime] = None) -> List[Message]:
-        """로비 메시지 조회"""
+    # 히스토리 조회는 EXPORT_COLUMNS 순서 행 튜플(오래된 순)로 읽음
+    # → API는 튜플을 바로 JSON으로 쓰고(*_rows), Message가 필요한 곳은 *_messages로 변환
+    def get_lobby_rows(self, room_id: str, limit: int = 100, before: Optional[float] = None,
+                       before_id: Optional[int] = None) -> List[tuple]:
+        """
+        로비 메시지 행 튜플 조회 (before: epoch 초, 미포함)
+        before_id: 이전 페이지의 가장 오래된 행 id → (timestamp, id) 키셋 커서 (_page_cursor)
+        """
         with self._get_connection() as conn:
-            query = """
-                SELECT * FROM messages 
+            conn.row_factory = None
+            before, before_id = self._page_cursor(conn, before, before_id)
+            query = f"""
+                SELECT {MESSAGE_COLUMNS} FROM messages 
                 WHERE room_id = ? AND message_type = 'lobby'
             """
-            params = [room_id]
-            
-            if before_timestamp:
+            params: list = [room_id]
+            if before_id is not None:
+                query += " AND (timestamp, id) < (?, ?)"
+                params += [before, before_id]
+            elif before is not None:
                 query += " AND timestamp < ?"
-                params.append(before_timestamp.timestamp())
-            
-            query += " ORDER BY timestamp DESC LIMIT ?"
+                params.append(before)
+            query += " ORDER BY timestamp DESC, id DESC LIMIT ?"
             params.append(limit)
-            
             rows = conn.execute(query, params).fetchall()
-            return [self._row_to_message(row) for row in reversed(rows)]
+            return self._with_archive(conn, rows[::-1], lobby_conv(room_id), before, before_id, limit)
 
-    def get_dm_messages(self, user1: str, user2: str, limit: int = 100, before_timestamp: Optional[datetime] = None) -> List[Message]:
-        """DM 메시지 조회"""
+    def get_lobby_messages(self, room_id: str, limit: int = 100, before_timestamp: Optional[datetime] = None) -> List[Message]:
+        """로비 메시지 조회"""
+        before = before_timestamp.timestamp() if before_timestamp else None
+        return self._rows_to_messages(self.get_lobby_rows(room_id, limit, before))
+
+    def get_lobby_rows_after(self, room_id: str, after_id: int, limit: int = 100) -> List[tuple]:
+        """
+        after_id 이후(id > after_id) 로비 메시지 중 가장 오래된 limit개 행 튜플 - 증분 동기화용
+        (마지막 행 id를 다음 after_id로 넘겨 짧은 페이지가 올 때까지 위로 페이지 이동 → 빠지는 구간 없음)
+        """
         with self._get_connection() as conn:
-            query = """
-                SELECT * FROM messages 
-                WHERE message_type = 'dm' 
-                AND ((from_user_id = ? AND to_user_id = ?) OR (from_user_id = ? AND to_user_id = ?))
-            """
-            params = [user1, user2, user2, user1]
-            
-            if before_timestamp:
-                query += " AND timestamp < ?"
-                params.append(before_timestamp.timestamp())
-            
-            query += " ORDER BY timestamp DESC LIMIT ?"
+            conn.row_factory = None
+            # +room_id/+message_type: 인덱스 대신 rowid 범위(id > ?)로 새 메시지만 훑도록 함
+            return conn.execute(f"""
+                SELECT {MESSAGE_COLUMNS} FROM messages 
+                WHERE +room_id = ? AND +message_type = 'lobby' AND id > ?
+                ORDER BY id ASC LIMIT ?
+            """, (room_id, after_id, limit)).fetchall()
+
+    def get_lobby_messages_after(self, room_id: str, after_id: int, limit: int = 100) -> List[Message]:
+        """after_id 이후(id > after_id) 로비 메시지 중 가장 오래된 limit개 조회 - 증분 동기화용"""
+        return self._rows_to_messages(self.get_lobby_rows_after(room_id, after_id, limit))
+
+    def get_lobby_rows_by_seq(self, room_id: str, from_user_id: str, sess: str,
+                              seq_from: int, seq_to: int) -> List[tuple]:
+        """송신자 세션의 seq 구간 [seq_from, seq_to] 로비 메시지 행 튜플 - gap-fill용"""
+        with self._get_connection() as conn:
+            conn.row_factory = None
+            return conn.execute(f"""
+                SELECT {MESSAGE_COLUMNS} FROM messages 
+                WHERE from_user_id = ? AND sess = ? AND seq BETWEEN ? AND ?
+                AND room_id = ? AND message_type = 'lobby'
+                ORDER BY seq ASC
+            """, (from_user_id, sess, seq_from, seq_to, room_id)).fetchall()
+
+    def get_lobby_messages_by_seq(self, room_id: str, from_user_id: str, sess: str,
+                                  seq_from: int, seq_to: int) -> List[Message]:
+        """송신자 세션의 seq 구간 [seq_from, seq_to] 로비 메시지 조회 - gap-fill용"""
+        return self._rows_to_messages(
+            self.get_lobby_rows_by_seq(room_id, from_user_id, sess, seq_from, seq_to))
+
+    def get_dm_rows(self, user1: str, user2: str, limit: int = 100, before: Optional[float] = None,
+                    before_id: Optional[int] = None) -> List[tuple]:
+        """DM 메시지 행 튜플 조회 (before: epoch 초, 미포함, before_id: get_lobby_rows와 같음)"""
+        with self._get_connection() as conn:
+            conn.row_factory = None
+            before, before_id = self._page_cursor(conn, before, before_id)
+            # 방향별로 idx_dm_users (from, to, timestamp)를 정렬 순서 그대로 타고
+            # 각각 limit개만 읽은 뒤 합쳐서 다시 자름 (OR 조건 + 전체 정렬 회피)
+            cond = "from_user_id = ? AND to_user_id = ? AND message_type = 'dm'"
+            cursor: list = []
+            if before_id is not None:
+                cond += " AND (timestamp, id) < (?, ?)"
+                cursor = [before, before_id]
+            elif before is not None:
+                cond += " AND timestamp < ?"
+                cursor = [before]
+            order = "ORDER BY timestamp DESC, id DESC LIMIT ?"
+            side = f"SELECT * FROM (SELECT {MESSAGE_COLUMNS} FROM messages WHERE {cond} {order})"
+            query = f"SELECT * FROM ({side} UNION ALL {side}) {order}"
+
+            params: list = []
+            for a, b in ((user1, user2), (user2, user1)):
+                params += [a, b] + cursor + [limit]
             params.append(limit)
-            
             rows = conn.execute(query, params).fetchall()
-            return [self._row_to_message(row) for row in reversed(rows)]
+            return self._with_archive(conn, rows[::-1], dm_conv(user1, user2), before, before_id, limit)
+
+    def get_dm_messages(self, user1: str, user2: str, limit: int = 100, before_timestamp: Optional[datetime] = None) -> List[Message]:
+        """DM 메시지 조회"""
+        before = before_timestamp.timestamp() if before_timestamp else None
+        return self._rows_to_messages(self.get_dm_rows(user1, user2, limit, before))
+
+    def _page_cursor(self, conn, before: Optional[float],
+                     before_id: Optional[int]) -> Tuple[Optional[float], Optional[int]]:
+        """
+        이전 페이지 커서 → (timestamp, id). before_id 행이 hot에 있으면 그 행의 timestamp를 그대로 씀
+        (ISO 문자열로 오간 before는 마이크로초로 반올림돼 같은 시각 행이 빠지거나 겹칠 수 있음).
+        아카이브로 옮겨진 행이면 넘겨받은 before와 함께 사용, 둘 다 없으면 ValueError.
+        """
+        if before_id is None:
+            return before, None
+        row = conn.execute("SELECT timestamp FROM messages WHERE id = ?", (before_id,)).fetchone()
+        if row is not None:
+            return row[0], before_id
+        if before is None:
+            raise ValueError(f"unknown before_id: {before_id}")
+        return before, before_id
+
+    def _with_archive(self, conn, rows: list, conv: str, before: Optional[float],
+                      before_id: Optional[int], limit: int) -> list:
+        """
+        hot 페이지(오래된 순)가 limit보다 적으면 같은 커서 조건으로 아카이브에서 채워
+        합친 뒤 최신 limit개 반환 (늦게 도착한 오래된 메시지가 hot에 있어도 순서 유지)
+        """
+        if len(rows) >= limit:
+            return rows
+        cold = self.archive.page_before(conn, conv, before, limit, before_id)
+        if not cold:
+            return rows
+        merged = [tuple(r) for r in cold] + rows
+        merged.sort(key=lambda r: (r[archive.COL_TS], r[archive.COL_ID]))
+        return merged[-limit:]
 
     def get_recent_messages(self, room_id: str, limit: int = 50) -> List[Message]:
         """최근 메시지 조회 (로비 + DM)"""
@@ -141,6 +214,67 @@ class DatabaseManager:
             """, (room_id, limit)).fetchall()
             return [self._row_to_message(row) for row in reversed(rows)]
 
+    # === 내보내기/가져오기 ===
+    def iter_export(self, room_id: Optional[str] = None, since: Optional[float] = None,
+                    until: Optional[float] = None, types: Sequence[str] = (),
+                    after_id: int = 0, limit: Optional[int] = None,
+                    batch: int = 1000) -> Iterator[tuple]:
+        """
+        조건에 맞는 메시지를 id 순으로 batch개씩 조회해 행 튜플(EXPORT_COLUMNS 순서)로 반환.
+        페이지마다 연결을 새로 열어 긴 읽기 트랜잭션을 만들지 않음.
+        콜드 스토리지로 옮긴 메시지도 같은 조건으로 걸러 id 순으로 합침 (after_id 이어받기 그대로 동작)
+        """
+        with self._get_connection() as conn:
+            segments = self.archive.segments(conn)
+        cold = archive.iter_by_id(segments, after_id, export_match(room_id, since, until, types),
+                                  since, until)
+        hot = self._iter_hot_export(export_query(room_id, since, until, types), after_id, limit, batch)
+        rows = heapq.merge(cold, hot, key=itemgetter(0))
+        yield from (rows if limit is None else itertools.islice(rows, limit))
+
+    def _iter_hot_export(self, query: Tuple[str, list], after_id: int, limit: Optional[int],
+                         batch: int) -> Iterator[tuple]:
+        sql, params = query
+        cursor_id = after_id
+        remaining = limit
+        while remaining is None or remaining > 0:
+            n = batch if remaining is None else min(batch, remaining)
+            with self._get_connection() as conn:
+                conn.row_factory = None
+                rows = conn.execute(sql, [cursor_id] + params + [n]).fetchall()
+            if not rows:
+                return
+            yield from rows
+            cursor_id = rows[-1][0]
+            if remaining is not None:
+                remaining -= len(rows)
+            if len(rows) < n:
+                return
+
+    def import_messages(self, rows: Iterable[tuple], batch: int = 5000) -> int:
+        """INSERT 파라미터 튜플을 batch개씩 한 트랜잭션으로 저장, 새로 들어간 행 수 반환 (msg_id 중복은 무시)"""
+        inserted = 0
+        chunk: list = []
+        with self._get_connection() as conn:
+            def _flush():
+                nonlocal inserted
+                with conn:
+                    # rowcount는 문장별 changes()의 합 - 트리거(룸 요약/대화 카운터)가 쓴 행은 세지 않음
+                    inserted += conn.executemany(INSERT_SQL, chunk).rowcount
+                chunk.clear()
+
+            for row in rows:
+                chunk.append(row)
+                if len(chunk) >= batch:
+                    _flush()
+            if chunk:
+                _flush()
+        return inserted
+
+    def _rows_to_messages(self, rows: Iterable[tuple]) -> List[Message]:
+        """EXPORT_COLUMNS 순서 행 튜플 → Message"""
+        return [self._row_to_message(dict(zip(EXPORT_COLUMNS, row))) for row in rows]
+
     def _row_to_message(self, row) -> Message:
         """DB 행을 Message 객체로 변환"""
         return Message(
@@ -153,7 +287,9 @@ class DatabaseManager:
             nick=row['nick'],
             text=row['text'],
             timestamp=datetime.fromtimestamp(row['timestamp']),
-            created_at=datetime.fromtimestamp(row['created_at'])
+            created_at=datetime.fromtimestamp(row['created_at']),
+            seq=row['seq'],
+            sess=row['sess']
         )
 
     # === 사용자 관련 ===
@@ -192,7 +328,7 @@ class DatabaseManager:
                 )
             return None
 
-    def get_room_users(self, room_id: str, active_minutes: int = 15) -> List[User]:
+    def get_room_users(self, room_id: str, active_minutes: float = 15) -> List[User]:
         """룸의 활성 사용자 목록 조회"""
         cutoff = datetime.now().timestamp() - (active_minutes * 60)
         with self._get_connection() as conn:
@@ -211,6 +347,88 @@ class DatabaseManager:
                 room_id=row['room_id']
             ) for row in rows]
 
+    # === 읽음 커서 ===
+    def get_unread(self, user_id: str, room_id: str) -> dict:
+        """
+        로비(room_id)와 user_id의 DM 대화별 안 읽은 수 - 대화당 카운터 차이로 계산 (COUNT 스캔 없음)
+        로비 커서가 없으면(처음 입장) 0, DM 커서가 없으면 받은 메시지 전부가 안 읽음
+        """
+        with self._get_connection() as conn:
+            row = conn.execute("""
+                SELECT c.msg_seq, rc.read_seq FROM conversations c
+                LEFT JOIN read_cursors rc ON rc.user_id = ? AND rc.conv_id = c.conv_id
+                WHERE c.conv_id = ?
+            """, (user_id, lobby_conv(room_id))).fetchone()
+            lobby = 0
+            if row and row['read_seq'] is not None:
+                lobby = max(0, row['msg_seq'] - row['read_seq'])
+            rows = conn.execute("""
+                SELECT c.user_a, c.user_b, c.msg_seq, c.last_timestamp,
+                       c.msg_seq - IFNULL(rc.read_seq, 0) AS unread
+                FROM conversations c
+                LEFT JOIN read_cursors rc ON rc.user_id = ? AND rc.conv_id = c.conv_id
+                WHERE (c.user_a = ? OR c.user_b = ?) AND c.msg_seq > IFNULL(rc.read_seq, 0)
+                ORDER BY c.last_timestamp DESC
+            """, (user_id, user_id, user_id)).fetchall()
+            dms = [{
+                "peer_id": r['user_b'] if r['user_a'] == user_id else r['user_a'],
+                "unread": r['unread'],
+                "last_timestamp": datetime.fromtimestamp(r['last_timestamp']).isoformat(),
+            } for r in rows]
+            return {"room_id": room_id, "lobby": lobby, "dms": dms,
+                    "total": lobby + sum(d["unread"] for d in dms)}
+
+    def mark_read(self, user_id: str, conv_id: str, seq: Optional[int] = None) -> Optional[int]:
+        """
+        conv_id의 읽음 커서를 seq(없으면 현재 끝)로 이동 - 뒤로 가지는 않음.
+        갱신된 read_seq 반환, 대화가 없으면 None
+        """
+        with self._get_connection() as conn:
+            with conn:
+                conn.execute("""
+                    INSERT INTO read_cursors (user_id, conv_id, read_seq, updated_at)
+                    SELECT ?, conv_id, min(IFNULL(?, msg_seq), msg_seq), ?
+                    FROM conversations WHERE conv_id = ?
+                    ON CONFLICT(user_id, conv_id) DO UPDATE SET
+                        read_seq = max(read_seq, excluded.read_seq),
+                        updated_at = excluded.updated_at
+                """, (user_id, seq, datetime.now().timestamp(), conv_id))
+            row = conn.execute("SELECT read_seq FROM read_cursors WHERE user_id = ? AND conv_id = ?",
+                               (user_id, conv_id)).fetchone()
+            return row['read_seq'] if row else None
+
+    def preview_read(self, user_id: str, conv_id: str, seq: Optional[int] = None) -> Optional[int]:
+        """mark_read()가 반환할 read_seq를 쓰지 않고 계산 (읽기 전용 API 워커용)"""
+        with self._get_connection() as conn:
+            row = conn.execute("""
+                SELECT c.msg_seq, rc.read_seq FROM conversations c
+                LEFT JOIN read_cursors rc ON rc.user_id = ? AND rc.conv_id = c.conv_id
+                WHERE c.conv_id = ?
+            """, (user_id, conv_id)).fetchone()
+            if row is None:
+                return None
+            target = row['msg_seq'] if seq is None else min(seq, row['msg_seq'])
+            return target if row['read_seq'] is None else max(row['read_seq'], target)
+
+    def enable_wal(self) -> str:
+        """WAL 저널 모드로 전환 (DB 파일에 유지) - 읽기 전용 워커가 쓰기 중에도 조회하도록"""
+        with self._get_connection() as conn:
+            return conn.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+
+    def get_active_users(self, active_minutes: float = 15) -> List[User]:
+        """모든 룸의 활성 사용자 (서버 시작 시 메모리 활성 집합 초기화용)"""
+        cutoff = datetime.now().timestamp() - (active_minutes * 60)
+        with self._get_connection() as conn:
+            rows = conn.execute("SELECT * FROM users WHERE last_seen > ?", (cutoff,)).fetchall()
+            return [User(
+                user_id=row['user_id'],
+                anon_nick=row['anon_nick'],
+                last_seen=datetime.fromtimestamp(row['last_seen']),
+                ip=row['ip'],
+                dm_port=row['dm_port'],
+                room_id=row['room_id']
+            ) for row in rows]
+
     # === 룸 관련 ===
     def save_room(self, room: Room):
         """룸 정보 저장"""
@@ -236,6 +454,109 @@ class DatabaseManager:
                 )
             return None
 
+    def get_rooms(self) -> List[RoomSummary]:
+        """룸 목록 + 요약 (최근 활동 순) - room_summary를 그대로 읽으므로 messages를 훑지 않음"""
+        with self._get_connection() as conn:
+            rows = conn.execute("""
+                SELECT r.room_id, r.name, r.created_at,
+                       IFNULL(s.message_count, 0) AS message_count,
+                       IFNULL(s.active_users, 0) AS active_users,
+                       s.last_message_id, s.last_timestamp, m.nick, m.text
+                FROM rooms r
+                LEFT JOIN room_summary s ON s.room_id = r.room_id
+                LEFT JOIN messages m ON m.id = s.last_message_id
+                ORDER BY IFNULL(s.last_timestamp, 0) DESC, r.room_id
+            """).fetchall()
+            return [RoomSummary(
+                room_id=row['room_id'],
+                name=row['name'],
+                created_at=datetime.fromtimestamp(row['created_at']),
+                message_count=row['message_count'],
+                active_users=row['active_users'],
+                last_message_id=row['last_message_id'],
+                last_timestamp=datetime.fromtimestamp(row['last_timestamp']) if row['last_timestamp'] else None,
+                last_nick=row['nick'],
+                last_text=row['text']
+            ) for row in rows]
+
+    def refresh_room_activity(self, active_minutes: float = 15):
+        """room_summary.active_users를 최근 active_minutes분 내 접속 사용자 수로 갱신"""
+        cutoff = datetime.now().timestamp() - (active_minutes * 60)
+        with self._get_connection() as conn:
+            counts = conn.execute("""
+                SELECT room_id, COUNT(*) FROM users WHERE last_seen > ? GROUP BY room_id
+            """, (cutoff,)).fetchall()
+            with conn:
+                conn.execute("UPDATE room_summary SET active_users = 0 WHERE active_users != 0")
+                conn.executemany("""
+                    INSERT INTO room_summary (room_id, active_users) VALUES (?, ?)
+                    ON CONFLICT(room_id) DO UPDATE SET active_users = excluded.active_users
+                """, [(row[0], row[1]) for row in counts])
+
+    # === 활동 집계 ===
+    def add_activity(self, minute_rows: Sequence[tuple], hour_rows: Sequence[tuple],
+                     talker_rows: Sequence[tuple]):
+        """집계 카운트 (bucket, room_id, type/user_id, n)를 한 트랜잭션에 더함"""
+        with self._get_connection() as conn:
+            with conn:
+                for table, key, rows in (("activity_minute", "message_type", minute_rows),
+                                         ("activity_hour", "message_type", hour_rows),
+                                         ("talker_hour", "user_id", talker_rows)):
+                    conn.executemany(f"""
+                        INSERT INTO {table} (bucket, room_id, {key}, messages) VALUES (?, ?, ?, ?)
+                        ON CONFLICT(bucket, room_id, {key}) DO UPDATE SET messages = messages + excluded.messages
+                    """, rows)
+
+    def compact_activity(self, minute_before: float, talker_before: Optional[float] = None) -> int:
+        """보존 기간이 지난 분 단위(및 발신자) 버킷 삭제 - 같은 구간은 시간 단위에 남음"""
+        with self._get_connection() as conn:
+            with conn:
+                deleted = conn.execute("DELETE FROM activity_minute WHERE bucket < ?",
+                                       (minute_before,)).rowcount
+                if talker_before is not None:
+                    deleted += conn.execute("DELETE FROM talker_hour WHERE bucket < ?",
+                                            (talker_before,)).rowcount
+            return deleted
+
+    def get_activity_series(self, resolution: str, since: float, until: float, step: int,
+                            room_id: Optional[str] = None,
+                            message_type: Optional[str] = None) -> List[Tuple[int, int]]:
+        """[since, until) 구간의 (버킷 시작, 메시지 수) - step초 간격으로 합침, 빈 버킷은 없음"""
+        table = "activity_minute" if resolution == "minute" else "activity_hour"
+        query = f"""
+            SELECT (bucket / ?) * ? AS t, SUM(messages) FROM {table}
+            WHERE bucket >= ? AND bucket < ?
+        """
+        params: list = [step, step, since, until]
+        if room_id:
+            query += " AND room_id = ?"
+            params.append(room_id)
+        if message_type:
+            query += " AND message_type = ?"
+            params.append(message_type)
+        query += " GROUP BY t ORDER BY t"
+        with self._get_connection() as conn:
+            conn.row_factory = None
+            return conn.execute(query, params).fetchall()
+
+    def get_top_talkers(self, since: float, until: float, room_id: Optional[str] = None,
+                        limit: int = 10) -> List[Tuple[str, Optional[str], int]]:
+        """[since, until) 구간(시간 단위) 메시지를 많이 보낸 사용자 (user_id, 닉네임, 메시지 수)"""
+        query = "SELECT user_id, SUM(messages) AS n FROM talker_hour WHERE bucket >= ? AND bucket < ?"
+        params: list = [since, until]
+        if room_id:
+            query += " AND room_id = ?"
+            params.append(room_id)
+        query += " GROUP BY user_id ORDER BY n DESC, user_id LIMIT ?"
+        params.append(limit)
+        with self._get_connection() as conn:
+            conn.row_factory = None
+            return conn.execute(f"""
+                SELECT t.user_id, u.anon_nick, t.n FROM ({query}) t
+                LEFT JOIN users u ON u.user_id = t.user_id
+                ORDER BY t.n DESC, t.user_id
+            """, params).fetchall()
+
     # === 유틸리티 ===
     def cleanup_old_data(self, days: int = 30):
         """오래된 데이터 정리"""
@@ -253,6 +574,12 @@ class DatabaseManager:
             """, (cutoff, cutoff))
             conn.commit()
 
+    def archive_older_than(self, days: float) -> dict:
+        """timestamp가 days일 이전인 메시지를 콜드 스토리지 세그먼트로 이동"""
+        cutoff = datetime.now().timestamp() - days * 24 * 60 * 60
+        with self._get_connection() as conn:
+            return archive.archive_older_than(conn, self.archive.archive_dir, cutoff)
+
     def get_stats(self) -> dict:
         """데이터베이스 통계 조회"""
         with self._get_connection() as conn:
@@ -262,4 +589,5 @@ class DatabaseManager:
             stats['total_rooms'] = conn.execute("SELECT COUNT(*) FROM rooms").fetchone()[0]
             stats['lobby_messages'] = conn.execute("SELECT COUNT(*) FROM messages WHERE message_type = 'lobby'").fetchone()[0]
             stats['dm_messages'] = conn.execute("SELECT COUNT(*) FROM messages WHERE message_type = 'dm'").fetchone()[0]
+            stats['archived_messages'] = conn.execute("SELECT IFNULL(SUM(rows), 0) FROM archive_segments").fetchone()[0]
             return stats
\ No newline at end of file
@@ -0,0 +1,419 @@
+"""
+스키마 마이그레이션 - PRAGMA user_version 기반
+- MIGRATIONS는 버전 순서대로 적용, 각 마이그레이션은 자체 트랜잭션에서
+  스키마 변경 + user_version 갱신을 함께 커밋 → 중간에 죽어도 다음 실행 시 이어서 진행
+- 새 마이그레이션은 목록 끝에 추가만 할 것 (기존 항목 수정/재정렬 금지)
+- QUERY_SHAPES: 실제 조회 쿼리 형태와 기대 인덱스 (EXPLAIN QUERY PLAN으로 검증)
+
+    python -m app.db.migrations tipoff.db            # 마이그레이션 적용
+    python -m app.db.migrations tipoff.db --audit    # 쿼리 플랜 검증
+"""
+import sqlite3
+import sys
+from typing import Callable, List, Tuple
+from app.core.log import get_logger, setup_logging
+from .conv import conv_sql
+
+log = get_logger("db")
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> set:
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _m001_baseline(conn: sqlite3.Connection):
+    """기존 _init_database 스키마 (이미 있는 DB는 빠진 컬럼만 추가)"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            msg_id TEXT UNIQUE NOT NULL,
+            room_id TEXT NOT NULL,
+            message_type TEXT NOT NULL,
+            from_user_id TEXT NOT NULL,
+            to_user_id TEXT,
+            nick TEXT NOT NULL,
+            text TEXT NOT NULL,
+            timestamp REAL NOT NULL,
+            created_at REAL NOT NULL,
+            seq INTEGER,
+            sess TEXT
+        )
+    """)
+    cols = _columns(conn, "messages")
+    if "seq" not in cols:
+        conn.execute("ALTER TABLE messages ADD COLUMN seq INTEGER")
+    if "sess" not in cols:
+        conn.execute("ALTER TABLE messages ADD COLUMN sess TEXT")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_room_timestamp ON messages (room_id, timestamp)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_dm_users ON messages (from_user_id, to_user_id, timestamp)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_msg_id ON messages (msg_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sender_seq ON messages (from_user_id, sess, seq)")
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            user_id TEXT PRIMARY KEY,
+            anon_nick TEXT NOT NULL,
+            last_seen REAL NOT NULL,
+            ip TEXT,
+            dm_port INTEGER,
+            room_id TEXT NOT NULL DEFAULT 'lobby'
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS rooms (
+            room_id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            created_at REAL NOT NULL
+        )
+    """)
+
+
+def _m002_drop_redundant_msg_id_index(conn: sqlite3.Connection):
+    """UNIQUE(msg_id)가 이미 sqlite_autoindex를 만들므로 idx_msg_id는 쓰기만 두 배로 만듦"""
+    conn.execute("DROP INDEX IF EXISTS idx_msg_id")
+
+
+def _m003_lobby_history_index(conn: sqlite3.Connection):
+    """
+    로비 히스토리는 항상 room_id + message_type='lobby' + timestamp 정렬
+    → (room_id, message_type, timestamp)로 필터와 정렬을 한 번에 처리.
+    (room_id, timestamp)는 이 인덱스로 대체되므로 삭제.
+    SELECT * 를 덮는 covering 인덱스로 만들지 않은 이유 (1M 메시지 합성 DB, 50행 페이지 측정):
+    - 페이지 조회는 약 190us → 176us (8%)로만 빨라짐 - 50행 rowid 조회가 비용의 대부분이 아님
+    - 본문까지 복사돼 DB가 310MB → 472MB (+52%), 페이지 캐시 효율이 떨어짐
+    - rowid가 모든 컬럼 뒤에 붙어 (timestamp, id) 키셋 정렬에 임시 B-tree가 다시 생김
+    """
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_lobby_ts ON messages (room_id, message_type, timestamp)")
+    conn.execute("DROP INDEX IF EXISTS idx_room_timestamp")
+
+
+def _m004_archive_segments(conn: sqlite3.Connection):
+    """콜드 스토리지 세그먼트 목록 (app.db.archive) - 여기 등록된 파일만 조회 대상"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS archive_segments (
+            name TEXT PRIMARY KEY,
+            min_ts REAL NOT NULL,
+            max_ts REAL NOT NULL,
+            max_id INTEGER NOT NULL,
+            rows INTEGER NOT NULL,
+            created_at REAL NOT NULL
+        )
+    """)
+
+
+def _m005_room_summary(conn: sqlite3.Connection):
+    """
+    룸 요약 (메시지 수, 마지막 로비 메시지, 활성 사용자 수)
+    - 메시지 INSERT 트리거가 룸 자동 등록 + 로비 메시지 수/마지막 메시지 갱신
+      (수집기/가져오기 등 모든 쓰기 경로에 적용, INSERT OR IGNORE로 무시된 중복은 제외)
+    - message_count는 누적 수신 수 (정리/아카이브로 hot 행이 지워져도 줄지 않음)
+    - active_users는 수집기가 주기적으로 갱신 (DatabaseManager.refresh_room_activity)
+    - 마지막 메시지는 로비만 대상 (DM 내용이 룸 목록에 노출되지 않도록)
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS room_summary (
+            room_id TEXT PRIMARY KEY,
+            message_count INTEGER NOT NULL DEFAULT 0,
+            last_message_id INTEGER,
+            last_timestamp REAL NOT NULL DEFAULT 0,
+            active_users INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_room_summary AFTER INSERT ON messages
+        BEGIN
+            INSERT OR IGNORE INTO rooms (room_id, name, created_at)
+            VALUES (new.room_id, new.room_id, new.created_at);
+            INSERT OR IGNORE INTO room_summary (room_id) VALUES (new.room_id);
+            UPDATE room_summary SET
+                message_count = message_count + 1,
+                last_message_id = CASE WHEN new.timestamp >= last_timestamp
+                                       THEN new.id ELSE last_message_id END,
+                last_timestamp = max(last_timestamp, new.timestamp)
+            WHERE room_id = new.room_id AND new.message_type = 'lobby';
+        END
+    """)
+    # 기존 데이터로 초기값 채움
+    conn.execute("""
+        INSERT OR IGNORE INTO rooms (room_id, name, created_at)
+        SELECT room_id, room_id, MIN(created_at) FROM messages GROUP BY room_id
+    """)
+    conn.execute("INSERT OR IGNORE INTO room_summary (room_id) SELECT room_id FROM rooms")
+    conn.execute("""
+        UPDATE room_summary SET
+            message_count = (SELECT COUNT(*) FROM messages m
+                             WHERE m.room_id = room_summary.room_id AND m.message_type = 'lobby'),
+            last_message_id = (SELECT m.id FROM messages m
+                               WHERE m.room_id = room_summary.room_id AND m.message_type = 'lobby'
+                               ORDER BY m.timestamp DESC LIMIT 1),
+            last_timestamp = IFNULL((SELECT MAX(m.timestamp) FROM messages m
+                                     WHERE m.room_id = room_summary.room_id
+                                     AND m.message_type = 'lobby'), 0)
+    """)
+
+
+def _m006_read_cursors(conn: sqlite3.Connection):
+    """
+    안 읽은 수 = conversations.msg_seq - read_cursors.read_seq (COUNT 없이 대화당 한 행)
+    - conversations: 대화별 누적 메시지 수(seq 카운터), DM은 참여자 두 명을 인덱스로 찾음
+    - 메시지 INSERT 트리거가 카운터 증가 + 보낸 사람의 커서를 최신으로 (답장 = 읽음)
+    - 기존 데이터: 카운터를 채우고 참여자 커서를 끝으로 둠 (업그레이드 시점까지는 읽은 것으로)
+    """
+    conv = conv_sql("new.")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS conversations (
+            conv_id TEXT PRIMARY KEY,
+            room_id TEXT NOT NULL,
+            user_a TEXT,
+            user_b TEXT,
+            msg_seq INTEGER NOT NULL DEFAULT 0,
+            last_timestamp REAL NOT NULL DEFAULT 0
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_conv_user_a ON conversations (user_a)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_conv_user_b ON conversations (user_b)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS read_cursors (
+            user_id TEXT NOT NULL,
+            conv_id TEXT NOT NULL,
+            read_seq INTEGER NOT NULL,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (user_id, conv_id)
+        ) WITHOUT ROWID
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_conversations AFTER INSERT ON messages
+        BEGIN
+            INSERT OR IGNORE INTO conversations (conv_id, room_id, user_a, user_b)
+            VALUES ({conv}, new.room_id,
+                    CASE WHEN new.message_type = 'lobby' THEN NULL
+                         ELSE min(new.from_user_id, ifnull(new.to_user_id, '')) END,
+                    CASE WHEN new.message_type = 'lobby' THEN NULL
+                         ELSE max(new.from_user_id, ifnull(new.to_user_id, '')) END);
+            UPDATE conversations SET
+                msg_seq = msg_seq + 1,
+                last_timestamp = max(last_timestamp, new.timestamp)
+            WHERE conv_id = {conv};
+            INSERT OR REPLACE INTO read_cursors (user_id, conv_id, read_seq, updated_at)
+            SELECT new.from_user_id, conv_id, msg_seq, new.created_at
+            FROM conversations WHERE conv_id = {conv};
+        END
+    """)
+    m = conv_sql("m.")
+    conn.execute(f"""
+        INSERT OR IGNORE INTO conversations (conv_id, room_id, user_a, user_b, msg_seq, last_timestamp)
+        SELECT {m}, MIN(m.room_id),
+               CASE WHEN m.message_type = 'lobby' THEN NULL
+                    ELSE min(m.from_user_id, ifnull(m.to_user_id, '')) END,
+               CASE WHEN m.message_type = 'lobby' THEN NULL
+                    ELSE max(m.from_user_id, ifnull(m.to_user_id, '')) END,
+               COUNT(*), MAX(m.timestamp)
+        FROM messages m GROUP BY 1
+    """)
+    conn.execute(f"""
+        INSERT OR IGNORE INTO read_cursors (user_id, conv_id, read_seq, updated_at)
+        SELECT DISTINCT m.from_user_id, c.conv_id, c.msg_seq, c.last_timestamp
+        FROM messages m JOIN conversations c ON c.conv_id = {m}
+    """)
+    for col in ("user_a", "user_b"):
+        conn.execute(f"""
+            INSERT OR IGNORE INTO read_cursors (user_id, conv_id, read_seq, updated_at)
+            SELECT {col}, conv_id, msg_seq, last_timestamp FROM conversations WHERE {col} IS NOT NULL
+        """)
+
+
+def _m007_users_room_seen_index(conn: sqlite3.Connection):
+    """활성 사용자 조회 (room_id = ? AND last_seen > ? ORDER BY last_seen DESC)"""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_users_room_seen ON users (room_id, last_seen)")
+
+
+# 마이그레이션 시 분 단위 집계를 채울 기간 (그 이전은 시간 단위만)
+ROLLUP_MINUTE_BACKFILL_SEC = 48 * 3600
+
+
+def _m008_activity_rollups(conn: sqlite3.Connection):
+    """
+    활동 집계 테이블 - 수집기가 메모리에 모은 카운트를 주기적으로 더함 (app/server/rollup.py)
+    - activity_minute / activity_hour: 버킷(epoch 초, 분/시 시작) x 룸 x 메시지 타입별 메시지 수
+    - talker_hour: 버킷(시) x 룸 x 보낸 사람별 메시지 수 (상위 발신자)
+    - 분 단위는 보존 기간이 지나면 삭제 (같은 구간은 시간 단위에 남음)
+    - 기존 데이터: 시간 단위는 전체, 분 단위는 최근 ROLLUP_MINUTE_BACKFILL_SEC만 채움
+    """
+    for table, key in (("activity_minute", "message_type"), ("activity_hour", "message_type"),
+                       ("talker_hour", "user_id")):
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                bucket INTEGER NOT NULL,
+                room_id TEXT NOT NULL,
+                {key} TEXT NOT NULL,
+                messages INTEGER NOT NULL,
+                PRIMARY KEY (bucket, room_id, {key})
+            ) WITHOUT ROWID
+        """)
+    backfill_rollups(conn)
+
+
+def backfill_rollups(conn: sqlite3.Connection):
+    """messages 테이블로 활동 집계 채움 (이미 있는 버킷은 그대로) - 마이그레이션 008, bench/gen_db.py"""
+    minute_since = conn.execute("SELECT IFNULL(MAX(timestamp), 0) FROM messages").fetchone()[0] \
+        - ROLLUP_MINUTE_BACKFILL_SEC
+    conn.execute("""
+        INSERT OR IGNORE INTO activity_minute (bucket, room_id, message_type, messages)
+        SELECT CAST(timestamp / 60 AS INTEGER) * 60, room_id, message_type, COUNT(*)
+        FROM messages WHERE timestamp >= ? GROUP BY 1, 2, 3
+    """, (minute_since,))
+    conn.execute("""
+        INSERT OR IGNORE INTO activity_hour (bucket, room_id, message_type, messages)
+        SELECT CAST(timestamp / 3600 AS INTEGER) * 3600, room_id, message_type, COUNT(*)
+        FROM messages GROUP BY 1, 2, 3
+    """)
+    conn.execute("""
+        INSERT OR IGNORE INTO talker_hour (bucket, room_id, user_id, messages)
+        SELECT CAST(timestamp / 3600 AS INTEGER) * 3600, room_id, from_user_id, COUNT(*)
+        FROM messages GROUP BY 1, 2, 3
+    """)
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, "baseline schema", _m001_baseline),
+    (2, "drop redundant idx_msg_id", _m002_drop_redundant_msg_id_index),
+    (3, "lobby history index (room_id, message_type, timestamp)", _m003_lobby_history_index),
+    (4, "archive segment manifest", _m004_archive_segments),
+    (5, "room summary table + auto room registration", _m005_room_summary),
+    (6, "per-conversation seq counters + read cursors", _m006_read_cursors),
+    (7, "users (room_id, last_seen) index", _m007_users_room_seen_index),
+    (8, "activity rollup tables (minute/hour, top talkers)", _m008_activity_rollups),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection, verbose: bool = False) -> int:
+    """
+    미적용 마이그레이션을 순서대로 적용하고 최종 버전 반환.
+    각 단계는 BEGIN IMMEDIATE ~ COMMIT으로 감싸 스키마 변경과 버전 갱신을 원자적으로 처리.
+    """
+    prev_isolation = conn.isolation_level
+    conn.isolation_level = None  # 트랜잭션 직접 관리
+    try:
+        for version, desc, fn in MIGRATIONS:
+            if get_version(conn) >= version:
+                continue
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # 다른 프로세스가 먼저 적용했을 수 있으므로 락을 잡은 뒤 다시 확인
+                if get_version(conn) >= version:
+                    conn.execute("COMMIT")
+                    continue
+                fn(conn)
+                conn.execute(f"PRAGMA user_version = {int(version)}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            if verbose:
+                log.info("마이그레이션 %03d 적용: %s", version, desc)
+    finally:
+        conn.isolation_level = prev_isolation
+    return get_version(conn)
+
+
+# === 쿼리 플랜 검증 ===
+# (이름, 쿼리, 파라미터, 사용해야 하는 인덱스 이름(없으면 None))
+# 모든 쿼리는 messages 전체 스캔(SCAN messages)이 없어야 함
+QUERY_SHAPES: List[Tuple[str, str, tuple, str]] = [
+    ("lobby_history",
+     "SELECT * FROM messages WHERE room_id = ? AND message_type = 'lobby' ORDER BY timestamp DESC LIMIT ?",
+     ("lobby", 50), "idx_lobby_ts"),
+    ("lobby_history_before",
+     "SELECT * FROM messages WHERE room_id = ? AND message_type = 'lobby' AND (timestamp, id) < (?, ?) "
+     "ORDER BY timestamp DESC, id DESC LIMIT ?",
+     ("lobby", 0.0, 0, 50), "idx_lobby_ts"),
+    ("lobby_after_id",
+     "SELECT * FROM messages WHERE +room_id = ? AND +message_type = 'lobby' AND id > ? "
+     "ORDER BY id ASC LIMIT ?",
+     ("lobby", 0, 50), "INTEGER PRIMARY KEY"),
+    ("lobby_by_seq",
+     "SELECT * FROM messages WHERE from_user_id = ? AND sess = ? AND seq BETWEEN ? AND ? "
+     "AND room_id = ? AND message_type = 'lobby' ORDER BY seq ASC",
+     ("u", "s", 1, 2, "lobby"), "idx_sender_seq"),
+    ("dm_history",
+     "SELECT * FROM ("
+     "SELECT * FROM (SELECT * FROM messages WHERE from_user_id = ? AND to_user_id = ? AND message_type = 'dm' "
+     "ORDER BY timestamp DESC, id DESC LIMIT ?) UNION ALL "
+     "SELECT * FROM (SELECT * FROM messages WHERE from_user_id = ? AND to_user_id = ? AND message_type = 'dm' "
+     "ORDER BY timestamp DESC, id DESC LIMIT ?)) ORDER BY timestamp DESC, id DESC LIMIT ?",
+     ("a", "b", 50, "b", "a", 50, 50), "idx_dm_users"),
+    ("unread_dm",
+     "SELECT c.conv_id FROM conversations c LEFT JOIN read_cursors rc "
+     "ON rc.user_id = ? AND rc.conv_id = c.conv_id WHERE (c.user_a = ? OR c.user_b = ?)",
+     ("a", "a", "a"), "idx_conv_user_a"),
+    ("room_users",
+     "SELECT * FROM users WHERE room_id = ? AND last_seen > ? ORDER BY last_seen DESC",
+     ("lobby", 0.0), "idx_users_room_seen"),
+    ("activity_series",
+     "SELECT (bucket / ?) * ? AS t, SUM(messages) FROM activity_minute "
+     "WHERE bucket >= ? AND bucket < ? AND room_id = ? GROUP BY t ORDER BY t",
+     (60, 60, 0, 1, "lobby"), "PRIMARY KEY"),
+    ("top_talkers",
+     "SELECT user_id, SUM(messages) AS n FROM talker_hour WHERE bucket >= ? AND bucket < ? "
+     "GROUP BY user_id ORDER BY n DESC, user_id LIMIT ?",
+     (0, 1, 10), "PRIMARY KEY"),
+    ("msg_id_dedupe",
+     "SELECT id FROM messages WHERE msg_id = ?",
+     ("x",), "sqlite_autoindex_messages_1"),
+]
+
+
+def explain(conn: sqlite3.Connection, sql: str, params: tuple = ()) -> List[str]:
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+
+def audit_query_plans(conn: sqlite3.Connection, strict: bool = True) -> List[str]:
+    """
+    QUERY_SHAPES의 쿼리 플랜 확인. 문제 목록 반환, strict면 AssertionError.
+    """
+    problems = []
+    for name, sql, params, expected in QUERY_SHAPES:
+        plan = explain(conn, sql, params)
+        text = " | ".join(plan)
+        if any(step.startswith("SCAN messages") for step in plan):
+            problems.append(f"{name}: full scan ({text})")
+        elif expected and expected not in text:
+            problems.append(f"{name}: expected {expected} ({text})")
+    if strict and problems:
+        raise AssertionError("쿼리 플랜 검증 실패:\n" + "\n".join(problems))
+    return problems
+
+
+def main(argv=None):
+    import argparse
+    p = argparse.ArgumentParser(prog="python -m app.db.migrations")
+    p.add_argument("db_path")
+    p.add_argument("--audit", action="store_true", help="EXPLAIN QUERY PLAN 검증")
+    args = p.parse_args(argv)
+    setup_logging("INFO")
+
+    conn = sqlite3.connect(args.db_path)
+    try:
+        before = get_version(conn)
+        after = migrate(conn, verbose=True)
+        print(f"[DB] 스키마 버전 {before} → {after}")
+        if args.audit:
+            for name, sql, params, _ in QUERY_SHAPES:
+                print(f"  {name}: {' | '.join(explain(conn, sql, params))}")
+            problems = audit_query_plans(conn, strict=False)
+            for p_ in problems:
+                print(f"  !! {p_}")
+            return 1 if problems else 0
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -22,6 +22,8 @@ class Message:
     text: str = ""
     timestamp: datetime = None
     created_at: datetime = None
+    seq: Optional[int] = None    # 송신자 세션 내 로비 시퀀스 번호
+    sess: Optional[str] = None   # 송신자 세션 ID
 
     def __post_init__(self):
         if self.timestamp is None:
@@ -46,4 +48,17 @@ class Room:
 
     def __post_init__(self):
         if self.created_at is None:
-            self.created_at = datetime.now()
\ No newline at end of file
+            self.created_at = datetime.now()
+
+@dataclass
+class RoomSummary:
+    """룸 목록용 요약 (room_summary + 마지막 로비 메시지)"""
+    room_id: str
+    name: str
+    created_at: datetime
+    message_count: int = 0
+    active_users: int = 0
+    last_message_id: Optional[int] = None
+    last_timestamp: Optional[datetime] = None
+    last_nick: Optional[str] = None   # 마지막 메시지가 아카이브로 옮겨졌으면 None
+    last_text: Optional[str] = None
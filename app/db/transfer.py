@@ -0,0 +1,175 @@
+"""
+메시지 내보내기/가져오기 - NDJSON (한 줄에 메시지 하나)
+- 내보내기: id 기준 커서 페이지(id > after_id ORDER BY id LIMIT batch)를 반복
+  → 전체를 메모리에 올리지 않고, 페이지 사이에 읽기 트랜잭션을 놓아 수집기 쓰기를 막지 않음
+  중간에 끊기면 마지막으로 받은 id를 after_id로 넘겨 이어받기
+  콜드 스토리지로 옮긴 메시지도 같은 조건으로 걸러 id 순으로 끼워 넣음 (DatabaseManager.iter_export)
+- 가져오기: batch개씩 executemany 한 트랜잭션으로 INSERT OR IGNORE
+  msg_id UNIQUE 제약으로 중복(재가져오기/겹치는 덤프)은 건너뜀
+- 줄 형식은 API 메시지와 같은 키, 시각은 epoch 초 (가져올 때는 ISO 문자열도 허용)
+
+    {"id": 1, "msg_id": "...", "room_id": "lobby", "type": "lobby", "from": "...", "to": null,
+     "nick": "...", "text": "...", "seq": 3, "sess": "...", "timestamp": 1700000000.0, "created_at": ...}
+"""
+from __future__ import annotations
+import json
+import time
+from datetime import datetime
+from typing import IO, Callable, Iterable, Iterator, Optional, Sequence, Tuple
+
+EXPORT_COLUMNS = ("id", "msg_id", "room_id", "message_type", "from_user_id", "to_user_id",
+                  "nick", "text", "seq", "sess", "timestamp", "created_at")
+EXPORT_KEYS = ("id", "msg_id", "room_id", "type", "from", "to",
+               "nick", "text", "seq", "sess", "timestamp", "created_at")
+MESSAGE_TYPES = ("lobby", "dm")
+
+INSERT_SQL = """
+    INSERT OR IGNORE INTO messages
+    (msg_id, room_id, message_type, from_user_id, to_user_id, nick, text, timestamp, created_at, seq, sess)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def export_query(room_id: Optional[str] = None, since: Optional[float] = None,
+                 until: Optional[float] = None, types: Sequence[str] = ()) -> Tuple[str, list]:
+    """after_id/limit 자리를 뺀 조건부 쿼리와 파라미터"""
+    cond = ["id > ?"]
+    params: list = []
+    if room_id:
+        cond.append("room_id = ?")
+        params.append(room_id)
+    if since is not None:
+        cond.append("timestamp >= ?")
+        params.append(since)
+    if until is not None:
+        cond.append("timestamp < ?")
+        params.append(until)
+    if types:
+        cond.append("message_type IN (%s)" % ",".join("?" * len(types)))
+        params.extend(types)
+    # +: 필터 인덱스 대신 rowid 순서로 훑어 id 커서가 그대로 정렬 순서가 되도록 함
+    where = " AND ".join(c if c == "id > ?" else "+" + c for c in cond)
+    sql = f"SELECT {', '.join(EXPORT_COLUMNS)} FROM messages WHERE {where} ORDER BY id LIMIT ?"
+    return sql, params
+
+
+def export_match(room_id: Optional[str] = None, since: Optional[float] = None,
+                 until: Optional[float] = None, types: Sequence[str] = ()) -> Callable[[Sequence], bool]:
+    """export_query와 같은 조건을 행 튜플(EXPORT_COLUMNS 순서)에 적용하는 함수 - 아카이브 행용"""
+    room_col, type_col, ts_col = (EXPORT_COLUMNS.index(c) for c in ("room_id", "message_type", "timestamp"))
+
+    def match(row: Sequence) -> bool:
+        if room_id and row[room_col] != room_id:
+            return False
+        if since is not None and row[ts_col] < since:
+            return False
+        if until is not None and row[ts_col] >= until:
+            return False
+        return not types or row[type_col] in types
+    return match
+
+
+def encode_line(row: Sequence) -> bytes:
+    return (json.dumps(dict(zip(EXPORT_KEYS, row)), ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def parse_time(value) -> Optional[float]:
+    """epoch 초(숫자/문자열) 또는 ISO 문자열 → epoch 초"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def parse_types(raw: Optional[str]) -> Tuple[str, ...]:
+    """"lobby,dm" → ("lobby", "dm"), 알 수 없는 타입은 ValueError"""
+    if not raw:
+        return ()
+    types = tuple(t.strip() for t in raw.split(",") if t.strip())
+    bad = [t for t in types if t not in MESSAGE_TYPES]
+    if bad:
+        raise ValueError(f"unknown message type: {', '.join(bad)}")
+    return types
+
+
+def row_from_record(rec: dict, now: float) -> Optional[tuple]:
+    """NDJSON 레코드 → INSERT 파라미터 (msg_id/타입/시각이 없거나 잘못되면 None)"""
+    msg_id = rec.get("msg_id")
+    msg_type = rec.get("type", rec.get("message_type"))
+    if not msg_id or msg_type not in MESSAGE_TYPES:
+        return None
+    try:
+        ts = parse_time(rec.get("timestamp"))
+        created = parse_time(rec.get("created_at"))
+    except (ValueError, TypeError):  # "yesterday", 리스트/객체 등
+        return None
+    seq = rec.get("seq")
+    return (
+        msg_id,
+        rec.get("room_id") or "lobby",
+        msg_type,
+        rec.get("from", rec.get("from_user_id")) or "",
+        rec.get("to", rec.get("to_user_id")),
+        rec.get("nick") or "",
+        rec.get("text") or "",
+        ts if ts is not None else now,
+        created or now,
+        seq if type(seq) is int else None,  # 정수가 아닌 seq는 버림
+        rec.get("sess"),
+    )
+
+
+def iter_records(lines: Iterable) -> Iterator[Optional[dict]]:
+    """NDJSON 줄(bytes/str) → dict, 빈 줄은 건너뛰고 파싱 실패는 None"""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            rec = json.loads(line)
+        except ValueError:
+            yield None
+            continue
+        yield rec if isinstance(rec, dict) else None
+
+
+def export_ndjson(db, out: IO[bytes], **filters) -> int:
+    """db.iter_export() 결과를 out에 기록, 내보낸 메시지 수 반환"""
+    n = 0
+    for row in db.iter_export(**filters):
+        out.write(encode_line(row))
+        n += 1
+    return n
+
+
+def import_ndjson(db, lines: Iterable, batch: int = 5000) -> dict:
+    """
+    NDJSON을 batch개 단위 트랜잭션으로 가져오기.
+    반환: {"read", "inserted", "duplicates", "invalid", "elapsed_ms"}
+    """
+    t0 = time.perf_counter()
+    now = time.time()
+    read = invalid = 0
+
+    def _rows():
+        nonlocal read, invalid
+        for rec in iter_records(lines):
+            read += 1
+            row = row_from_record(rec, now) if rec is not None else None
+            if row is None:
+                invalid += 1
+                continue
+            yield row
+
+    inserted = db.import_messages(_rows(), batch=batch)
+    return {
+        "read": read,
+        "inserted": inserted,
+        "duplicates": read - invalid - inserted,
+        "invalid": invalid,
+        "elapsed_ms": round((time.perf_counter() - t0) * 1000, 1),
+    }
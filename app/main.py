@@ -1,22 +1,32 @@
+import threading
+import time
+T_IMPORT = time.perf_counter()  # time-to-window에 모듈 import 시간까지 포함
 import tkinter as tk
 from datetime import datetime, timedelta
 
 from app.config import load_effective_config
 from app.core.state import AppState
 from app.core.bus import EventBus
-from app.core.history import HistoryManager
+from app.core.log import get_logger
+from app.config.io import get_config_dir
 from app.ui.main_window import MainWindow
 from app.net.presence import PresenceService, PresenceConfig
 from app.net.lobby import LobbyService, LobbyConfig
 from app.net.dm import DmService, DmConfig
-from app.net.server_client import ServerClient, ServerConfig
+from app.net.reactor import Reactor
+from app.net import mcast
 from app.notify.attention import AttentionManager
 
+log = get_logger("client")
+
 PRUNE_SECONDS = 15
 PUMP_PRUNE_MS = 3000
+CLOSE_READ_WAIT = 0.5  # 종료 시 읽음 표시를 기다리는 최대 시간 (초)
 
 def main():
+    t_start = time.perf_counter()
     cfg = load_effective_config()
+    t_config = time.perf_counter()
 
     root = tk.Tk()
     bus = EventBus(root)
@@ -36,51 +46,68 @@ def main():
     services = {"lobby": None, "dm": None}
     
     # 서버 클라이언트 및 히스토리 관리자
+    server_client = None
     history_manager = None
     if cfg.SERVER_ENABLED:
+        # 서버 연동 모듈은 켜져 있을 때만 import (requests는 첫 요청 때 백그라운드에서 로드)
+        from app.net.server_client import ServerClient, ServerConfig
+        from app.core.history import HistoryManager
+        from app.core.store import LocalHistoryStore
         server_config = ServerConfig(
             host=cfg.SERVER_HOST,
             http_port=cfg.SERVER_HTTP_PORT,
-            udp_bridge_port=cfg.SERVER_UDP_PORT
+            udp_bridge_port=cfg.SERVER_UDP_PORT,
+            timeout=cfg.SERVER_TIMEOUT,
+            connect_timeout=cfg.SERVER_CONNECT_TIMEOUT,
+            compress_threshold=cfg.COMPRESS_THRESHOLD,
         )
         server_client = ServerClient(server_config)
-        history_manager = HistoryManager(server_client)
-        print(f"[클라이언트] 서버 연동 활성화: {cfg.SERVER_HOST}:{cfg.SERVER_HTTP_PORT}")
+        store = None
+        if cfg.HISTORY_CACHE_ENABLED:
+            store = LocalHistoryStore(str(get_config_dir() / "history.db"),
+                                      max_messages=cfg.HISTORY_CACHE_MAX)
+        history_manager = HistoryManager(server_client, store)
+        log.info("서버 연동 활성화: %s:%s", cfg.SERVER_HOST, cfg.SERVER_HTTP_PORT)
     else:
-        print("[클라이언트] 서버 연동 비활성화")
+        log.info("서버 연동 비활성화")
 
     def _send_lobby(text: str):
         if services["lobby"]:
-            services["lobby"].send_lobby(text)
+            msg = services["lobby"].send_lobby(text)
+            if history_manager:
+                history_manager.record_live(msg)
 
     def _send_dm(target_uid: str, text: str):
         ent = state.roster.get(target_uid)
         if not ent or not ent.ip or not ent.dm_port:
-            print(f"[dm] route missing for @{target_uid} (ip/port 없음)")
+            log.warning("[dm] route missing for @%s (ip/port 없음)", target_uid)
             return
-        services["dm"].send_dm(ent.ip, ent.dm_port, text, target_uid)
+        msg = services["dm"].send_dm(ent.ip, ent.dm_port, text, target_uid)
+        if history_manager:
+            history_manager.record_live(msg)
 
     # UI
-    ui = MainWindow(root, state, send_lobby_cb=_send_lobby, send_dm_cb=_send_dm)
-    
-    # 히스토리 로드 (서버 연동이 활성화된 경우)
-    if history_manager and cfg.LOAD_HISTORY_ON_START:
-        try:
-            print("[클라이언트] 메시지 히스토리 로드 중...")
-            lobby_history = history_manager.load_lobby_history(state.room_id, cfg.HISTORY_LIMIT)
-            for msg in lobby_history:
-                ui.add_message(
-                    msg["text"], 
-                    mine=(msg["from_uid"] == state.user_id), 
-                    target=None, 
-                    meta_nick=msg["nick"],
-                    is_history=True
-                )
-            if lobby_history:
-                print(f"[클라이언트] 로비 히스토리 {len(lobby_history)}개 메시지 로드 완료")
-        except Exception as e:
-            print(f"[클라이언트] 히스토리 로드 오류: {e}")
+    def _open_dm_history(peer_id: str):
+        if history_manager:
+            history_manager.open_dm_history(bus, state.user_id, peer_id, cfg.HISTORY_PAGE_SIZE)
 
+    def _load_older_dm_history(peer_id: str):
+        if history_manager:
+            history_manager.load_older_dm_history(bus, state.user_id, peer_id, cfg.HISTORY_PAGE_SIZE)
+
+    unread_loaded = {"done": False}
+
+    def _mark_read(target):
+        # 탭을 봤을 때 서버 읽음 커서 이동 (None=로비)
+        # 시작 시 안 읽은 수를 받기 전에는 보내지 않음 (첫 탭 선택 이벤트가 배지를 지우지 않도록)
+        if server_client and unread_loaded["done"]:
+            threading.Thread(target=server_client.mark_read, name="mark-read", daemon=True,
+                             args=(state.user_id, state.room_id, target)).start()
+
+    ui = MainWindow(root, state, send_lobby_cb=_send_lobby, send_dm_cb=_send_dm,
+                    dm_open_cb=_open_dm_history, dm_scroll_top_cb=_load_older_dm_history,
+                    read_cb=_mark_read)
+    
     # --- 이벤트 버스 핸들러 ---
     def on_presence_seen(ev: dict):
         state.upsert_peer(
@@ -94,7 +121,18 @@ def main():
 
     def on_lobby_chat(ev: dict):
         # 로비 수신: 메시지 표시만, 최상단 팝업은 하지 않음
-        ui.add_message(ev.get("text", ""), mine=False, target=None, meta_nick=ev.get("nick"))
+        # gap-fill로 늦게 받은 메시지는 원래 시각과 [복구] 표식으로 표시
+        recovered = bool(ev.get("recovered"))
+        ts = datetime.fromtimestamp(ev["ts"]) if recovered and ev.get("ts") else None
+        ui.add_message(ev.get("text", ""), mine=False, target=None, meta_nick=ev.get("nick"),
+                       ts=ts, recovered=recovered)
+        ui.bump_unread(None)
+        if history_manager:
+            history_manager.record_live({
+                "type": "chat", "room_id": state.room_id, "from": ev.get("from_uid"),
+                "nick": ev.get("nick"), "text": ev.get("text", ""),
+                "msg_id": ev.get("msg_id"), "ts": ev.get("ts"),
+            })
     bus.on("lobby_chat", on_lobby_chat)
 
     def on_dm_chat(ev: dict):
@@ -102,42 +140,126 @@ def main():
         state.ensure_dm_session(from_uid)
         ui._ensure_tab(from_uid)
         ui.add_message(ev.get("text", ""), mine=False, target=from_uid, from_uid=from_uid)
+        if history_manager:
+            history_manager.record_live({
+                "type": "dm", "from": from_uid, "to": ev.get("to_uid") or state.user_id,
+                "nick": ev.get("nick"), "text": ev.get("text", ""),
+                "msg_id": ev.get("msg_id"), "ts": ev.get("ts"),
+            })
         # DM 수신: 창을 잠깐 최상단으로
         attention.bump()
     bus.on("dm_chat", on_dm_chat)
 
+    def on_dm_failed(ev: dict):
+        to_uid = ev.get("to_uid")
+        if to_uid in ui.chat_tabs:
+            ui.add_message("메시지 전송 실패 (상대 응답 없음)", meta_hint=True, target=to_uid)
+    bus.on("dm_failed", on_dm_failed)
+
+    def on_history_page(ev: dict):
+        ui.add_history_page(ev.get("messages", []), target=ev.get("target"),
+                            older=ev.get("older", True))
+    bus.on("history_page", on_history_page)
+
+    def on_unread_counts(ev: dict):
+        unread_loaded["done"] = True
+        if ev.get("lobby"):
+            ui.set_unread(None, ev["lobby"])
+        for d in ev.get("dms", []):
+            state.ensure_dm_session(d["peer_id"])
+            ui.set_unread(d["peer_id"], d["unread"])
+    bus.on("unread_counts", on_unread_counts)
+
+    def on_history_done(ev: dict):
+        elapsed = (time.perf_counter() - t_start) * 1000
+        log.info("로비 히스토리 %d개 로드 완료 (fetch %.0fms, time-to-history %.0fms)",
+                 ev.get("count", 0), ev.get("elapsed_ms", 0), elapsed)
+    bus.on("history_done", on_history_done)
+
     # --- 서비스 시작 ---
-    presence = PresenceService(PresenceConfig(
+    # presence/로비 전송 방식 (multicast면 이 룸의 그룹에만 가입/송신)
+    transport = dict(
+        transport=cfg.NET_TRANSPORT,
+        mcast_group=mcast.room_group(state.room_id, cfg.MCAST_GROUP, cfg.MCAST_GROUP_SPAN,
+                                     cfg.MCAST_ROOM_GROUPS),
+        mcast_ttl=cfg.MCAST_TTL,
+        mcast_iface=cfg.MCAST_IFACE,
+    )
+    if cfg.NET_TRANSPORT == "multicast":
+        log.info("멀티캐스트 전송 - 룸 %s 그룹 %s (ttl %d, iface %s)", state.room_id,
+                 transport["mcast_group"], cfg.MCAST_TTL, cfg.MCAST_IFACE or "기본")
+    presence_cfg = PresenceConfig(
         user_id=state.user_id, room_id=state.room_id, anon_nick=state.anon_nick,
-        broadcast_ip=cfg.BROADCAST_IP, port=cfg.UDP_PORT, dm_port=cfg.UDP_DM_PORT
-    ), bus)
-    presence.start()
-
-    lobby = LobbyService(LobbyConfig(
+        broadcast_ip=cfg.BROADCAST_IP, port=cfg.UDP_PORT, dm_port=cfg.UDP_DM_PORT,
+        **transport
+    )
+    lobby_cfg = LobbyConfig(
         user_id=state.user_id, room_id=state.room_id, anon_nick=state.anon_nick,
         broadcast_ip=cfg.BROADCAST_IP, port=cfg.UDP_CHAT_PORT,
+        gap_wait_ms=cfg.SEQ_GAP_WAIT_MS,
+        compress_threshold=cfg.COMPRESS_THRESHOLD,
         enable_server=cfg.SERVER_ENABLED,
         server_host=cfg.SERVER_HOST,
         server_http_port=cfg.SERVER_HTTP_PORT,
-        server_udp_port=cfg.SERVER_UDP_PORT
-    ), bus)
-    lobby.start()
-    services["lobby"] = lobby
-
-    dm = DmService(DmConfig(
+        server_udp_port=cfg.SERVER_UDP_PORT,
+        **transport
+    )
+    dm_cfg = DmConfig(
         user_id=state.user_id, room_id=state.room_id, anon_nick=state.anon_nick,
         listen_port=cfg.UDP_DM_PORT,
+        reliable=cfg.DM_RELIABLE,
+        compress_threshold=cfg.COMPRESS_THRESHOLD,
         enable_server=cfg.SERVER_ENABLED,
         server_host=cfg.SERVER_HOST,
         server_http_port=cfg.SERVER_HTTP_PORT,
         server_udp_port=cfg.SERVER_UDP_PORT
-    ), bus)
+    )
+    if cfg.NET_BACKEND == "asyncio":
+        # asyncio 서비스를 백그라운드 루프에서 돌리고 이벤트는 EventBus로 바로 전달
+        from app.net.aio import AsyncioBridge, AsyncPresenceService, AsyncLobbyService, AsyncDmService
+        net_loop = AsyncioBridge()
+        net_loop.start()
+        presence = net_loop.adapt(AsyncPresenceService(presence_cfg, events=bus))
+        lobby = net_loop.adapt(AsyncLobbyService(lobby_cfg, events=bus))
+        dm = net_loop.adapt(AsyncDmService(dm_cfg, events=bus))
+    else:
+        # presence/로비/DM 수신은 리액터 스레드 하나가 담당
+        net_loop = Reactor()
+        net_loop.start()
+        presence = PresenceService(presence_cfg, bus, net_loop)
+        lobby = LobbyService(lobby_cfg, bus, net_loop)
+        dm = DmService(dm_cfg, bus, net_loop)
+    presence.start()
+    lobby.start()
     dm.start()
+    services["lobby"] = lobby
     services["dm"] = dm
 
     # 버스 폴링 + 로스터 타임아웃 정리
     bus.start()
 
+    # 히스토리 로드 (서버 연동이 활성화된 경우) - 백그라운드에서 페이지 단위로 스트리밍
+    if history_manager and cfg.LOAD_HISTORY_ON_START:
+        log.info("메시지 히스토리 로드 중 (백그라운드)...")
+        history_manager.load_lobby_history_async(
+            bus, state.room_id, cfg.HISTORY_LIMIT, cfg.HISTORY_PAGE_SIZE
+        )
+
+    # 오프라인 동안 놓친 메시지 수 - 한 번의 호출로 로비/DM 탭 배지 표시
+    if server_client:
+        def _load_unread():
+            counts = server_client.get_unread(state.user_id, state.room_id)
+            bus.post("unread_counts", **counts)
+        threading.Thread(target=_load_unread, name="unread-load", daemon=True).start()
+
+    def report_time_to_window():
+        # 첫 idle = 창이 그려진 직후 (import → 설정 → UI/서비스 구간별)
+        now = time.perf_counter()
+        log.info("time-to-window %.0fms (import %.0fms, config %.0fms, ui+services %.0fms)",
+                 (now - T_IMPORT) * 1000, (t_start - T_IMPORT) * 1000,
+                 (t_config - t_start) * 1000, (now - t_config) * 1000)
+    root.after_idle(report_time_to_window)
+
     def prune_roster():
         now = datetime.now()
         removed = False
@@ -155,10 +277,19 @@ def main():
 
     def on_close():
         try:
+            if server_client:
+                # 서버가 느리거나 죽어 있어도 창 닫기가 멈추지 않도록 잠깐만 기다림
+                t = threading.Thread(target=server_client.mark_read, name="mark-read", daemon=True,
+                                     args=(state.user_id, state.room_id, ui._active_target()))
+                t.start()
+                t.join(CLOSE_READ_WAIT)
             presence.stop()
             lobby.stop()
             dm.stop()
+            net_loop.stop()
             bus.stop()
+            if history_manager:
+                history_manager.close(CLOSE_READ_WAIT)  # 큐에 남은 실시간 메시지 로컬 저장
         finally:
             root.destroy()
 
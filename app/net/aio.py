@@ -0,0 +1,542 @@
+"""
+asyncio 버전 네트워크 서비스 (presence/로비/DM)
+- asyncio DatagramProtocol 기반, 스레드 없이 이벤트 루프 하나에서 동작
+  → 봇/브릿지/부하 테스트에서 클라이언트 N개를 루프 하나로 돌릴 수 있음
+- 와이어 포맷(codec/frag), 재정렬(seq), RTT 추정은 스레드 버전과 공용
+- 수신 이벤트는 EventBus와 같은 이름/필드로 발생:
+    async for evt, ev in lobby:        # ("lobby_chat", {...})
+        ...
+- events 인자로 post(evt, **payload)를 가진 객체(EventBus 등)를 넘기면 그쪽으로 전달
+- Tk 클라이언트는 AsyncioBridge로 백그라운드 루프에서 돌리고 동기 API로 사용
+
+    presence = AsyncPresenceService(PresenceConfig(...))
+    await presence.start()
+    async for evt, ev in presence:
+        print(ev["user_id"], ev["ip"])
+"""
+from __future__ import annotations
+import asyncio
+import json
+import socket
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+from app.core.log import get_logger, RateLimitedLogger
+from .codec import encode_message, decode_message
+from .dm import DmConfig, RttEstimator, dm_stats
+from .frag import Reassembler, fragment
+from .lobby import LobbyConfig
+from . import mcast
+from .presence import PresenceConfig
+from .seq import ReorderBuffer
+from .server_client import ServerClient, ServerConfig
+
+log = get_logger("aio")
+err_log = RateLimitedLogger(log)
+
+_CLOSED = object()
+
+
+class EventStream:
+    """
+    EventBus.post와 같은 인터페이스 + async 이터레이터 (루프 스레드에서만 post)
+    - 소비가 느려 maxsize를 넘으면 가장 오래된 이벤트부터 버림 (dropped 카운트)
+    - close() 후 대기 중인 이벤트를 모두 소비하면 이터레이션 종료
+    """
+    def __init__(self, maxsize: int = 1024):
+        self._q: "asyncio.Queue" = asyncio.Queue(maxsize)
+        self._closed = False
+        self.dropped = 0
+
+    def post(self, evt: str, **payload) -> None:
+        if self._closed:
+            return
+        self._put((evt, payload))
+
+    def _put(self, item):
+        while True:
+            try:
+                self._q.put_nowait(item)
+                return
+            except asyncio.QueueFull:
+                self._q.get_nowait()
+                self.dropped += 1
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._put(_CLOSED)
+
+    async def get(self) -> Tuple[str, dict]:
+        item = await self._q.get()
+        if item is _CLOSED:
+            self._q.put_nowait(_CLOSED)  # 다른 소비자도 종료되도록
+            raise StopAsyncIteration
+        return item
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Tuple[str, dict]:
+        return await self.get()
+
+
+class _UdpProtocol(asyncio.DatagramProtocol):
+    """조각 재조립 후 완성된 페이로드를 handler(data, peer)로 전달"""
+    def __init__(self, handler: Callable[[bytes, tuple], None], tag: str):
+        self.handler = handler
+        self.tag = tag
+        self.reassembler = Reassembler()
+
+    def datagram_received(self, data: bytes, addr: tuple):
+        payload = self.reassembler.feed(data, addr)
+        if payload is None:
+            return
+        try:
+            self.handler(payload, addr)
+        except Exception as e:
+            err_log.error(self.tag + ".handler", "[%s] handler error: %s", self.tag, e)
+
+    def error_received(self, exc: Exception):
+        err_log.warning(self.tag, "[%s] rx error: %s", self.tag, exc)
+
+
+async def _open_udp(handler, tag: str, port: Optional[int] = None, cfg: Any = None, tx: bool = False):
+    """
+    SO_REUSEADDR 소켓으로 datagram endpoint 생성 (port 없으면 바인드 안 함)
+    cfg(PresenceConfig/LobbyConfig)가 있으면 그 전송 방식(브로드캐스트/멀티캐스트)으로 열고
+    tx면 송신 옵션까지 설정 (app/net/mcast.py)
+    """
+    loop = asyncio.get_running_loop()
+    if cfg is not None:
+        s = mcast.open_socket(cfg, port=port, tx=tx)
+    else:
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if port is not None:
+                s.bind(("0.0.0.0", port))
+        except OSError:
+            s.close()
+            raise
+    s.setblocking(False)
+    transport, _ = await loop.create_datagram_endpoint(lambda: _UdpProtocol(handler, tag), sock=s)
+    return transport
+
+
+def _server_client(cfg) -> Optional[ServerClient]:
+    if not cfg.enable_server:
+        return None
+    return ServerClient(ServerConfig(
+        host=cfg.server_host,
+        http_port=cfg.server_http_port,
+        udp_bridge_port=cfg.server_udp_port,
+        compress_threshold=cfg.compress_threshold,
+    ))
+
+
+class _AsyncService:
+    """공통: 이벤트 출력 대상 + async for 지원"""
+    def __init__(self, events: Any = None):
+        self._own_events = events is None
+        self.events = events if events is not None else EventStream()
+
+    def __aiter__(self):
+        if not isinstance(self.events, EventStream):
+            raise TypeError("events가 외부 객체로 지정된 서비스는 async for로 소비할 수 없음")
+        return self.events.__aiter__()
+
+    def _close_events(self):
+        if self._own_events:
+            self.events.close()
+
+
+# ---------------------------------------------------------------- presence
+class AsyncPresenceService(_AsyncService):
+    """hello 주기 브로드캐스트/멀티캐스트 + presence_seen 이벤트"""
+    def __init__(self, cfg: PresenceConfig, events: Any = None):
+        super().__init__(events)
+        self.cfg = cfg
+        self._rx: Optional[asyncio.DatagramTransport] = None
+        self._tx: Optional[asyncio.DatagramTransport] = None
+        self._tx_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self._rx = await _open_udp(self._on_datagram, "presence", port=self.cfg.port, cfg=self.cfg)
+        self._tx = await _open_udp(lambda data, peer: None, "presence", cfg=self.cfg, tx=True)
+        self._tx_task = asyncio.get_running_loop().create_task(self._tx_loop())
+
+    async def stop(self):
+        if self._tx_task:
+            self._tx_task.cancel()
+            try:
+                await self._tx_task
+            except asyncio.CancelledError:
+                pass
+            self._tx_task = None
+        for t in (self._rx, self._tx):
+            if t:
+                t.close()
+        self._rx = self._tx = None
+        self._close_events()
+
+    async def announce(self):
+        """hello 1회 송신"""
+        payload = json.dumps({
+            "type": "hello",
+            "room_id": self.cfg.room_id,
+            "user_id": self.cfg.user_id,
+            "nick": self.cfg.anon_nick,
+            "dm": self.cfg.dm_port,
+        }).encode("utf-8")
+        try:
+            self._tx.sendto(payload, (mcast.dest_ip(self.cfg), self.cfg.port))
+        except Exception as e:
+            err_log.warning("presence.tx", "[presence] tx error: %s", e)
+
+    async def _tx_loop(self):
+        while True:
+            await self.announce()
+            await asyncio.sleep(self.cfg.interval_sec)
+
+    def _on_datagram(self, data: bytes, peer: tuple):
+        try:
+            msg = json.loads(data)
+        except ValueError:
+            return
+        if not isinstance(msg, dict) or msg.get("type") != "hello":
+            return
+        if msg.get("room_id") != self.cfg.room_id:
+            return
+        from_uid = msg.get("user_id")
+        if not from_uid or from_uid == self.cfg.user_id:
+            return
+        self.events.post("presence_seen",
+                         user_id=from_uid,
+                         anon_nick=msg.get("nick"),
+                         ip=peer[0],
+                         dm_port=msg.get("dm"))
+
+
+# ---------------------------------------------------------------- lobby
+class AsyncLobbyService(_AsyncService):
+    """
+    로비 송수신 - 스레드 버전(LobbyService)과 같은 seq/sess 재정렬·gap 복구·중복 제거
+    gap 복구의 서버 조회(blocking HTTP)는 기본 executor에서 실행
+    """
+    def __init__(self, cfg: LobbyConfig, events: Any = None):
+        super().__init__(events)
+        self.cfg = cfg
+        self.server_client = _server_client(cfg)
+        self._transport: Optional[asyncio.DatagramTransport] = None
+        self._sess = uuid.uuid4().hex[:12]
+        self._seq = 0
+        self._reorder = ReorderBuffer(cfg.gap_wait_ms / 1000.0)
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+    async def start(self):
+        # 같은 소켓으로 브로드캐스트/멀티캐스트 송신 (자기 메시지는 from으로 걸러짐)
+        self._transport = await _open_udp(self._on_datagram, "lobby", port=self.cfg.port, cfg=self.cfg,
+                                          tx=True)
+
+    async def stop(self):
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._transport:
+            self._transport.close()
+            self._transport = None
+        self._close_events()
+
+    async def send(self, text: str) -> dict:
+        self._seq += 1
+        msg = {
+            "type": "chat",
+            "room_id": self.cfg.room_id,
+            "from": self.cfg.user_id,
+            "nick": self.cfg.anon_nick,
+            "text": text,
+            "msg_id": str(uuid.uuid4()),
+            "ts": time.time(),
+            "seq": self._seq,
+            "sess": self._sess,
+        }
+        addr = (mcast.dest_ip(self.cfg), self.cfg.port)
+        try:
+            for packet in fragment(encode_message(msg, self.cfg.compress_threshold)):
+                self._transport.sendto(packet, addr)
+            if self.server_client:
+                self.server_client.send_message_to_server(msg)
+        except Exception as e:
+            err_log.warning("lobby.tx", "[lobby] tx error: %s", e)
+        return msg
+
+    def _on_datagram(self, data: bytes, peer: tuple):
+        msg = decode_message(data)
+        if msg is None or msg.get("type") != "chat":
+            return
+        if msg.get("room_id") != self.cfg.room_id or msg.get("from") == self.cfg.user_id:
+            return
+        seq, sess = msg.get("seq"), msg.get("sess")
+        if isinstance(seq, int) and sess:
+            for ready in self._reorder.push((msg.get("from"), sess), seq, msg):
+                self._deliver(ready)
+            self._schedule_flush()
+        else:
+            self._deliver(msg)
+
+    def _schedule_flush(self):
+        if self._flush_handle is not None:
+            return
+        deadline = self._reorder.next_deadline()
+        if deadline is not None:
+            loop = asyncio.get_running_loop()
+            self._flush_handle = loop.call_later(max(0.0, deadline - time.monotonic()), self._on_flush)
+
+    def _on_flush(self):
+        self._flush_handle = None
+        ready, gaps = self._reorder.expire()
+        for msg in ready:
+            self._deliver(msg)
+        if gaps and self.server_client:
+            asyncio.get_running_loop().create_task(self._fill_gaps(gaps))
+        self._schedule_flush()
+
+    async def _fill_gaps(self, gaps):
+        loop = asyncio.get_running_loop()
+        for (from_uid, sess), seq_from, seq_to in gaps:
+            fetched = await loop.run_in_executor(
+                None, self.server_client.get_lobby_messages_by_seq,
+                self.cfg.room_id, from_uid, sess, seq_from, seq_to)
+            for m in fetched:
+                try:
+                    ts = datetime.fromisoformat(m.get("timestamp") or "").timestamp()
+                except ValueError:
+                    ts = None
+                self._deliver({
+                    "from": m.get("from"), "nick": m.get("nick"), "text": m.get("text", ""),
+                    "msg_id": m.get("msg_id"), "seq": m.get("seq"), "sess": m.get("sess"),
+                    "ts": ts,
+                }, recovered=True)
+
+    def _deliver(self, msg: dict, recovered: bool = False):
+        msg_id = msg.get("msg_id")
+        if msg_id:
+            if msg_id in self._seen:
+                return
+            self._seen[msg_id] = None
+            if len(self._seen) > self.cfg.dedupe_size:
+                self._seen.popitem(last=False)
+        self.events.post("lobby_chat",
+                         from_uid=msg.get("from"),
+                         nick=msg.get("nick"),
+                         text=msg.get("text", ""),
+                         msg_id=msg_id,
+                         ts=msg.get("ts"),
+                         recovered=recovered)
+
+
+# ---------------------------------------------------------------- DM
+class AsyncDmService(_AsyncService):
+    """
+    DM 송수신 - reliable 모드는 메시지별 loop.call_later로 재전송 예약
+    send(..., wait_ack=True)면 ack(True) 또는 유실 판정(False)까지 대기
+    """
+    def __init__(self, cfg: DmConfig, events: Any = None):
+        super().__init__(events)
+        self.cfg = cfg
+        self.server_client = _server_client(cfg)
+        self._transport: Optional[asyncio.DatagramTransport] = None
+        self._pending: Dict[str, dict] = {}
+        self._rtt = RttEstimator(cfg.min_rto, cfg.max_rto)
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self._stats = {"sent": 0, "acked": 0, "retransmits": 0, "lost": 0, "duplicates": 0}
+
+    async def start(self):
+        self._transport = await _open_udp(self._on_datagram, "dm", port=self.cfg.listen_port)
+
+    async def stop(self):
+        for p in self._pending.values():
+            p["timer"].cancel()
+            if not p["done"].done():
+                p["done"].set_result(False)
+        self._pending.clear()
+        if self._transport:
+            self._transport.close()
+            self._transport = None
+        self._close_events()
+
+    async def send(self, to_ip: str, to_port: int, text: str, to_user_id: str = None,
+                   wait_ack: bool = False) -> dict:
+        msg = {
+            "type": "dm",
+            "room_id": self.cfg.room_id,
+            "from": self.cfg.user_id,
+            "to": to_user_id,
+            "nick": self.cfg.anon_nick,
+            "text": text,
+            "msg_id": str(uuid.uuid4()),
+            "ts": time.time(),
+        }
+        if self.cfg.reliable:
+            msg["ack"] = True
+        done = None
+        try:
+            packets = fragment(encode_message(msg, self.cfg.compress_threshold))
+            addr = (to_ip, to_port)
+            if self.cfg.reliable:
+                loop = asyncio.get_running_loop()
+                now = time.monotonic()
+                done = loop.create_future()
+                self._pending[msg["msg_id"]] = {
+                    "packets": packets, "addr": addr, "to": to_user_id,
+                    "first_sent": now, "tries": 0, "rto": self._rtt.rto, "done": done,
+                    "timer": loop.call_later(self._rtt.rto, self._retransmit, msg["msg_id"]),
+                }
+                self._stats["sent"] += 1
+            for packet in packets:
+                self._transport.sendto(packet, addr)
+            if self.server_client:
+                self.server_client.send_message_to_server(msg)
+        except Exception as e:
+            err_log.warning("dm.tx", "[dm] tx error: %s", e)
+        if wait_ack and done is not None:
+            await done
+        return msg
+
+    def _retransmit(self, msg_id: str):
+        p = self._pending.get(msg_id)
+        if p is None:
+            return
+        if p["tries"] >= self.cfg.max_retries:
+            del self._pending[msg_id]
+            self._stats["lost"] += 1
+            p["done"].set_result(False)
+            self.events.post("dm_failed", msg_id=msg_id, to_uid=p["to"])
+            return
+        p["tries"] += 1
+        p["rto"] = min(self.cfg.max_rto, p["rto"] * 2)
+        self._stats["retransmits"] += 1
+        try:
+            for packet in p["packets"]:
+                self._transport.sendto(packet, p["addr"])
+        except Exception as e:
+            err_log.warning("dm.retx", "[dm] retx error: %s", e)
+        p["timer"] = asyncio.get_running_loop().call_later(p["rto"], self._retransmit, msg_id)
+
+    def _on_ack(self, msg_id: str):
+        p = self._pending.pop(msg_id, None)
+        if not p:
+            return
+        p["timer"].cancel()
+        self._stats["acked"] += 1
+        if p["tries"] == 0:  # Karn
+            self._rtt.sample(time.monotonic() - p["first_sent"])
+        p["done"].set_result(True)
+
+    def stats(self) -> dict:
+        """DmService.stats()와 같은 키"""
+        return dm_stats(self._stats, len(self._pending), self._rtt)
+
+    def _on_datagram(self, data: bytes, peer: tuple):
+        msg = decode_message(data)
+        if msg is None:
+            return
+        if msg.get("type") == "dm_ack":
+            self._on_ack(msg.get("msg_id"))
+            return
+        if msg.get("type") != "dm" or msg.get("room_id") != self.cfg.room_id:
+            return
+        if msg.get("from") == self.cfg.user_id:
+            return
+        if msg.get("ack"):
+            ack = {"type": "dm_ack", "msg_id": msg.get("msg_id"), "from": self.cfg.user_id}
+            self._transport.sendto(json.dumps(ack).encode("utf-8"), peer)
+
+        msg_id = msg.get("msg_id")
+        if msg_id:
+            if msg_id in self._seen:
+                self._seen.move_to_end(msg_id)
+                self._stats["duplicates"] += 1
+                return
+            self._seen[msg_id] = None
+            if len(self._seen) > self.cfg.dedupe_size:
+                self._seen.popitem(last=False)
+
+        self.events.post("dm_chat",
+                         from_uid=msg.get("from"),
+                         to_uid=msg.get("to"),
+                         nick=msg.get("nick"),
+                         text=msg.get("text", ""),
+                         msg_id=msg_id,
+                         ts=msg.get("ts"))
+
+
+# ---------------------------------------------------------------- Tk 어댑터
+class AsyncioBridge:
+    """
+    백그라운드 스레드에서 이벤트 루프를 돌리고 async 서비스를 동기 API로 노출.
+    서비스의 events로 EventBus를 넘기면(post는 스레드 안전) 이벤트는 그대로 Tk로 전달됨.
+
+        bridge = AsyncioBridge(); bridge.start()
+        lobby = bridge.adapt(AsyncLobbyService(cfg, events=bus))
+        lobby.start(); lobby.send_lobby("hi")
+    """
+    def __init__(self, name: str = "net-asyncio", call_timeout: float = 2.0):
+        self.name = name
+        self.call_timeout = call_timeout
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._th: Optional[threading.Thread] = None
+
+    def start(self):
+        ready = threading.Event()
+
+        def _run():
+            self.loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self.loop)
+            ready.set()
+            self.loop.run_forever()
+            self.loop.close()
+
+        self._th = threading.Thread(target=_run, name=self.name, daemon=True)
+        self._th.start()
+        ready.wait()
+
+    def call(self, coro):
+        """루프 스레드에서 코루틴 실행 후 결과 반환 (호출 스레드는 대기)"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(self.call_timeout)
+
+    def adapt(self, service) -> "SyncServiceAdapter":
+        return SyncServiceAdapter(self, service)
+
+    def stop(self):
+        if self.loop and self._th:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._th.join(timeout=1.0)
+        self._th = None
+
+
+class SyncServiceAdapter:
+    """기존 스레드 서비스와 같은 메서드(start/stop/send_lobby/send_dm) 제공"""
+    def __init__(self, bridge: AsyncioBridge, service):
+        self.bridge = bridge
+        self.service = service
+
+    def start(self):
+        try:
+            self.bridge.call(self.service.start())
+        except OSError as e:
+            log.error("[%s] bind error: %s", type(self.service).__name__, e)
+
+    def stop(self):
+        self.bridge.call(self.service.stop())
+
+    def send_lobby(self, text: str) -> dict:
+        return self.bridge.call(self.service.send(text))
+
+    def send_dm(self, to_ip: str, to_port: int, text: str, to_user_id: str = None) -> dict:
+        return self.bridge.call(self.service.send(to_ip, to_port, text, to_user_id))
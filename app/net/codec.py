@@ -0,0 +1,45 @@
+"""
+메시지 페이로드 인코딩 (로비·DM·서버 수집기 공용)
+- 기본: UTF-8 JSON 그대로
+- JSON이 threshold 바이트를 넘고 압축 결과가 더 작으면 zlib 압축 후 ZMAGIC 접두
+  (0xfe는 UTF-8 JSON 첫 바이트가 될 수 없으므로 플래그로 사용)
+- 압축 해제는 max_size로 제한 (압축 폭탄 방지)
+- 조각화(frag.py)는 인코딩된 결과 위에서 동작
+- 압축 이전 버전 피어는 ZMAGIC 페이로드를 읽지 못하므로 기본은 압축 끔 (threshold 0)
+  모든 피어/서버가 이 버전 이상이면 COMPRESS_THRESHOLD를 512 정도로 켬
+"""
+from __future__ import annotations
+import json
+import zlib
+from typing import Optional
+
+ZMAGIC = b"\xfeZ"
+DEFAULT_THRESHOLD = 0       # 이 크기(바이트) 이하 JSON은 압축하지 않음 (0이면 끔 - 구버전 피어 호환)
+DEFAULT_LEVEL = 6
+MAX_DECODED = 1 << 20       # 압축 해제 결과 상한 (Reassembler.max_message와 동일)
+
+
+def encode_message(msg: dict, threshold: int = DEFAULT_THRESHOLD, level: int = DEFAULT_LEVEL) -> bytes:
+    """dict → 전송 페이로드 (threshold <= 0이면 압축 끔)"""
+    raw = json.dumps(msg, ensure_ascii=False).encode("utf-8")
+    if threshold <= 0 or len(raw) <= threshold:
+        return raw
+    packed = zlib.compress(raw, level)
+    if len(packed) + len(ZMAGIC) >= len(raw):
+        return raw
+    return ZMAGIC + packed
+
+
+def decode_message(data, max_size: int = MAX_DECODED) -> Optional[dict]:
+    """전송 페이로드 → dict (형식 오류/상한 초과면 None)"""
+    try:
+        if bytes(data[:2]) == ZMAGIC:
+            d = zlib.decompressobj()
+            raw = d.decompress(memoryview(data)[2:], max_size)
+            if d.unconsumed_tail:
+                return None
+            data = raw
+        msg = json.loads(data)
+    except (ValueError, zlib.error):
+        return None
+    return msg if isinstance(msg, dict) else None
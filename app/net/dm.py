@@ -1,9 +1,17 @@
 from __future__ import annotations
 import json, socket, threading, time, uuid
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Optional
+from typing import Optional, Dict
 from app.core.bus import EventBus
+from app.core.log import get_logger, RateLimitedLogger
 from .server_client import ServerClient, ServerConfig
+from .frag import fragment, MAX_DATAGRAM
+from .reactor import Reactor
+from .codec import encode_message, decode_message, DEFAULT_THRESHOLD
+
+log = get_logger("dm")
+err_log = RateLimitedLogger(log)
 
 @dataclass
 class DmConfig:
@@ -11,30 +19,84 @@ class DmConfig:
     room_id: str
     anon_nick: str
     listen_port: int   # UDP_DM_PORT
-    recv_buf: int = 16384
+    recv_buf: int = MAX_DATAGRAM
     enable_server: bool = True  # 서버 연동 활성화
     server_host: str = "127.0.0.1"
     server_http_port: int = 8080
     server_udp_port: int = 5002
+    compress_threshold: int = DEFAULT_THRESHOLD  # 이 크기(바이트) 초과 시 압축, 0이면 끔
+    reliable: bool = False      # ack + 재전송 모드
+    max_retries: int = 6        # 재전송 최대 횟수 (초과 시 유실 처리)
+    min_rto: float = 0.1        # 재전송 타임아웃 하한(초)
+    max_rto: float = 3.0        # 재전송 타임아웃 상한(초)
+    dedupe_size: int = 1024     # 수신 msg_id LRU 크기
+
+class RttEstimator:
+    """
+    Jacobson/Karels 방식 RTT 추정 (RFC 6298).
+    - SRTT/RTTVAR 갱신 후 RTO = SRTT + 4 * RTTVAR, [min_rto, max_rto]로 제한
+    """
+    def __init__(self, min_rto: float, max_rto: float, initial_rto: float = 0.5):
+        self.min_rto = min_rto
+        self.max_rto = max_rto
+        self.srtt: Optional[float] = None
+        self.rttvar: Optional[float] = None
+        self.rto = initial_rto
+
+    def sample(self, rtt: float):
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+        self.rto = min(self.max_rto, max(self.min_rto, self.srtt + 4 * self.rttvar))
+
+def dm_stats(counts: Dict[str, int], pending: int, rtt: RttEstimator) -> dict:
+    """DmService/AsyncDmService 공용 stats(): 카운트 + RTT 추정치 + 유실/재전송 비율"""
+    out = dict(counts)
+    out["pending"] = pending
+    out["srtt_ms"] = None if rtt.srtt is None else rtt.srtt * 1000
+    out["rttvar_ms"] = None if rtt.rttvar is None else rtt.rttvar * 1000
+    out["rto_ms"] = rtt.rto * 1000
+    done = out["acked"] + out["lost"]
+    out["loss_rate"] = (out["lost"] / done) if done else 0.0
+    out["retransmit_rate"] = (out["retransmits"] / out["sent"]) if out["sent"] else 0.0
+    return out
 
 class DmService:
     """
     - 수신: 0.0.0.0:listen_port 바인드 후 DM 메시지 수신하여 EventBus로 전달
     - 송신: 상대 IP:상대 DM 포트로 JSON 유니캐스트 전송
     - 서버로도 메시지 전송하여 히스토리 저장
+    - reliable 모드: 수신 측이 dm_ack 회신, 송신 측은 RTO 만료 시 재전송 (지수 백오프)
+    - 수신 측은 최근 msg_id LRU로 중복 제거 (재전송/중복 전달 모두)
+    - 수신은 리액터 스레드에서 처리 (reactor 미지정 시 자체 리액터)
     """
-    def __init__(self, cfg: DmConfig, bus: EventBus):
+    def __init__(self, cfg: DmConfig, bus: EventBus, reactor: Optional[Reactor] = None):
         self.cfg = cfg
         self.bus = bus
+        self._own_reactor = reactor is None
+        self.reactor = reactor or Reactor(name="dm-reactor")
         self._stop = threading.Event()
-        self._rx_th: Optional[threading.Thread] = None
-        
+        self._retx_th: Optional[threading.Thread] = None
+        self._sock: Optional[socket.socket] = None
+
+        # reliable 모드 상태
+        self._lock = threading.Lock()
+        self._pending: Dict[str, dict] = {}
+        self._wake = threading.Event()  # 새 pending 등록 시 재전송 스레드 깨우기
+        self._rtt = RttEstimator(cfg.min_rto, cfg.max_rto)
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self._stats = {"sent": 0, "acked": 0, "retransmits": 0, "lost": 0, "duplicates": 0}
+
         # 서버 클라이언트 초기화
         if cfg.enable_server:
             server_cfg = ServerConfig(
                 host=cfg.server_host,
                 http_port=cfg.server_http_port,
-                udp_bridge_port=cfg.server_udp_port
+                udp_bridge_port=cfg.server_udp_port,
+                compress_threshold=cfg.compress_threshold
             )
             self.server_client = ServerClient(server_cfg)
         else:
@@ -42,15 +104,37 @@ class DmService:
 
     def start(self):
         self._stop.clear()
-        self._rx_th = threading.Thread(target=self._rx_loop, name="dm-rx", daemon=True)
-        self._rx_th.start()
+        # 수신 소켓으로 송신도 해야 상대의 ack가 listen_port로 돌아옴
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            s.bind(("0.0.0.0", self.cfg.listen_port))
+        except OSError as e:
+            s.close()
+            log.error("bind error: %s", e)
+            return
+        self._sock = s
+        self.reactor.add_reader(s, self._on_datagram, self.cfg.recv_buf, tag="dm")
+        if self._own_reactor:
+            self.reactor.start()
+        if self.cfg.reliable:
+            self._retx_th = threading.Thread(target=self._retx_loop, name="dm-retx", daemon=True)
+            self._retx_th.start()
 
     def stop(self):
         self._stop.set()
-        if self._rx_th: self._rx_th.join(timeout=1.0)
+        self._wake.set()
+        if self._retx_th: self._retx_th.join(timeout=1.0)
+        if self._sock:
+            self.reactor.remove_reader(self._sock)
+        if self._own_reactor:
+            self.reactor.stop()
+        if self._sock:
+            self._sock.close()
+            self._sock = None
 
     # --- 송신 ---
-    def send_dm(self, to_ip: str, to_port: int, text: str, to_user_id: str = None):
+    def send_dm(self, to_ip: str, to_port: int, text: str, to_user_id: str = None) -> dict:
         msg = {
             "type": "dm",
             "room_id": self.cfg.room_id,
@@ -61,46 +145,133 @@ class DmService:
             "msg_id": str(uuid.uuid4()),
             "ts": time.time(),
         }
+        if self.cfg.reliable:
+            msg["ack"] = True
         try:
             # 직접 UDP 전송
-            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
-                s.sendto(json.dumps(msg, ensure_ascii=False).encode("utf-8"), (to_ip, to_port))
-                
+            # 재전송 시에도 같은 조각(frag_id)을 보내야 수신 측에서 이어 붙일 수 있음
+            packets = fragment(encode_message(msg, self.cfg.compress_threshold))
+            addr = (to_ip, to_port)
+            if self.cfg.reliable and self._sock:
+                now = time.monotonic()
+                with self._lock:
+                    self._pending[msg["msg_id"]] = {
+                        "packets": packets, "addr": addr, "to": to_user_id,
+                        "first_sent": now, "sent_at": now, "tries": 0, "rto": self._rtt.rto,
+                    }
+                    self._stats["sent"] += 1
+                self._wake.set()
+            self._sendto(packets, addr)
+
             # 서버로도 전송 (히스토리 저장용)
             if self.server_client:
                 self.server_client.send_message_to_server(msg)
-                
+
         except Exception as e:
-            print("[dm] tx error:", e)
+            err_log.warning("tx", "tx error: %s", e)
+        return msg
 
-    # --- 수신 ---
-    def _rx_loop(self):
-        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
-            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            s.bind(("0.0.0.0", self.cfg.listen_port))
-            s.settimeout(0.5)
-            while not self._stop.is_set():
+    def _sendto(self, packets, addr: tuple):
+        if self._sock:
+            for packet in packets:
+                self._sock.sendto(packet, addr)
+        else:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+                for packet in packets:
+                    s.sendto(packet, addr)
+
+    # --- 재전송 ---
+    def _retx_loop(self):
+        while not self._stop.is_set():
+            now = time.monotonic()
+            resend, lost = [], []
+            next_due = now + 0.5
+            with self._lock:
+                for msg_id, p in list(self._pending.items()):
+                    due = p["sent_at"] + p["rto"]
+                    if due > now:
+                        next_due = min(next_due, due)
+                        continue
+                    if p["tries"] >= self.cfg.max_retries:
+                        self._pending.pop(msg_id, None)
+                        self._stats["lost"] += 1
+                        lost.append((msg_id, p["to"]))
+                        continue
+                    p["tries"] += 1
+                    p["sent_at"] = now
+                    p["rto"] = min(self.cfg.max_rto, p["rto"] * 2)
+                    self._stats["retransmits"] += 1
+                    resend.append((p["packets"], p["addr"]))
+                    next_due = min(next_due, now + p["rto"])
+            for packets, addr in resend:
                 try:
-                    data, _ = s.recvfrom(self.cfg.recv_buf)
-                except socket.timeout:
-                    continue
+                    self._sendto(packets, addr)
                 except Exception as e:
-                    print("[dm] rx error:", e)
-                    continue
+                    err_log.warning("retx", "retx error: %s", e)
+            for msg_id, to_uid in lost:
+                self.bus.post("dm_failed", msg_id=msg_id, to_uid=to_uid)
+            self._wake.wait(max(0.01, next_due - time.monotonic()))
+            self._wake.clear()
 
-                try:
-                    msg = json.loads(data.decode("utf-8"))
-                except Exception:
-                    continue
-
-                if not isinstance(msg, dict) or msg.get("type") != "dm":
-                    continue
-                if msg.get("room_id") != self.cfg.room_id:
-                    continue
-                if msg.get("from") == self.cfg.user_id:
-                    continue
-
-                self.bus.post("dm_chat",
-                              from_uid=msg.get("from"),
-                              nick=msg.get("nick"),
-                              text=msg.get("text",""))
+    def _on_ack(self, msg_id: str):
+        with self._lock:
+            p = self._pending.pop(msg_id, None)
+            if not p:
+                return
+            self._stats["acked"] += 1
+            # Karn: 재전송된 메시지의 ack는 어느 전송에 대한 것인지 모호하므로 RTT 샘플에서 제외
+            if p["tries"] == 0:
+                self._rtt.sample(time.monotonic() - p["first_sent"])
+
+    def stats(self) -> dict:
+        """전송/ack/재전송/유실/중복 카운트와 RTT 추정치"""
+        with self._lock:
+            return dm_stats(self._stats, len(self._pending), self._rtt)
+
+    # --- 수신 ---
+    def _is_duplicate(self, msg_id: Optional[str]) -> bool:
+        """최근 msg_id LRU 확인 + 등록"""
+        if not msg_id:
+            return False
+        if msg_id in self._seen:
+            self._seen.move_to_end(msg_id)
+            return True
+        self._seen[msg_id] = None
+        if len(self._seen) > self.cfg.dedupe_size:
+            self._seen.popitem(last=False)
+        return False
+
+    def _on_datagram(self, data: bytes, peer: tuple):
+        msg = decode_message(data)
+        if msg is None:
+            return
+        if msg.get("type") == "dm_ack":
+            self._on_ack(msg.get("msg_id"))
+            return
+        if msg.get("type") != "dm":
+            return
+        if msg.get("room_id") != self.cfg.room_id:
+            return
+        if msg.get("from") == self.cfg.user_id:
+            return
+
+        if msg.get("ack") and self._sock:
+            # ack 유실 대비: 중복 수신이어도 항상 회신
+            ack = {"type": "dm_ack", "msg_id": msg.get("msg_id"), "from": self.cfg.user_id}
+            try:
+                self._sock.sendto(json.dumps(ack).encode("utf-8"), peer)
+            except Exception as e:
+                err_log.warning("ack", "ack tx error: %s", e)
+
+        if self._is_duplicate(msg.get("msg_id")):
+            with self._lock:
+                self._stats["duplicates"] += 1
+            return
+
+        self.bus.post("dm_chat",
+                      from_uid=msg.get("from"),
+                      to_uid=msg.get("to"),
+                      nick=msg.get("nick"),
+                      text=msg.get("text",""),
+                      msg_id=msg.get("msg_id"),
+                      ts=msg.get("ts"))
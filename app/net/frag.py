@@ -0,0 +1,152 @@
+"""
+UDP 조각화/재조립 계층 (로비·DM·presence·서버 수집기 공용)
+- 작은 페이로드(mtu 이하)는 그대로 전송 → 기존 JSON 패킷과 호환
+- 큰 페이로드는 헤더를 붙인 mtu 크기 조각으로 분할
+  헤더: MAGIC(2) | VERSION(1) | frag_id(8) | total_len(4) | offset(4)
+- 수신 측은 total_len 크기로 미리 할당한 bytearray에 memoryview로 바로 기록
+- 이미 받은 구간과 일부만 겹치는 조각은 버림 → 겹침으로 받은 바이트 수를 부풀려 빈 구간째 완성되지 않음
+- 미완성 메시지는 timeout 후 폐기, 메시지/전체 메모리 상한 적용
+"""
+from __future__ import annotations
+import os
+import socket
+import struct
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+MAGIC = b"\xffT"   # 0xff는 UTF-8 JSON 첫 바이트가 될 수 없음
+VERSION = 1
+HEADER = struct.Struct("!2sB8sII")
+DEFAULT_MTU = 1200  # IP/UDP 헤더 포함 1500 이내
+MAX_DATAGRAM = 65535
+
+
+def fragment(payload: bytes, mtu: int = DEFAULT_MTU) -> List[bytes]:
+    """페이로드를 전송용 데이터그램 목록으로 분할 (mtu 이하면 그대로 1개)"""
+    if len(payload) <= mtu:
+        return [payload]
+    chunk = mtu - HEADER.size
+    frag_id = os.urandom(8)
+    total = len(payload)
+    view = memoryview(payload)
+    return [
+        HEADER.pack(MAGIC, VERSION, frag_id, total, off) + view[off:off + chunk]
+        for off in range(0, total, chunk)
+    ]
+
+
+def sendto_fragmented(sock: socket.socket, payload: bytes, addr: tuple, mtu: int = DEFAULT_MTU) -> int:
+    """조각화해서 전송, 보낸 데이터그램 수 반환"""
+    packets = fragment(payload, mtu)
+    for packet in packets:
+        sock.sendto(packet, addr)
+    return len(packets)
+
+
+class _Partial:
+    __slots__ = ("buf", "view", "received", "starts", "ends", "started")
+
+    def __init__(self, total: int, now: float):
+        self.buf = bytearray(total)
+        self.view = memoryview(self.buf)
+        self.received = 0
+        # 받은 구간 [starts[i], ends[i]) - 시작 위치 순, 서로 겹치지 않음
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        self.started = now
+
+
+class Reassembler:
+    """
+    조각 재조립기 (스레드 하나에서만 사용)
+    - feed(): 완성된 페이로드(bytes) 또는 None
+    """
+    def __init__(self, timeout: float = 3.0, max_message: int = 1 << 20, max_pending: int = 8 << 20):
+        self.timeout = timeout
+        self.max_message = max_message
+        self.max_pending = max_pending
+        self._partials: "OrderedDict[tuple, _Partial]" = OrderedDict()
+        self._pending_bytes = 0
+        self.stats = {"fragments": 0, "completed": 0, "expired": 0, "dropped": 0}
+
+    def feed(self, data, peer: tuple, now: Optional[float] = None) -> Optional[bytes]:
+        """
+        data: bytes 또는 memoryview (수신 버퍼는 재사용되므로 조각 본문만 복사)
+        완성된 조각 메시지는 재조립 버퍼(bytearray)를 복사 없이 그대로 반환
+        """
+        if len(data) < HEADER.size or bytes(data[:2]) != MAGIC:
+            return bytes(data)
+        now = time.monotonic() if now is None else now
+        self._expire(now)
+
+        magic, version, frag_id, total, offset = HEADER.unpack_from(data)
+        body = data[HEADER.size:]
+        if version != VERSION or total > self.max_message or offset + len(body) > total or not body:
+            self.stats["dropped"] += 1
+            return None
+        self.stats["fragments"] += 1
+
+        key = (peer, frag_id)
+        part = self._partials.get(key)
+        if part is None:
+            if not self._reserve(total):
+                self.stats["dropped"] += 1
+                return None
+            part = self._partials[key] = _Partial(total, now)
+        end = offset + len(body)
+        i = bisect_left(part.starts, offset)
+        if i < len(part.starts) and part.starts[i] == offset and part.ends[i] == end:
+            return None  # 중복 조각
+        if (i < len(part.starts) and part.starts[i] < end) or (i and part.ends[i - 1] > offset):
+            self.stats["dropped"] += 1  # 받은 구간과 겹침 (정상 송신 측은 만들지 않음)
+            return None
+        part.view[offset:end] = body
+        part.starts.insert(i, offset)
+        part.ends.insert(i, end)
+        part.received += len(body)
+        if part.received < total:
+            return None
+
+        del self._partials[key]
+        self._pending_bytes -= total
+        self.stats["completed"] += 1
+        part.view.release()
+        return part.buf
+
+    def _reserve(self, total: int) -> bool:
+        """전체 메모리 상한 안에서 공간 확보 (가장 오래된 미완성 메시지부터 폐기)"""
+        while self._partials and self._pending_bytes + total > self.max_pending:
+            _, old = self._partials.popitem(last=False)
+            self._pending_bytes -= len(old.buf)
+            self.stats["dropped"] += 1
+        if total > self.max_pending:
+            return False
+        self._pending_bytes += total
+        return True
+
+    def _expire(self, now: float):
+        while self._partials:
+            key, part = next(iter(self._partials.items()))
+            if now - part.started < self.timeout:
+                break
+            del self._partials[key]
+            self._pending_bytes -= len(part.buf)
+            self.stats["expired"] += 1
+
+
+class FragmentReceiver:
+    """
+    소켓 하나에 대한 수신 헬퍼.
+    - 고정 수신 버퍼에 recvfrom_into → 조각이면 Reassembler로, 아니면 그대로 반환
+    """
+    def __init__(self, reassembler: Optional[Reassembler] = None, bufsize: int = MAX_DATAGRAM):
+        self.reassembler = reassembler or Reassembler()
+        self._buf = bytearray(bufsize)
+        self._view = memoryview(self._buf)
+
+    def recv(self, sock: socket.socket) -> Tuple[Optional[bytes], tuple]:
+        """(완성된 페이로드 또는 None, peer) - socket.timeout 등은 그대로 전파"""
+        n, peer = sock.recvfrom_into(self._buf)
+        return self.reassembler.feed(self._view[:n], peer), peer
@@ -1,15 +1,29 @@
 """
 LobbyService
-- 로비 채팅 메시지를 UDP 브로드캐스트로 송신
+- 로비 채팅 메시지를 UDP 브로드캐스트(또는 룸 멀티캐스트 그룹, app/net/mcast.py)로 송신
 - 동일 포트에서 수신하여 같은 room_id의 타인 메시지를 EventBus로 전달
 - 서버로도 메시지 전송하여 히스토리 저장
+- 송신자별 seq를 붙여 전송, 수신 측은 최대 gap_wait_ms 동안 재정렬 후
+  끝내 빠진 구간은 서버 히스토리에서 seq 구간으로 채움
+- 수신/gap 만료 타이머는 리액터 스레드에서 실행 (reactor 미지정 시 자체 리액터)
 """
 from __future__ import annotations
-import json, socket, threading, time, uuid
+import socket, threading, time, uuid
+from collections import OrderedDict
 from dataclasses import dataclass
+from datetime import datetime
 from typing import Optional
 from app.core.bus import EventBus
+from app.core.log import get_logger, RateLimitedLogger
 from .server_client import ServerClient, ServerConfig
+from .seq import ReorderBuffer
+from .frag import sendto_fragmented, MAX_DATAGRAM
+from .reactor import Reactor, TimerHandle
+from .codec import encode_message, decode_message, DEFAULT_THRESHOLD
+from . import mcast
+
+log = get_logger("lobby")
+err_log = RateLimitedLogger(log)
 
 @dataclass
 class LobbyConfig:
@@ -18,41 +32,77 @@ class LobbyConfig:
     anon_nick: str
     broadcast_ip: str
     port: int  # UDP_CHAT_PORT
-    recv_buf: int = 16384
+    recv_buf: int = MAX_DATAGRAM
     enable_server: bool = True  # 서버 연동 활성화
     server_host: str = "127.0.0.1"
     server_http_port: int = 8080
     server_udp_port: int = 5002
+    compress_threshold: int = DEFAULT_THRESHOLD  # 이 크기(바이트) 초과 시 압축, 0이면 끔
+    gap_wait_ms: int = 300      # SEQ_GAP_WAIT_MS
+    dedupe_size: int = 2048     # 수신 msg_id LRU 크기
+    transport: str = "broadcast"  # NET_TRANSPORT: broadcast | multicast
+    mcast_group: str = mcast.DEFAULT_GROUP  # 이 룸의 그룹 (mcast.room_group)
+    mcast_ttl: int = 1
+    mcast_iface: str = ""  # 인터페이스 IPv4 주소 (비우면 기본)
 
 class LobbyService:
-    def __init__(self, cfg: LobbyConfig, bus: EventBus):
+    def __init__(self, cfg: LobbyConfig, bus: EventBus, reactor: Optional[Reactor] = None):
         self.cfg = cfg
         self.bus = bus
-        self._stop = threading.Event()
-        self._rx_th: Optional[threading.Thread] = None
+        self._own_reactor = reactor is None
+        self.reactor = reactor or Reactor(name="lobby-reactor")
+        self._sock: Optional[socket.socket] = None
+        self._flush_timer: Optional[TimerHandle] = None
+
+        # 송신 시퀀스: 세션(프로세스 실행)마다 1부터
+        self._sess = uuid.uuid4().hex[:12]
+        self._seq = 0
+        self._seq_lock = threading.Lock()
+        # 수신 재정렬/중복 제거
+        self._reorder = ReorderBuffer(cfg.gap_wait_ms / 1000.0)
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self._seen_lock = threading.Lock()
         
         # 서버 클라이언트 초기화
         if cfg.enable_server:
             server_cfg = ServerConfig(
                 host=cfg.server_host,
                 http_port=cfg.server_http_port,
-                udp_bridge_port=cfg.server_udp_port
+                udp_bridge_port=cfg.server_udp_port,
+                compress_threshold=cfg.compress_threshold
             )
             self.server_client = ServerClient(server_cfg)
         else:
             self.server_client = None
 
     def start(self):
-        self._stop.clear()
-        self._rx_th = threading.Thread(target=self._rx_loop, name="lobby-rx", daemon=True)
-        self._rx_th.start()
+        try:
+            s = mcast.open_socket(self.cfg, port=self.cfg.port)
+        except OSError as e:
+            log.error("bind error: %s", e)
+            return
+        self._sock = s
+        self.reactor.add_reader(s, self._on_datagram, self.cfg.recv_buf, tag="lobby")
+        if self._own_reactor:
+            self.reactor.start()
 
     def stop(self):
-        self._stop.set()
-        if self._rx_th: self._rx_th.join(timeout=1.0)
+        if self._flush_timer:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        if self._sock:
+            self.reactor.remove_reader(self._sock)
+        if self._own_reactor:
+            self.reactor.stop()
+        if self._sock:
+            self._sock.close()
+            self._sock = None
 
     # ---- 송신 ----
-    def send_lobby(self, text: str):
+    def send_lobby(self, text: str) -> dict:
+        with self._seq_lock:
+            self._seq += 1
+            seq = self._seq
         msg = {
             "type": "chat",
             "room_id": self.cfg.room_id,
@@ -61,50 +111,95 @@ class LobbyService:
             "text": text,
             "msg_id": str(uuid.uuid4()),
             "ts": time.time(),
+            "seq": seq,
+            "sess": self._sess,
         }
-        addr = (self.cfg.broadcast_ip, self.cfg.port)
+        addr = (mcast.dest_ip(self.cfg), self.cfg.port)
         try:
-            # UDP 브로드캐스트 전송
-            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
-                s.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-                s.sendto(json.dumps(msg, ensure_ascii=False).encode("utf-8"), addr)
+            # UDP 브로드캐스트/멀티캐스트 전송
+            with mcast.open_socket(self.cfg, tx=True) as s:
+                sendto_fragmented(s, encode_message(msg, self.cfg.compress_threshold), addr)
                 
             # 서버로도 전송 (히스토리 저장용)
             if self.server_client:
                 self.server_client.send_message_to_server(msg)
                 
         except Exception as e:
-            print("[lobby] tx error:", e)
+            err_log.warning("tx", "tx error: %s", e)
+        return msg
 
-    # ---- 수신 ----
-    def _rx_loop(self):
-        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
-            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            s.bind(("0.0.0.0", self.cfg.port))
-            s.settimeout(0.5)
-            while not self._stop.is_set():
-                try:
-                    data, _ = s.recvfrom(self.cfg.recv_buf)
-                except socket.timeout:
-                    continue
-                except Exception as e:
-                    print("[lobby] rx error:", e)
-                    continue
+    # ---- 수신 (리액터 스레드) ----
+    def _on_datagram(self, data: bytes, peer: tuple):
+        msg = decode_message(data)
+        if msg is None or msg.get("type") != "chat":
+            return
+        if msg.get("room_id") != self.cfg.room_id:
+            return
+        if msg.get("from") == self.cfg.user_id:
+            # 내가 보낸 브로드캐스트/멀티캐스트는 표시하지 않음(이미 로컬에 찍었음)
+            return
 
-                try:
-                    msg = json.loads(data.decode("utf-8"))
-                except Exception:
-                    continue
+        seq, sess = msg.get("seq"), msg.get("sess")
+        if isinstance(seq, int) and sess:
+            for ready in self._reorder.push((msg.get("from"), sess), seq, msg):
+                self._deliver(ready)
+            self._schedule_flush()
+        else:
+            # seq 없는 구버전 피어: 그대로 전달
+            self._deliver(msg)
+
+    def _schedule_flush(self):
+        """보류 중인 gap이 있으면 가장 이른 만료 시각에 _flush_gaps 예약"""
+        if self._flush_timer is not None:
+            return  # 새 gap의 만료 시각은 항상 기존 예약보다 늦음
+        deadline = self._reorder.next_deadline()
+        if deadline is not None:
+            self._flush_timer = self.reactor.call_later(deadline - time.monotonic(), self._on_flush_timer)
+
+    def _on_flush_timer(self):
+        self._flush_timer = None
+        self._flush_gaps()
+        self._schedule_flush()
 
-                if not isinstance(msg, dict) or msg.get("type") != "chat":
-                    continue
-                if msg.get("room_id") != self.cfg.room_id:
-                    continue
-                if msg.get("from") == self.cfg.user_id:
-                    # 내가 보낸 브로드캐스트는 표시하지 않음(이미 로컬에 찍었음)
-                    continue
+    def _flush_gaps(self):
+        """대기 시간이 지난 보류분 방출 + 빠진 구간은 서버에서 채우기"""
+        ready, gaps = self._reorder.expire()
+        for msg in ready:
+            self._deliver(msg)
+        if gaps and self.server_client:
+            threading.Thread(target=self._fill_gaps, args=(gaps,), name="lobby-gapfill", daemon=True).start()
+
+    def _fill_gaps(self, gaps):
+        for (from_uid, sess), seq_from, seq_to in gaps:
+            fetched = self.server_client.get_lobby_messages_by_seq(
+                self.cfg.room_id, from_uid, sess, seq_from, seq_to)
+            for m in fetched:
+                try:
+                    ts = datetime.fromisoformat(m.get("timestamp") or "").timestamp()
+                except ValueError:
+                    ts = None
+                self._deliver({
+                    "from": m.get("from"), "nick": m.get("nick"), "text": m.get("text", ""),
+                    "msg_id": m.get("msg_id"), "seq": m.get("seq"), "sess": m.get("sess"),
+                    "ts": ts,
+                }, recovered=True)
+            if len(fetched) < seq_to - seq_from + 1:
+                err_log.info("gap", "gap @%s seq %d-%d: %d/%d 복구", from_uid, seq_from, seq_to,
+                             len(fetched), seq_to - seq_from + 1)
 
-                self.bus.post("lobby_chat",
-                              from_uid=msg.get("from"),
-                              nick=msg.get("nick"),
-                              text=msg.get("text", ""))
+    def _deliver(self, msg: dict, recovered: bool = False):
+        msg_id = msg.get("msg_id")
+        if msg_id:
+            with self._seen_lock:
+                if msg_id in self._seen:
+                    return
+                self._seen[msg_id] = None
+                if len(self._seen) > self.cfg.dedupe_size:
+                    self._seen.popitem(last=False)
+        self.bus.post("lobby_chat",
+                      from_uid=msg.get("from"),
+                      nick=msg.get("nick"),
+                      text=msg.get("text", ""),
+                      msg_id=msg_id,
+                      ts=msg.get("ts"),
+                      recovered=recovered)
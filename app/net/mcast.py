@@ -0,0 +1,99 @@
+"""
+LAN 전송 방식 - presence/로비 송수신 소켓 생성 (broadcast | multicast)
+- broadcast: 기존 방식. broadcast_ip(서브넷 브로드캐스트)로 송신 → 세그먼트의 모든 호스트가 처리
+- multicast: 룸마다 IP 멀티캐스트 그룹으로 송신, 수신 소켓은 자기 룸 그룹에만 가입
+  → 가입하지 않은 호스트는 NIC/커널에서 걸러지고, 룸이 다르면 그룹도 달라 서로의 패킷을 받지 않음
+- 룸 그룹: room_groups("lobby=239.255.77.1,dev=239.255.77.2")에 있으면 그 주소,
+  없으면 mcast_group(기준 주소) + crc32(room_id) % mcast_group_span
+  (span 1이면 모든 룸이 한 그룹, 해시가 겹친 룸끼리는 그룹을 나눠 쓰고 room_id로 걸러짐)
+- mcast_iface: 송신/가입에 쓸 인터페이스의 IPv4 주소 (비우면 OS 라우팅 기본값, 테스트는 127.0.0.1)
+- mcast_ttl: 1이면 로컬 세그먼트만, 라우터를 넘기려면 늘림
+- 같은 호스트의 다른 클라이언트도 받도록 IP_MULTICAST_LOOP는 켬 (자기 메시지는 user_id로 걸러짐)
+
+    s = open_socket(cfg, port=cfg.port)   # 수신 (멀티캐스트면 그룹 가입)
+    t = open_socket(cfg, tx=True)         # 송신
+    t.sendto(payload, (dest_ip(cfg), cfg.port))
+"""
+from __future__ import annotations
+import ipaddress
+import socket
+import struct
+import zlib
+from typing import Dict, Optional
+
+TRANSPORTS = ("broadcast", "multicast")
+DEFAULT_GROUP = "239.255.77.0"  # 조직 내부 범위(239.255.0.0/16)
+DEFAULT_SPAN = 256
+
+
+def parse_room_groups(spec: str) -> Dict[str, str]:
+    """'room=group,room2=group2' → {room: group} (그룹은 멀티캐스트 주소만)"""
+    out: Dict[str, str] = {}
+    for item in (spec or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        room, sep, group = item.partition("=")
+        room, group = room.strip(), group.strip()
+        if not sep or not room:
+            raise ValueError(f"룸 그룹 형식 오류: {item!r} (room=group)")
+        if not ipaddress.IPv4Address(group).is_multicast:
+            raise ValueError(f"멀티캐스트 주소가 아님: {group}")
+        out[room] = group
+    return out
+
+
+def room_group(room_id: str, base: str = DEFAULT_GROUP, span: int = DEFAULT_SPAN,
+               room_groups: str = "") -> str:
+    """room_id의 멀티캐스트 그룹"""
+    explicit = parse_room_groups(room_groups).get(room_id)
+    if explicit:
+        return explicit
+    offset = zlib.crc32(room_id.encode("utf-8")) % max(1, span)
+    group = ipaddress.IPv4Address(base) + offset
+    if not group.is_multicast:
+        raise ValueError(f"{base} + {offset}가 멀티캐스트 범위를 벗어남 (MCAST_GROUP_SPAN 확인)")
+    return str(group)
+
+
+def dest_ip(cfg) -> str:
+    """송신 대상 주소 (브로드캐스트 주소 또는 룸 그룹)"""
+    return cfg.mcast_group if cfg.transport == "multicast" else cfg.broadcast_ip
+
+
+def _iface(cfg) -> bytes:
+    return socket.inet_aton(cfg.mcast_iface or "0.0.0.0")
+
+
+def open_socket(cfg, port: Optional[int] = None, tx: bool = False) -> socket.socket:
+    """
+    cfg(transport, broadcast_ip, mcast_group, mcast_ttl, mcast_iface)에 맞춘 UDP 소켓
+    port: 수신 바인드 (멀티캐스트면 그룹 주소로 바인드 + 가입), tx: 송신 옵션 설정
+    """
+    multicast = cfg.transport == "multicast"
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if port is not None:
+            if multicast:
+                try:
+                    # 그룹 주소로 바인드해야 같은 포트의 다른 그룹 패킷이 섞이지 않음 (Windows는 불가)
+                    s.bind((cfg.mcast_group, port))
+                except OSError:
+                    s.bind(("0.0.0.0", port))
+                mreq = struct.pack("4s4s", socket.inet_aton(cfg.mcast_group), _iface(cfg))
+                s.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
+            else:
+                s.bind(("0.0.0.0", port))
+        if tx:
+            if multicast:
+                s.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, cfg.mcast_ttl)
+                s.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+                if cfg.mcast_iface:
+                    s.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, _iface(cfg))
+            else:
+                s.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+    except OSError:
+        s.close()
+        raise
+    return s
@@ -1,8 +1,14 @@
 from __future__ import annotations
-import json, socket, threading, time
+import json, socket
 from dataclasses import dataclass
 from typing import Optional
 from app.core.bus import EventBus
+from app.core.log import get_logger, RateLimitedLogger
+from .reactor import Reactor, TimerHandle
+from . import mcast
+
+log = get_logger("presence")
+tx_log = RateLimitedLogger(log)
 
 @dataclass
 class PresenceConfig:
@@ -14,81 +20,92 @@ class PresenceConfig:
     dm_port: int         # UDP_DM_PORT
     interval_sec: float = 2.0
     recv_buf: int = 8192
+    transport: str = "broadcast"  # NET_TRANSPORT: broadcast | multicast
+    mcast_group: str = mcast.DEFAULT_GROUP  # 이 룸의 그룹 (mcast.room_group)
+    mcast_ttl: int = 1
+    mcast_iface: str = ""  # 인터페이스 IPv4 주소 (비우면 기본)
 
 class PresenceService:
-    def __init__(self, cfg: PresenceConfig, bus: EventBus):
+    """
+    - 송신: interval_sec마다 hello 브로드캐스트/멀티캐스트 (리액터 타이머)
+    - 수신: 리액터가 소켓을 읽어 _on_datagram 호출
+    reactor를 넘기지 않으면 자체 리액터를 만들어 단독으로 동작
+    """
+    def __init__(self, cfg: PresenceConfig, bus: EventBus, reactor: Optional[Reactor] = None):
         self.cfg = cfg
         self.bus = bus
-        self._stop = threading.Event()
-        self._tx_th: Optional[threading.Thread] = None
-        self._rx_th: Optional[threading.Thread] = None
-
-    def start(self):
-        self._stop.clear()
-        self._tx_th = threading.Thread(target=self._tx_loop, name="presence-tx", daemon=True)
-        self._rx_th = threading.Thread(target=self._rx_loop, name="presence-rx", daemon=True)
-        self._tx_th.start()
-        self._rx_th.start()
-
-    def stop(self):
-        self._stop.set()
-        if self._tx_th: self._tx_th.join(timeout=1.0)
-        if self._rx_th: self._rx_th.join(timeout=1.0)
-
-    def _tx_loop(self):
-        payload = {
+        self._own_reactor = reactor is None
+        self.reactor = reactor or Reactor(name="presence-reactor")
+        self._rx_sock: Optional[socket.socket] = None
+        self._tx_sock: Optional[socket.socket] = None
+        self._tx_timer: Optional[TimerHandle] = None
+        self._payload = json.dumps({
             "type": "hello",
             "room_id": self.cfg.room_id,
             "user_id": self.cfg.user_id,
             "nick": self.cfg.anon_nick,
             "dm": self.cfg.dm_port,   # ← DM 포트 공지
-        }
-        addr = (self.cfg.broadcast_ip, self.cfg.port)
-        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
-            s.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-            s.settimeout(0.5)
-            while not self._stop.is_set():
-                try:
-                    s.sendto(json.dumps(payload).encode("utf-8"), addr)
-                except Exception as e:
-                    print("[presence] tx error:", e)
-                self._stop.wait(self.cfg.interval_sec)
+        }).encode("utf-8")
+
+    def start(self):
+        try:
+            rx = mcast.open_socket(self.cfg, port=self.cfg.port)
+        except OSError as e:
+            log.error("bind error: %s", e)
+            return
+        self._rx_sock = rx
+        self.reactor.add_reader(rx, self._on_datagram, self.cfg.recv_buf, tag="presence")
+
+        self._tx_sock = mcast.open_socket(self.cfg, tx=True)
+        self._tx_timer = self.reactor.call_later(0, self._tx_tick)
+        if self._own_reactor:
+            self.reactor.start()
+
+    def stop(self):
+        if self._tx_timer:
+            self._tx_timer.cancel()
+            self._tx_timer = None
+        if self._rx_sock:
+            self.reactor.remove_reader(self._rx_sock)
+        if self._own_reactor:
+            self.reactor.stop()
+        for s in (self._rx_sock, self._tx_sock):
+            if s:
+                s.close()
+        self._rx_sock = self._tx_sock = None
 
-    def _rx_loop(self):
-        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
-            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            s.bind(("0.0.0.0", self.cfg.port))
-            s.settimeout(0.5)
-            while not self._stop.is_set():
-                try:
-                    data, peer = s.recvfrom(self.cfg.recv_buf)
-                except socket.timeout:
-                    continue
-                except Exception as e:
-                    print("[presence] rx error:", e)
-                    continue
+    def _tx_tick(self):
+        s = self._tx_sock
+        if s is None:
+            return
+        try:
+            s.sendto(self._payload, (mcast.dest_ip(self.cfg), self.cfg.port))
+        except Exception as e:
+            tx_log.warning("tx", "tx error: %s", e)
+        self._tx_timer = self.reactor.call_later(self.cfg.interval_sec, self._tx_tick)
 
-                try:
-                    msg = json.loads(data.decode("utf-8"))
-                except Exception:
-                    continue
+    def _on_datagram(self, data: bytes, peer: tuple):
+        try:
+            msg = json.loads(data)
+        except Exception:
+            return
 
-                if not isinstance(msg, dict): 
-                    continue
-                if msg.get("type") != "hello":
-                    continue
-                if msg.get("room_id") != self.cfg.room_id:
-                    continue
-                from_uid = msg.get("user_id")
-                if not from_uid or from_uid == self.cfg.user_id:
-                    continue
+        if not isinstance(msg, dict):
+            return
+        if msg.get("type") != "hello":
+            return
+        if msg.get("room_id") != self.cfg.room_id:
+            return
+        from_uid = msg.get("user_id")
+        if not from_uid or from_uid == self.cfg.user_id:
+            return
 
-                # peer IP는 소켓에서 받은 주소로 신뢰
-                peer_ip = peer[0]
-                peer_dm = msg.get("dm")
+        # peer IP는 소켓에서 받은 주소로 신뢰
+        peer_ip = peer[0]
+        peer_dm = msg.get("dm")
 
-                self.bus.post("presence_seen",
-                              user_id=from_uid,
-                              anon_nick=msg.get("nick"),
-                              ip=peer_ip,
-                              dm_port=peer_dm)
+        self.bus.post("presence_seen",
+                      user_id=from_uid,
+                      anon_nick=msg.get("nick"),
+                      ip=peer_ip,
+                      dm_port=peer_dm)
@@ -0,0 +1,230 @@
+"""
+수신 리액터 - presence/로비/DM 소켓을 스레드 하나에서 selectors로 처리
+- 소켓마다 FragmentReceiver를 두고, 읽기 가능해지면 would-block까지 연속 수신 후
+  완성된 페이로드를 등록된 핸들러(data, peer)로 전달
+- 타이머(call_later): presence 주기 송신, 로비 gap 만료 등 (같은 스레드에서 실행)
+- 다른 스레드에서의 등록/해제/타이머 추가는 wakeup 소켓쌍으로 select를 즉시 깨움
+  (Windows select는 파이프를 못 쓰므로 os.pipe 대신 socketpair 사용)
+- stop()은 wakeup만 보내면 되므로 타임아웃 대기 없이 바로 종료
+"""
+from __future__ import annotations
+import heapq
+import itertools
+import selectors
+import socket
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+from app.core.log import get_logger, RateLimitedLogger
+from .frag import FragmentReceiver, MAX_DATAGRAM
+
+log = get_logger("reactor")
+err_log = RateLimitedLogger(log)
+
+PayloadHandler = Callable[[bytes, tuple], None]
+
+
+class TimerHandle:
+    __slots__ = ("due", "fn", "cancelled")
+
+    def __init__(self, due: float, fn: Callable[[], None]):
+        self.due = due
+        self.fn = fn
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class _Reader:
+    __slots__ = ("sock", "handler", "receiver", "tag")
+
+    def __init__(self, sock: socket.socket, handler: PayloadHandler, recv_buf: int, tag: str):
+        self.sock = sock
+        self.handler = handler
+        self.receiver = FragmentReceiver(bufsize=recv_buf)
+        self.tag = tag
+
+
+class Reactor:
+    """
+    사용법:
+        reactor = Reactor()
+        reactor.add_reader(sock, handler, tag="lobby")
+        reactor.start()
+        ...
+        reactor.stop()
+    max_batch: 한 소켓에서 연속으로 읽는 최대 데이터그램 수 (다른 소켓 굶김 방지)
+    """
+    def __init__(self, name: str = "net-reactor", max_batch: int = 256):
+        self.name = name
+        self.max_batch = max_batch
+        self._sel = selectors.DefaultSelector()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._sel.register(self._wake_r, selectors.EVENT_READ, None)
+
+        self._lock = threading.Lock()
+        self._timers: list = []          # heap of (due, seq, TimerHandle)
+        self._seq = itertools.count()
+        self._calls: deque = deque()     # 다른 스레드에서 요청한 작업
+        self._running = False
+        self._th: Optional[threading.Thread] = None
+
+    # ---- 수명 ----
+    def start(self):
+        if self._th and self._th.is_alive():
+            return
+        self._running = True
+        self._th = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._th.start()
+
+    def stop(self, timeout: float = 1.0):
+        self._running = False
+        self._wakeup()
+        if self._th and self._th is not threading.current_thread():
+            self._th.join(timeout=timeout)
+        self._th = None
+
+    def close(self):
+        self.stop()
+        for key in list(self._sel.get_map().values()):
+            self._sel.unregister(key.fileobj)
+        self._sel.close()
+        self._wake_r.close()
+        self._wake_w.close()
+
+    def in_reactor_thread(self) -> bool:
+        return self._th is not None and self._th is threading.current_thread()
+
+    # ---- 소켓 등록 ----
+    def add_reader(self, sock: socket.socket, handler: PayloadHandler,
+                   recv_buf: int = MAX_DATAGRAM, tag: str = "net"):
+        """sock을 논블로킹으로 바꾸고 완성 페이로드마다 handler(data, peer) 호출"""
+        sock.setblocking(False)
+        reader = _Reader(sock, handler, recv_buf, tag)
+        self._run_in_loop(lambda: self._sel.register(sock, selectors.EVENT_READ, reader))
+
+    def remove_reader(self, sock: socket.socket):
+        """등록 해제 (리액터가 돌고 있으면 해제가 끝날 때까지 대기 → 이후 close 안전)"""
+        def _unregister():
+            try:
+                self._sel.unregister(sock)
+            except (KeyError, ValueError):
+                pass
+        self._run_in_loop(_unregister, wait=True)
+
+    # ---- 타이머/작업 ----
+    def call_later(self, delay: float, fn: Callable[[], None]) -> TimerHandle:
+        """delay초 뒤 리액터 스레드에서 fn() 실행 (스레드 안전)"""
+        handle = TimerHandle(time.monotonic() + max(0.0, delay), fn)
+        with self._lock:
+            heapq.heappush(self._timers, (handle.due, next(self._seq), handle))
+        if not self.in_reactor_thread():
+            self._wakeup()
+        return handle
+
+    def call_soon(self, fn: Callable[[], None]):
+        """다음 루프에서 리액터 스레드로 fn() 실행 (스레드 안전)"""
+        self._calls.append(fn)
+        if not self.in_reactor_thread():
+            self._wakeup()
+
+    def _run_in_loop(self, fn: Callable[[], None], wait: bool = False):
+        if not self._running or self.in_reactor_thread():
+            fn()
+            return
+        if not wait:
+            self.call_soon(fn)
+            return
+        done = threading.Event()
+
+        def _call():
+            try:
+                fn()
+            finally:
+                done.set()
+        self.call_soon(_call)
+        if not done.wait(1.0):
+            fn()  # 리액터가 응답하지 않으면 직접 처리
+
+    def _wakeup(self):
+        try:
+            self._wake_w.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass  # 버퍼가 찼으면 이미 깨어날 예정
+
+    # ---- 루프 ----
+    def _run(self):
+        while self._running:
+            timeout = self._next_timeout()
+            try:
+                events = self._sel.select(timeout)
+            except OSError as e:
+                log.error("select error: %s", e)
+                time.sleep(0.05)
+                continue
+            for key, _ in events:
+                if key.data is None:
+                    self._drain_wakeup()
+                else:
+                    self._drain_reader(key.data)
+            self._run_calls()
+            self._run_timers()
+
+    def _next_timeout(self) -> Optional[float]:
+        if self._calls:
+            return 0
+        with self._lock:
+            while self._timers and self._timers[0][2].cancelled:
+                heapq.heappop(self._timers)
+            if not self._timers:
+                return None
+            return max(0.0, self._timers[0][0] - time.monotonic())
+
+    def _drain_wakeup(self):
+        try:
+            while self._wake_r.recv(4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+
+    def _drain_reader(self, reader: _Reader):
+        for _ in range(self.max_batch):
+            try:
+                data, peer = reader.receiver.recv(reader.sock)
+            except BlockingIOError:
+                return
+            except OSError as e:
+                err_log.warning(reader.tag, "[%s] rx error: %s", reader.tag, e)
+                return
+            if data is None:
+                continue  # 조각 재조립 중
+            try:
+                reader.handler(data, peer)
+            except Exception as e:
+                err_log.error(reader.tag + ".handler", "[%s] handler error: %s", reader.tag, e)
+
+    def _run_calls(self):
+        while self._calls:
+            fn = self._calls.popleft()
+            try:
+                fn()
+            except Exception as e:
+                log.error("call error: %s", e)
+
+    def _run_timers(self):
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            while self._timers and self._timers[0][0] <= now:
+                due.append(heapq.heappop(self._timers)[2])
+        for handle in due:
+            if handle.cancelled:
+                continue
+            try:
+                handle.fn()
+            except Exception as e:
+                log.error("timer error: %s", e)
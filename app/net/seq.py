@@ -0,0 +1,81 @@
+"""
+송신자별 시퀀스 재정렬 버퍼
+- 로비 메시지는 (from, sess) 단위로 seq가 1씩 증가
+- 순서가 어긋난 메시지는 최대 wait_sec 동안 보류, 빠진 seq가 도착하면 순서대로 방출
+- 대기 시간이 지나도 채워지지 않은 구간은 gap으로 보고하고 보류분을 방출
+  (구간이 MAX_GAP_SPAN보다 길면 최근 MAX_GAP_SPAN개만 보고 - 서버 gap-fill 조회 상한과 같음)
+"""
+from __future__ import annotations
+import time
+from typing import Dict, List, Optional, Tuple
+
+SenderKey = Tuple[str, str]  # (from, sess)
+MAX_GAP_SPAN = 256  # gap-fill 한 번에 조회하는 최대 seq 수
+
+
+class _SenderState:
+    __slots__ = ("next_seq", "pending", "gap_since", "last_seen")
+
+    def __init__(self, next_seq: int, now: float):
+        self.next_seq = next_seq
+        self.pending: Dict[int, dict] = {}
+        self.gap_since: Optional[float] = None
+        self.last_seen = now
+
+
+class ReorderBuffer:
+    def __init__(self, wait_sec: float, idle_sec: float = 600.0):
+        self.wait_sec = wait_sec
+        self.idle_sec = idle_sec
+        self._senders: Dict[SenderKey, _SenderState] = {}
+
+    def push(self, key: SenderKey, seq: int, msg: dict, now: Optional[float] = None) -> List[dict]:
+        """메시지 하나를 넣고, 지금 순서대로 방출 가능한 메시지 목록 반환"""
+        now = time.monotonic() if now is None else now
+        st = self._senders.get(key)
+        if st is None:
+            # 처음 보는 송신자: 지금 seq부터 기준으로 삼음 (중간 참여)
+            st = self._senders[key] = _SenderState(seq, now)
+        st.last_seen = now
+        if seq < st.next_seq or seq in st.pending:
+            return []  # 중복 또는 이미 gap 처리된 늦은 도착
+        st.pending[seq] = msg
+        out = self._drain(st)
+        if st.pending and st.gap_since is None:
+            st.gap_since = now
+        return out
+
+    def _drain(self, st: _SenderState) -> List[dict]:
+        out = []
+        while st.next_seq in st.pending:
+            out.append(st.pending.pop(st.next_seq))
+            st.next_seq += 1
+        if not st.pending:
+            st.gap_since = None
+        return out
+
+    def expire(self, now: Optional[float] = None) -> Tuple[List[dict], List[Tuple[SenderKey, int, int]]]:
+        """
+        대기 시간이 지난 송신자의 보류분을 방출.
+        반환: (방출 메시지, [(key, seq_from, seq_to), ...] 채워지지 않은 구간)
+        """
+        now = time.monotonic() if now is None else now
+        out: List[dict] = []
+        gaps: List[Tuple[SenderKey, int, int]] = []
+        for key, st in list(self._senders.items()):
+            if st.gap_since is not None and now - st.gap_since >= self.wait_sec:
+                while st.pending:
+                    first = min(st.pending)
+                    if first > st.next_seq:
+                        gaps.append((key, max(st.next_seq, first - MAX_GAP_SPAN), first - 1))
+                        st.next_seq = first
+                    out.extend(self._drain(st))
+                st.gap_since = None
+            elif not st.pending and now - st.last_seen > self.idle_sec:
+                del self._senders[key]
+        return out, gaps
+
+    def next_deadline(self) -> Optional[float]:
+        """가장 먼저 만료되는 gap 대기 시각 (monotonic), 없으면 None"""
+        deadlines = [st.gap_since + self.wait_sec for st in self._senders.values() if st.gap_since is not None]
+        return min(deadlines) if deadlines else None
@@ -1,85 +1,290 @@
 """
 서버 연동 클라이언트 - 메시지 히스토리 조회
+- 호출마다 connect/read 타임아웃 적용 (requests는 Session.timeout을 무시함)
+- 연결 오류/타임아웃/5xx는 지터 백오프로 재시도
+- 연속 실패 시 서킷 브레이커가 열려 즉시 실패 처리, 백그라운드에서 /health로 복구 확인
 """
-import json
-import requests
+import random
 import socket
+import threading
+import time
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from dataclasses import dataclass
+from app.core.log import get_logger, RateLimitedLogger
+from .frag import sendto_fragmented
+from .codec import encode_message, DEFAULT_THRESHOLD
+
+log = get_logger("client")
+err_log = RateLimitedLogger(log)
+
+def _requests():
+    """requests 지연 import - 첫 HTTP 요청(백그라운드 스레드)에서 로드해 클라이언트 시작 경로에서 뺌"""
+    import requests
+    return requests
 
 @dataclass
 class ServerConfig:
     host: str = "127.0.0.1"
     http_port: int = 8080
     udp_bridge_port: int = 5002
-    timeout: int = 5
+    timeout: float = 5.0            # read 타임아웃(초)
+    connect_timeout: float = 1.5    # connect 타임아웃(초)
+    retries: int = 2                # 최초 요청 외 재시도 횟수
+    backoff_base: float = 0.2       # 백오프 기준(초) - base * 2^n 범위에서 full jitter
+    backoff_max: float = 2.0
+    breaker_threshold: int = 3      # 연속 실패 몇 번에 서킷을 열지
+    probe_interval: float = 5.0     # 서킷이 열린 동안 /health 확인 주기(초)
+    compress_threshold: int = DEFAULT_THRESHOLD  # UDP 전송 시 압축 임계값(바이트), 0이면 끔
+
+class CircuitOpenError(Exception):
+    """서킷이 열려 있어 요청을 보내지 않음"""
+
+class CircuitBreaker:
+    """
+    연속 실패 카운트 기반 서킷 브레이커.
+    - closed: 요청 허용, 실패가 threshold에 도달하면 open
+    - open: 요청 즉시 거부, probe 스레드가 주기적으로 확인 후 성공하면 closed
+    """
+    def __init__(self, threshold: int, probe_interval: float, probe):
+        self.threshold = threshold
+        self.probe_interval = probe_interval
+        self._probe = probe
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._open = False
+        self._probe_th: Optional[threading.Thread] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._open
+
+    def allow(self) -> bool:
+        return not self._open
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._open = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._open or self._failures < self.threshold:
+                return
+            self._open = True
+            log.warning("서버 응답 없음 - 서킷 열림 (%gs 주기로 확인)", self.probe_interval)
+            self._probe_th = threading.Thread(target=self._probe_loop, name="server-probe", daemon=True)
+            self._probe_th.start()
+
+    def _probe_loop(self):
+        while self._open:
+            time.sleep(self.probe_interval)
+            if self._probe():
+                self.record_success()
+                log.info("서버 복구 확인 - 서킷 닫힘")
+                return
 
 class ServerClient:
     """서버 API 클라이언트"""
-    
+
     def __init__(self, config: ServerConfig):
         self.config = config
         self.base_url = f"http://{config.host}:{config.http_port}"
-        self.session = requests.Session()
-        self.session.timeout = config.timeout
+        self._session = None
+        self._session_lock = threading.Lock()
+        self._timeout = (config.connect_timeout, config.timeout)
+        self.breaker = CircuitBreaker(config.breaker_threshold, config.probe_interval, self._probe_health)
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = _requests().Session()
+        return self._session
 
     def send_message_to_server(self, msg_data: dict):
         """메시지를 서버로 전송 (UDP)"""
         try:
             with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
-                message = json.dumps(msg_data, ensure_ascii=False).encode("utf-8")
-                s.sendto(message, (self.config.host, self.config.udp_bridge_port))
+                message = encode_message(msg_data, self.config.compress_threshold)
+                sendto_fragmented(s, message, (self.config.host, self.config.udp_bridge_port))
         except Exception as e:
-            print(f"[클라이언트] 서버 전송 오류: {e}")
+            err_log.warning("send", "서버 전송 오류: %s", e)
+
+    # --- 공통 요청 경로 ---
+    def _get_json(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        GET 요청 후 JSON 반환.
+        - 서킷이 열려 있으면 CircuitOpenError
+        - 연결 오류/타임아웃/5xx는 재시도, 4xx는 즉시 실패
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError(path)
+        requests = _requests()
+        last_exc: Optional[Exception] = None
+        for attempt in range(self.config.retries + 1):
+            if attempt:
+                cap = min(self.config.backoff_max, self.config.backoff_base * (2 ** attempt))
+                time.sleep(random.uniform(0, cap))
+                if not self.breaker.allow():
+                    break
+            try:
+                response = self.session.get(f"{self.base_url}{path}", params=params, timeout=self._timeout)
+                if response.status_code >= 500:
+                    raise requests.HTTPError(f"{response.status_code} Server Error", response=response)
+                response.raise_for_status()
+                data = response.json()
+            except requests.HTTPError as e:
+                if e.response is not None and e.response.status_code < 500:
+                    self.breaker.record_success()  # 서버는 살아 있음
+                    raise
+                last_exc = e
+                self.breaker.record_failure()
+            except requests.RequestException as e:
+                last_exc = e
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+                return data
+        raise last_exc or CircuitOpenError(path)
 
-    def get_lobby_messages(self, room_id: str = "lobby", limit: int = 50) -> List[Dict[str, Any]]:
-        """로비 메시지 히스토리 조회"""
+    def _post_json(self, path: str, body: Dict[str, Any]) -> Any:
+        """POST 요청 1회 (재시도 없음 - 호출하는 쪽에서 다음 기회에 다시 보냄)"""
+        if not self.breaker.allow():
+            raise CircuitOpenError(path)
+        requests = _requests()
         try:
-            response = self.session.get(f"{self.base_url}/api/messages/lobby", 
-                                      params={"room_id": room_id, "limit": limit})
+            response = self.session.post(f"{self.base_url}{path}", json=body, timeout=self._timeout)
             response.raise_for_status()
-            return response.json().get("messages", [])
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code < 500:
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure()
+            raise
+        except requests.RequestException:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return response.json()
+
+    def _probe_health(self) -> bool:
+        requests = _requests()
+        try:
+            response = self.session.get(f"{self.base_url}/health", timeout=self._timeout)
+            return response.status_code == 200
+        except requests.RequestException:
+            return False
+
+    def get_lobby_messages(self, room_id: str = "lobby", limit: int = 50,
+                           before: Optional[str] = None,
+                           after_id: Optional[int] = None,
+                           before_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        로비 메시지 히스토리 조회 (before: 이 시각 이전 메시지만, after_id: 이 id 이후 메시지만)
+        before_id: 이전 페이지의 가장 오래된 메시지 id (같은 시각 메시지가 페이지 경계에서 빠지지 않음)
+        """
+        params = {"room_id": room_id, "limit": limit}
+        if before:
+            params["before"] = before
+        if before_id is not None:
+            params["before_id"] = before_id
+        if after_id is not None:
+            params["after_id"] = after_id
+        try:
+            return self._get_json("/api/messages/lobby", params).get("messages", [])
+        except CircuitOpenError:
+            return []
         except Exception as e:
-            print(f"[클라이언트] 로비 메시지 조회 오류: {e}")
+            err_log.warning("lobby", "로비 메시지 조회 오류: %s", e)
             return []
 
-    def get_dm_messages(self, user1: str, user2: str, limit: int = 50) -> List[Dict[str, Any]]:
-        """DM 메시지 히스토리 조회"""
+    def get_lobby_messages_by_seq(self, room_id: str, from_uid: str, sess: str,
+                                  seq_from: int, seq_to: int) -> List[Dict[str, Any]]:
+        """송신자 세션의 seq 구간 로비 메시지 조회 (gap-fill)"""
+        params = {"room_id": room_id, "from": from_uid, "sess": sess,
+                  "seq_from": seq_from, "seq_to": seq_to}
         try:
-            response = self.session.get(f"{self.base_url}/api/messages/dm",
-                                      params={"user1": user1, "user2": user2, "limit": limit})
-            response.raise_for_status()
-            return response.json().get("messages", [])
+            return self._get_json("/api/messages/lobby", params).get("messages", [])
+        except CircuitOpenError:
+            return []
         except Exception as e:
-            print(f"[클라이언트] DM 메시지 조회 오류: {e}")
+            err_log.warning("gap", "gap-fill 조회 오류: %s", e)
+            return []
+
+    def get_dm_messages(self, user1: str, user2: str, limit: int = 50,
+                        before: Optional[str] = None,
+                        before_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """DM 메시지 히스토리 조회 (before: 이 시각 이전 메시지만, before_id: get_lobby_messages와 같음)"""
+        params = {"user1": user1, "user2": user2, "limit": limit}
+        if before:
+            params["before"] = before
+        if before_id is not None:
+            params["before_id"] = before_id
+        try:
+            return self._get_json("/api/messages/dm", params).get("messages", [])
+        except CircuitOpenError:
+            return []
+        except Exception as e:
+            err_log.warning("dm", "DM 메시지 조회 오류: %s", e)
             return []
 
     def get_users(self, room_id: str = "lobby") -> List[Dict[str, Any]]:
         """사용자 목록 조회"""
         try:
-            response = self.session.get(f"{self.base_url}/api/users",
-                                      params={"room_id": room_id})
-            response.raise_for_status()
-            return response.json().get("users", [])
+            return self._get_json("/api/users", {"room_id": room_id}).get("users", [])
+        except CircuitOpenError:
+            return []
         except Exception as e:
-            print(f"[클라이언트] 사용자 목록 조회 오류: {e}")
+            err_log.warning("users", "사용자 목록 조회 오류: %s", e)
             return []
 
+    def get_unread(self, user_id: str, room_id: str = "lobby") -> Dict[str, Any]:
+        """안 읽은 수 조회 - {"lobby": N, "dms": [{"peer_id", "unread", "last_timestamp"}], "total": N}"""
+        try:
+            return self._get_json("/api/unread", {"user_id": user_id, "room_id": room_id})
+        except CircuitOpenError:
+            return {}
+        except Exception as e:
+            err_log.warning("unread", "안 읽은 수 조회 오류: %s", e)
+            return {}
+
+    def mark_read(self, user_id: str, room_id: Optional[str] = None,
+                  peer_id: Optional[str] = None) -> bool:
+        """로비(room_id) 또는 DM(peer_id) 대화를 현재까지 읽음으로 표시"""
+        body: Dict[str, Any] = {"user_id": user_id}
+        if peer_id:
+            body["peer_id"] = peer_id
+        else:
+            body["room_id"] = room_id or "lobby"
+        try:
+            self._post_json("/api/read", body)
+            return True
+        except CircuitOpenError:
+            return False
+        except Exception as e:
+            err_log.warning("read", "읽음 표시 오류: %s", e)
+            return False
+
     def get_stats(self) -> Dict[str, Any]:
         """서버 통계 조회"""
         try:
-            response = self.session.get(f"{self.base_url}/api/stats")
-            response.raise_for_status()
-            return response.json()
+            return self._get_json("/api/stats")
+        except CircuitOpenError:
+            return {}
         except Exception as e:
-            print(f"[클라이언트] 통계 조회 오류: {e}")
+            err_log.warning("stats", "통계 조회 오류: %s", e)
             return {}
 
     def is_server_available(self) -> bool:
-        """서버 연결 상태 확인"""
-        try:
-            response = self.session.get(f"{self.base_url}/health")
-            return response.status_code == 200
-        except Exception:
-            return False
\ No newline at end of file
+        """서버 연결 상태 확인 (서킷이 열려 있으면 네트워크 없이 False)"""
+        if not self.breaker.allow():
+            return False
+        ok = self._probe_health()
+        if ok:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+        return ok
@@ -0,0 +1,111 @@
+"""
+룸별 활성 사용자 집합 (메모리) - /api/users를 DB 조회 없이 응답
+- 수집기가 메시지를 저장할 때 touch(user)로 갱신
+- 최근 window_sec 안에 본 사용자만 유지, 조회 시 만료 확인
+- 룸마다 직렬화한 응답 본문(bytes)을 캐시하고 구성원이 바뀔 때(입장/이동/만료)만 다시 만듦
+  → 같은 구성원이면 last_seen 갱신만으로는 캐시를 버리지 않음 (응답의 last_seen은 캐시 생성 시점 값)
+- 구성원이 없는 룸은 캐시/만료 항목을 남기지 않고 공용 빈 본문으로 응답
+  (임의의 room_id 조회나 비어 버린 룸으로 메모리가 늘지 않도록)
+"""
+from __future__ import annotations
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from app.db.models import User
+from . import metrics
+
+EMPTY_RESPONSE = json.dumps({"users": []}, indent=2).encode("utf-8")
+
+class ActiveUserSet:
+    def __init__(self, window_sec: float = 15 * 60):
+        self.window_sec = window_sec
+        self._lock = threading.Lock()
+        self._rooms: Dict[str, Dict[str, list]] = {}   # room -> user_id -> [last_seen, anon_nick, ip, dm_port]
+        self._room_of: Dict[str, str] = {}             # user_id -> room
+        self._cache: Dict[str, bytes] = {}             # room -> 응답 본문
+        self._expires: Dict[str, float] = {}           # room -> 가장 이른 만료 시각 (이 전에는 만료 확인 생략)
+
+    def load(self, users: Iterable[User]):
+        """시작 시 DB의 최근 사용자로 채움"""
+        for user in users:
+            self.touch(user)
+
+    def touch(self, user: User):
+        ts = user.last_seen.timestamp()
+        with self._lock:
+            prev_room = self._room_of.get(user.user_id)
+            if prev_room is not None and prev_room != user.room_id:
+                prev_members = self._rooms.get(prev_room, {})
+                prev_members.pop(user.user_id, None)
+                if not prev_members:
+                    self._rooms.pop(prev_room, None)
+                self._invalidate(prev_room)
+            members = self._rooms.setdefault(user.room_id, {})
+            entry = members.get(user.user_id)
+            if entry is None:
+                members[user.user_id] = [ts, user.anon_nick, user.ip, user.dm_port]
+                self._room_of[user.user_id] = user.room_id
+                self._invalidate(user.room_id)
+            else:
+                entry[0] = max(entry[0], ts)
+                entry[1:] = [user.anon_nick, user.ip, user.dm_port]
+
+    def _invalidate(self, room_id: str):
+        self._cache.pop(room_id, None)
+        self._expires.pop(room_id, None)
+
+    def _expire(self, room_id: str, now: float):
+        if now < self._expires.get(room_id, 0.0):
+            return
+        members = self._rooms.get(room_id)
+        if members is not None:
+            cutoff = now - self.window_sec
+            stale = [uid for uid, e in members.items() if e[0] <= cutoff]
+            for uid in stale:
+                del members[uid]
+                self._room_of.pop(uid, None)
+            if stale:
+                self._cache.pop(room_id, None)
+        if not members:
+            # 마지막 구성원이 만료됐거나 없는 룸: 항목을 모두 버림
+            self._rooms.pop(room_id, None)
+            self._invalidate(room_id)
+            return
+        # touch는 last_seen을 늘리기만 하므로 지금 최솟값 기준 만료 시각은 하한
+        self._expires[room_id] = min(e[0] for e in members.values()) + self.window_sec
+
+    def users(self, room_id: str, now: Optional[float] = None) -> List[dict]:
+        """최근 본 순 사용자 목록 (/api/users 형식)"""
+        with self._lock:
+            self._expire(room_id, now or time.time())
+            members = sorted(self._rooms.get(room_id, {}).items(), key=lambda kv: -kv[1][0])
+            return [{
+                "user_id": uid,
+                "anon_nick": nick,
+                "last_seen": datetime.fromtimestamp(ts).isoformat(),
+                "ip": ip,
+                "dm_port": dm_port,
+                "room_id": room_id
+            } for uid, (ts, nick, ip, dm_port) in members]
+
+    def response(self, room_id: str) -> bytes:
+        """직렬화된 /api/users 응답 본문 (구성원이 그대로면 캐시)"""
+        now = time.time()
+        with self._lock:
+            self._expire(room_id, now)
+            if room_id not in self._rooms:
+                body = EMPTY_RESPONSE
+            else:
+                body = self._cache.get(room_id)
+        metrics.record_cache("users", body is not None)
+        if body is not None:
+            return body
+        body = json.dumps({"users": self.users(room_id, now)}, ensure_ascii=False, indent=2).encode("utf-8")
+        with self._lock:
+            # 만드는 사이에 구성원이 바뀌었으면 캐시하지 않음 (다음 요청에서 다시 만듦)
+            if room_id in self._expires:
+                self._cache[room_id] = body
+        return body
@@ -2,18 +2,33 @@
 중앙 서버 가교 - 메시지 수집 및 DB 저장/조회 서비스
 """
 import json
+import os
 import socket
 import threading
 import time
 from datetime import datetime
 from dataclasses import dataclass
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from http.server import HTTPServer, BaseHTTPRequestHandler
 import urllib.parse
 
 from app.db.database import DatabaseManager
-from app.db.models import Message, MessageType, User, Room
+from app.db.models import Message, MessageType, User, Room, RoomSummary
+from app.db import transfer
+from app.db.conv import lobby_conv, dm_conv
 from app.core.bus import EventBus
+from app.net.frag import FragmentReceiver, Reassembler
+from app.net.codec import decode_message
+from app.net.seq import MAX_GAP_SPAN
+from app.core.log import get_logger, setup_logging, RateLimitedLogger
+from . import metrics, msgjson, rollup
+from .rollup import ActivityRollup
+from .active import ActiveUserSet
+
+log = get_logger("server")
+# 메시지별/오류별 로그는 키별 초당 1건(연속 5건)으로 제한 - 부하 시 출력이 병목이 되지 않도록
+msg_log = RateLimitedLogger(log, rate=1.0, burst=5)
+MAX_TOP_TALKERS = 100  # view=top_talkers limit 상한
 
 @dataclass
 class ServerBridgeConfig:
@@ -21,22 +36,43 @@ class ServerBridgeConfig:
     http_port: int = 8080
     udp_listen_port: int = 5002  # 새로운 포트로 메시지 수집
     host: str = "0.0.0.0"
+    metrics_enabled: bool = True  # GET /metrics (Prometheus 텍스트 형식)
+    import_enabled: bool = False  # POST /api/import (인증이 없으므로 기본 비활성)
+    room_activity_interval: float = 15.0  # 룸별 활성 사용자 수 갱신 주기 (초)
+    rollup_flush_interval: float = 5.0  # 활동 집계를 DB에 반영하는 주기 (초)
+    rollup_minute_retention_hours: float = 48.0  # 분 단위 집계 보존 기간 (이후 시간 단위만)
+    rollup_talker_retention_days: float = 90.0  # 발신자별 시간 단위 집계 보존 기간
+    archive_dir: Optional[str] = None  # 콜드 스토리지 세그먼트 디렉터리 (기본: <db>.archive)
+    archive_block_cache: int = 16  # 세그먼트당 압축 해제해 둘 블록 수
+    active_window_sec: float = 900.0  # /api/users 활성 사용자 기준 (초)
+    http_backlog: int = 128  # HTTP 리슨 소켓 backlog
+    export_batch: int = 1000  # /api/export DB 페이지 크기 (행)
+    export_chunk: int = 64 * 1024  # /api/export 청크 크기 (바이트)
+    import_batch: int = 5000  # /api/import 트랜잭션당 행 수
+
+def _int_or_none(v) -> Optional[int]:
+    """피어가 보낸 seq 등 정수 필드 - 정수가 아니면 None (bool 제외)"""
+    return v if type(v) is int else None
 
 class MessageCollectorService:
     """UDP로 전송되는 메시지를 수집하여 DB에 저장"""
     
-    def __init__(self, config: ServerBridgeConfig, db_manager: DatabaseManager):
+    def __init__(self, config: ServerBridgeConfig, db_manager: DatabaseManager,
+                 active_users: Optional[ActiveUserSet] = None):
         self.config = config
         self.db = db_manager
+        self.active_users = active_users
         self._stop = threading.Event()
         self._thread: Optional[threading.Thread] = None
+        self.reassembler = Reassembler()  # 큰 메시지 조각 재조립
+        self.rollup = ActivityRollup()  # 수집기 스레드에서만 접근
 
     def start(self):
         """서비스 시작"""
         self._stop.clear()
         self._thread = threading.Thread(target=self._udp_listen_loop, name="msg-collector", daemon=True)
         self._thread.start()
-        print(f"[서버] 메시지 수집 서비스 시작 - UDP:{self.config.udp_listen_port}")
+        log.info("메시지 수집 서비스 시작 - UDP:%s", self.config.udp_listen_port)
 
     def stop(self):
         """서비스 중지"""
@@ -50,23 +86,67 @@ class MessageCollectorService:
             s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
             s.bind((self.config.host, self.config.udp_listen_port))
             s.settimeout(0.5)
+            receiver = FragmentReceiver(self.reassembler)
+            next_activity = 0.0
+            next_rollup = time.monotonic() + self.config.rollup_flush_interval
             
             while not self._stop.is_set():
+                if time.monotonic() >= next_activity:
+                    next_activity = time.monotonic() + self.config.room_activity_interval
+                    self._refresh_room_activity()
+                    self._compact_rollups()
+                if time.monotonic() >= next_rollup:
+                    next_rollup = time.monotonic() + self.config.rollup_flush_interval
+                    self._flush_rollups()
                 try:
-                    data, addr = s.recvfrom(16384)
-                    self._process_message(data, addr)
+                    data, addr = receiver.recv(s)
+                    metrics.INGEST_DATAGRAMS.inc()
+                    if data is not None:
+                        self._process_message(data, addr)
                 except socket.timeout:
                     continue
                 except Exception as e:
-                    print(f"[서버] UDP 수신 오류: {e}")
+                    metrics.INGEST_ERRORS.inc(stage="recv")
+                    msg_log.error("recv", "UDP 수신 오류: %s", e)
+            self._flush_rollups()
+
+    def _refresh_room_activity(self):
+        try:
+            with metrics.DB_WRITE_SECONDS.time(op="room_activity"):
+                self.db.refresh_room_activity(self.config.active_window_sec / 60)
+        except Exception as e:
+            metrics.INGEST_ERRORS.inc(stage="room_activity")
+            msg_log.error("room_activity", "룸 활성 사용자 갱신 오류: %s", e)
+
+    def _flush_rollups(self):
+        try:
+            with metrics.DB_WRITE_SECONDS.time(op="rollup_flush"):
+                self.rollup.flush(self.db)
+        except Exception as e:
+            # 카운트는 그대로 남아 다음 주기에 다시 시도
+            metrics.INGEST_ERRORS.inc(stage="rollup")
+            msg_log.error("rollup", "활동 집계 반영 오류: %s", e)
+
+    def _compact_rollups(self):
+        now = time.time()
+        try:
+            with metrics.DB_WRITE_SECONDS.time(op="rollup_compact"):
+                self.db.compact_activity(now - self.config.rollup_minute_retention_hours * 3600,
+                                         now - self.config.rollup_talker_retention_days * 86400)
+        except Exception as e:
+            metrics.INGEST_ERRORS.inc(stage="rollup")
+            msg_log.error("rollup", "활동 집계 정리 오류: %s", e)
 
     def _process_message(self, data: bytes, addr: tuple):
         """수신된 메시지 처리"""
         try:
-            msg_data = json.loads(data.decode("utf-8"))
+            msg_data = decode_message(data)
+            if msg_data is None:
+                metrics.INGEST_DECODE_FAILURES.inc()
+                raise ValueError("잘못된 페이로드")
             self._save_message_to_db(msg_data, addr)
         except Exception as e:
-            print(f"[서버] 메시지 처리 오류: {e}")
+            msg_log.warning("process", "메시지 처리 오류: %s", e, peer=addr[0])
 
     def _save_message_to_db(self, msg_data: dict, addr: tuple):
         """메시지를 DB에 저장"""
@@ -82,11 +162,18 @@ class MessageCollectorService:
                 to_user_id=msg_data.get("to"),  # DM의 경우
                 nick=msg_data.get("nick", ""),
                 text=msg_data.get("text", ""),
-                timestamp=datetime.fromtimestamp(msg_data.get("ts", time.time()))
+                timestamp=datetime.fromtimestamp(msg_data.get("ts", time.time())),
+                seq=_int_or_none(msg_data.get("seq")),
+                sess=msg_data.get("sess")
             )
             
             # DB에 저장
-            self.db.save_message(message)
+            with metrics.DB_WRITE_SECONDS.time(op="save_message"):
+                row_id = self.db.save_message(message)
+            metrics.INGEST_MESSAGES.inc(type=msg_type.value)
+            if row_id:  # msg_id 중복(재전송)으로 무시된 메시지는 집계하지 않음
+                self.rollup.add(message.room_id, msg_type.value, message.from_user_id,
+                                message.timestamp.timestamp())
             
             # 사용자 정보도 업데이트
             user = User(
@@ -96,22 +183,70 @@ class MessageCollectorService:
                 ip=addr[0],
                 room_id=message.room_id
             )
-            self.db.save_user(user)
+            with metrics.DB_WRITE_SECONDS.time(op="save_user"):
+                self.db.save_user(user)
+            if self.active_users is not None:
+                self.active_users.touch(user)
             
-            print(f"[서버] 메시지 저장: {message.nick} -> {message.text[:50]}...")
+            msg_log.debug("stored", "메시지 저장", type=msg_type.value, room=message.room_id,
+                          sender=message.from_user_id, chars=len(message.text))
             
         except Exception as e:
-            print(f"[서버] DB 저장 오류: {e}")
+            metrics.INGEST_ERRORS.inc(stage="store")
+            msg_log.error("store", "DB 저장 오류: %s", e)
 
 class APIHandler(BaseHTTPRequestHandler):
     """HTTP API 핸들러"""
-    
+    # 메트릭 route 라벨 (그 외 경로는 "other"로 묶어 라벨 폭증 방지)
+    ROUTES = {"/api/messages/lobby", "/api/messages/dm", "/api/users", "/api/rooms", "/api/stats",
+              "/api/unread", "/api/read", "/api/export", "/api/import", "/api/analytics",
+              "/health", "/metrics"}
+    metrics_enabled = True
+    import_enabled = False
+    active_users: Optional[ActiveUserSet] = None
+    read_queue = None  # 멀티 프로세스 모드 워커: 읽음 커서 갱신을 수집기 프로세스로 넘기는 큐
+    rollup_minute_retention = 48 * 3600.0  # 분 단위 집계가 남아 있는 기간 (초)
+    active_window_sec = 900.0  # 메모리 집합이 없을 때(워커) DB로 조회하는 활성 사용자 기준 (초)
+    EXPORT_CHUNK = 64 * 1024  # 청크 하나에 모아 보낼 NDJSON 바이트
+    export_batch = 1000
+    import_batch = 5000
+
     def __init__(self, *args, **kwargs):
         # db_manager는 클래스 변수로 설정됨
         super().__init__(*args, **kwargs)
 
+    def handle(self):
+        metrics.HTTP_ACTIVE.inc()
+        try:
+            super().handle()
+        finally:
+            metrics.HTTP_ACTIVE.dec()
+
+    def send_response(self, code, message=None):
+        self._status = code
+        super().send_response(code, message)
+
     def do_GET(self):
         """GET 요청 처리"""
+        self._observe(self._dispatch_get)
+
+    def do_POST(self):
+        """POST 요청 처리"""
+        self._observe(self._dispatch_post)
+
+    def _observe(self, dispatch):
+        t0 = time.perf_counter()
+        self._status = 0
+        self._streaming = False
+        path = urllib.parse.urlparse(self.path).path
+        try:
+            dispatch()
+        finally:
+            route = path if path in self.ROUTES else "other"
+            metrics.HTTP_REQUESTS.inc(route=route, status=self._status)
+            metrics.HTTP_REQUEST_SECONDS.observe(time.perf_counter() - t0, route=route)
+
+    def _dispatch_get(self):
         try:
             parsed_path = urllib.parse.urlparse(self.path)
             path = parsed_path.path
@@ -123,15 +258,48 @@ class APIHandler(BaseHTTPRequestHandler):
                 self._handle_dm_messages(query)
             elif path == "/api/users":
                 self._handle_users(query)
+            elif path == "/api/rooms":
+                self._handle_rooms()
+            elif path == "/api/unread":
+                self._handle_unread(query)
+            elif path == "/api/analytics":
+                self._handle_analytics(query)
             elif path == "/api/stats":
                 self._handle_stats()
+            elif path == "/api/export":
+                self._handle_export(query)
             elif path == "/health":
                 self._send_json_response({"status": "ok"})
+            elif path == "/metrics" and self.metrics_enabled:
+                self._send_metrics()
             else:
                 self._send_error(404, "Not Found")
                 
         except Exception as e:
-            print(f"[서버] API 오류: {e}")
+            self._handle_api_error(e)
+
+    def _dispatch_post(self):
+        try:
+            path = urllib.parse.urlparse(self.path).path
+            if path == "/api/read":
+                self._handle_read()
+            elif path == "/api/import" and self.import_enabled:
+                self._handle_import()
+            else:
+                self._send_error(404, "Not Found")
+        except Exception as e:
+            self._handle_api_error(e)
+
+    def _handle_api_error(self, e: Exception):
+        if isinstance(e, (BrokenPipeError, ConnectionResetError)):
+            msg_log.debug("disconnect", "클라이언트 연결 끊김", path=self.path)
+            self.close_connection = True
+            return
+        msg_log.error("api", "API 오류: %s", e, path=self.path)
+        if self._streaming:
+            # 헤더를 이미 보냈으면 종료 청크 없이 끊어 클라이언트가 잘린 응답임을 알게 함
+            self.close_connection = True
+        else:
             self._send_error(500, "Internal Server Error")
 
     def do_OPTIONS(self):
@@ -140,35 +308,268 @@ class APIHandler(BaseHTTPRequestHandler):
         self.end_headers()
 
     def _handle_lobby_messages(self, query: Dict[str, List[str]]):
-        """로비 메시지 조회"""
+        """로비 메시지 조회 (ts=epoch면 시각을 epoch 초 숫자로)"""
         room_id = query.get("room_id", ["lobby"])[0]
-        limit = int(query.get("limit", ["50"])[0])
+        page = self._parse_page(query)
+        ts_format = self._parse_ts_format(query) if page else None
+        if ts_format is None:
+            return
+        limit, before, before_id = page
+        after_id = query.get("after_id", [""])[0]
+        if after_id and not after_id.isdigit():
+            self._send_error(400, "after_id must be an integer")
+            return
+        seq_from = query.get("seq_from", [""])[0]
         
-        messages = self.db.get_lobby_messages(room_id, limit)
-        messages_data = [self._message_to_dict(msg) for msg in messages]
-        self._send_json_response({"messages": messages_data})
+        if seq_from:
+            # gap-fill: 송신자 세션의 seq 구간 조회
+            from_user = query.get("from", [""])[0]
+            sess = query.get("sess", [""])[0]
+            if not from_user or not sess:
+                self._send_error(400, "from and sess parameters required with seq_from")
+                return
+            try:
+                seq_lo, seq_hi = int(seq_from), int(query.get("seq_to", [seq_from])[0])
+            except ValueError:
+                self._send_error(400, "seq_from and seq_to must be integers")
+                return
+            if not 0 <= seq_hi - seq_lo < MAX_GAP_SPAN:
+                self._send_error(400, f"seq_to must be within seq_from..seq_from+{MAX_GAP_SPAN - 1}")
+                return
+            rows = self.db.get_lobby_rows_by_seq(room_id, from_user, sess, seq_lo, seq_hi)
+        elif after_id:
+            rows = self.db.get_lobby_rows_after(room_id, int(after_id), limit)
+        else:
+            try:
+                rows = self.db.get_lobby_rows(room_id, limit, before, before_id)
+            except ValueError as e:  # 알 수 없는 before_id
+                self._send_error(400, str(e))
+                return
+        # 행 튜플 → JSON 직접 기록 (Message/dict 변환 생략)
+        self._send_json_bytes(msgjson.encode_messages(rows, ts_format))
 
     def _handle_dm_messages(self, query: Dict[str, List[str]]):
-        """DM 메시지 조회"""
+        """DM 메시지 조회 (ts=epoch면 시각을 epoch 초 숫자로)"""
         user1 = query.get("user1", [""])[0]
         user2 = query.get("user2", [""])[0]
-        limit = int(query.get("limit", ["50"])[0])
+        page = self._parse_page(query)
+        ts_format = self._parse_ts_format(query) if page else None
+        if ts_format is None:
+            return
+        limit, before, before_id = page
         
         if not user1 or not user2:
             self._send_error(400, "user1 and user2 parameters required")
             return
             
-        messages = self.db.get_dm_messages(user1, user2, limit)
-        messages_data = [self._message_to_dict(msg) for msg in messages]
-        self._send_json_response({"messages": messages_data})
+        try:
+            rows = self.db.get_dm_rows(user1, user2, limit, before, before_id)
+        except ValueError as e:
+            self._send_error(400, str(e))
+            return
+        self._send_json_bytes(msgjson.encode_messages(rows, ts_format))
+
+    def _parse_page(self, query: Dict[str, List[str]]) -> Optional[Tuple[int, Optional[float], Optional[int]]]:
+        """
+        페이지 파라미터 (limit, before, before_id), 잘못된 값이면 400 응답 후 None
+        before: ISO 문자열 또는 epoch 초, before_id: 이전 페이지의 가장 오래된 메시지 id
+        (before_id를 같이 주면 (timestamp, id) 키셋 커서 - 같은 시각 메시지가 페이지 경계에서 빠지지 않음)
+        """
+        try:
+            limit = int(query.get("limit", ["50"])[0])
+            before = transfer.parse_time(query.get("before", [""])[0])
+            before_id = query.get("before_id", [""])[0]
+            before_id = int(before_id) if before_id else None
+        except ValueError as e:
+            self._send_error(400, str(e))
+            return None
+        if limit < 1:
+            self._send_error(400, "limit must be positive")
+            return None
+        return limit, before, before_id
+
+    def _parse_ts_format(self, query: Dict[str, List[str]]) -> Optional[str]:
+        """ts 파라미터 (iso 기본 / epoch), 잘못된 값이면 400 응답 후 None"""
+        ts_format = query.get("ts", ["iso"])[0]
+        if ts_format not in msgjson.TS_FORMATS:
+            self._send_error(400, f"ts must be one of: {', '.join(msgjson.TS_FORMATS)}")
+            return None
+        return ts_format
 
     def _handle_users(self, query: Dict[str, List[str]]):
         """사용자 목록 조회"""
         room_id = query.get("room_id", ["lobby"])[0]
-        users = self.db.get_room_users(room_id)
+        if self.active_users is not None:
+            # 수집기가 갱신하는 메모리 집합의 직렬화 캐시 (구성원이 바뀔 때만 다시 만듦)
+            self._send_json_bytes(self.active_users.response(room_id))
+            return
+        users = self.db.get_room_users(room_id, self.active_window_sec / 60)
         users_data = [self._user_to_dict(user) for user in users]
         self._send_json_response({"users": users_data})
 
+    def _handle_export(self, query: Dict[str, List[str]]):
+        """
+        메시지 NDJSON 스트리밍 내보내기 (chunked)
+        room_id, since/until(epoch 또는 ISO), type(lobby,dm), after_id(이어받기 커서), limit
+        """
+        try:
+            filters = {
+                "room_id": query.get("room_id", [""])[0] or None,
+                "since": transfer.parse_time(query.get("since", [""])[0]),
+                "until": transfer.parse_time(query.get("until", [""])[0]),
+                "types": transfer.parse_types(query.get("type", [""])[0]),
+                "after_id": int(query.get("after_id", ["0"])[0] or 0),
+                "limit": int(query["limit"][0]) if query.get("limit", [""])[0] else None,
+            }
+            # 스트리밍은 헤더를 먼저 보내므로 범위 오류는 여기서 걸러야 400으로 응답 가능
+            if filters["after_id"] < 0 or (filters["limit"] is not None and filters["limit"] < 0):
+                raise ValueError("limit and after_id must not be negative")
+        except ValueError as e:
+            self._send_error(400, str(e))
+            return
+        rows = self.db.iter_export(batch=self.export_batch, **filters)
+        self._send_ndjson_stream(transfer.encode_line(row) for row in rows)
+
+    def _handle_unread(self, query: Dict[str, List[str]]):
+        """로비 + DM 대화별 안 읽은 수 (클라이언트 시작 시 한 번 호출)"""
+        user_id = query.get("user_id", [""])[0]
+        room_id = query.get("room_id", ["lobby"])[0]
+        if not user_id:
+            self._send_error(400, "user_id parameter required")
+            return
+        self._send_json_response(self.db.get_unread(user_id, room_id))
+
+    def _handle_read(self):
+        """읽음 커서 이동 - {"user_id", "room_id" 또는 "peer_id", "seq"(선택, 없으면 끝까지)}"""
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}") if length <= 65536 else None
+        except ValueError:
+            body = None
+        if not isinstance(body, dict):
+            self._send_error(400, "JSON object body required")
+            return
+        user_id = body.get("user_id")
+        if not user_id or not (body.get("room_id") or body.get("peer_id")):
+            self._send_error(400, "user_id and room_id or peer_id required")
+            return
+        if body.get("peer_id"):
+            conv_id = dm_conv(user_id, body["peer_id"])
+        else:
+            conv_id = lobby_conv(body["room_id"])
+        seq = body.get("seq")
+        if seq is not None and (type(seq) is not int or seq < 0):
+            self._send_error(400, "seq must be a non-negative integer")
+            return
+        if self.read_queue is not None:
+            # 읽기 전용 워커: 결과만 계산해 응답하고 쓰기는 수집기 프로세스가 반영
+            read_seq = self.db.preview_read(user_id, conv_id, seq)
+            if read_seq is not None:
+                self.read_queue.put((user_id, conv_id, read_seq))
+        else:
+            read_seq = self.db.mark_read(user_id, conv_id, seq)
+        self._send_json_response({"conv_id": conv_id, "read_seq": read_seq})
+
+    def _handle_import(self):
+        """NDJSON 본문을 일괄 가져오기 (Content-Length 필요)"""
+        length = self.headers.get("Content-Length")
+        if length is None:
+            self._send_error(411, "Content-Length required")
+            return
+        remaining = int(length)
+
+        def _lines():
+            nonlocal remaining
+            while remaining > 0:
+                line = self.rfile.readline(min(remaining, 1 << 20))
+                if not line:
+                    return
+                remaining -= len(line)
+                yield line
+
+        result = transfer.import_ndjson(self.db, _lines(), batch=self.import_batch)
+        log.info("NDJSON 가져오기: %d건 저장 (중복 %d, 오류 %d)",
+                 result["inserted"], result["duplicates"], result["invalid"])
+        self._send_json_response(result)
+
+    def _send_ndjson_stream(self, lines):
+        """NDJSON 줄을 EXPORT_CHUNK 단위로 모아 chunked 전송 (메모리 사용량 일정)"""
+        self.protocol_version = "HTTP/1.1"  # chunked는 HTTP/1.1 응답에서만 유효
+        self.send_response(200)
+        self._send_cors_headers()
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self._streaming = True
+        self.close_connection = True
+
+        buf = bytearray()
+        for line in lines:
+            buf += line
+            if len(buf) >= self.EXPORT_CHUNK:
+                self._write_chunk(buf)
+                buf.clear()
+        if buf:
+            self._write_chunk(buf)
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(b"%x\r\n" % len(data) + bytes(data) + b"\r\n")
+
+    def _handle_rooms(self):
+        """룸 목록 + 요약"""
+        rooms = self.db.get_rooms()
+        self._send_json_response({"rooms": [self._room_to_dict(room) for room in rooms]})
+
+    def _handle_analytics(self, query: Dict[str, List[str]]):
+        """
+        활동 집계 조회 (집계 테이블만 읽음)
+        - view=series(기본): 메시지 수 시계열 - room_id, type(lobby/dm), since/until, step(초)
+          구간/간격에 따라 분 또는 시간 단위 집계를 골라 step 간격 점으로 (빈 구간은 0)
+        - view=top_talkers: 구간 내 메시지를 많이 보낸 사용자 - room_id, since/until, limit
+        """
+        view = query.get("view", ["series"])[0]
+        room_id = query.get("room_id", [""])[0] or None
+        now = time.time()
+        try:
+            until = transfer.parse_time(query.get("until", [""])[0])
+            until = now if until is None else until
+            since = transfer.parse_time(query.get("since", [""])[0])
+            if since is None:
+                since = until - (3600 if view == "series" else 86400)
+            msg_type = query.get("type", [""])[0] or None
+            if msg_type and msg_type not in transfer.MESSAGE_TYPES:
+                raise ValueError(f"unknown message type: {msg_type}")
+            raw_step = query.get("step", [""])[0]
+            step = int(raw_step) if raw_step else None
+            limit = int(query.get("limit", ["10"])[0])
+            if not 1 <= limit <= MAX_TOP_TALKERS:
+                raise ValueError(f"limit must be between 1 and {MAX_TOP_TALKERS}")
+        except ValueError as e:
+            self._send_error(400, str(e))
+            return
+        if since >= until:
+            self._send_error(400, "since must be before until")
+            return
+
+        if view == "series":
+            resolution, step = rollup.plan_series(since, until, step, self.rollup_minute_retention, now)
+            start = int(since // step) * step
+            counts = dict(self.db.get_activity_series(resolution, start, until, step, room_id, msg_type))
+            points = [[t, counts.get(t, 0)] for t in range(start, int(until), step)]
+            self._send_json_response({"view": view, "resolution": resolution, "step": step,
+                                      "room_id": room_id, "type": msg_type,
+                                      "since": start, "until": until, "points": points})
+        elif view == "top_talkers":
+            start = int(since // rollup.HOUR) * rollup.HOUR
+            talkers = self.db.get_top_talkers(start, until, room_id, limit)
+            self._send_json_response({"view": view, "room_id": room_id, "since": start, "until": until,
+                                      "talkers": [{"user_id": uid, "nick": nick, "messages": n}
+                                                  for uid, nick, n in talkers]})
+        else:
+            self._send_error(400, "view must be one of: series, top_talkers")
+
     def _handle_stats(self):
         """통계 조회"""
         stats = self.db.get_stats()
@@ -185,6 +586,8 @@ class APIHandler(BaseHTTPRequestHandler):
             "to": message.to_user_id,
             "nick": message.nick,
             "text": message.text,
+            "seq": message.seq,
+            "sess": message.sess,
             "timestamp": message.timestamp.isoformat(),
             "created_at": message.created_at.isoformat()
         }
@@ -200,6 +603,22 @@ class APIHandler(BaseHTTPRequestHandler):
             "room_id": user.room_id
         }
 
+    def _room_to_dict(self, room: RoomSummary) -> dict:
+        """RoomSummary 객체를 딕셔너리로 변환"""
+        return {
+            "room_id": room.room_id,
+            "name": room.name,
+            "created_at": room.created_at.isoformat(),
+            "message_count": room.message_count,
+            "active_users": room.active_users,
+            "last_message": {
+                "id": room.last_message_id,
+                "nick": room.last_nick,
+                "text": room.last_text,
+                "timestamp": room.last_timestamp.isoformat()
+            } if room.last_message_id is not None else None
+        }
+
     def _send_json_response(self, data: dict, status: int = 200):
         """JSON 응답 전송"""
         self.send_response(status)
@@ -208,6 +627,24 @@ class APIHandler(BaseHTTPRequestHandler):
         self.end_headers()
         self.wfile.write(json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8"))
 
+    def _send_json_bytes(self, body: bytes, status: int = 200):
+        """이미 직렬화된 JSON 본문 전송"""
+        self.send_response(status)
+        self._send_cors_headers()
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_metrics(self):
+        """Prometheus 텍스트 노출 형식"""
+        body = metrics.REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", metrics.CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
     def _send_cors_headers(self):
         """CORS 헤더 전송"""
         self.send_header("Access-Control-Allow-Origin", "*")
@@ -227,24 +664,59 @@ class APIHandler(BaseHTTPRequestHandler):
         """로그 메시지 오버라이드 (너무 많은 로그 방지)"""
         pass
 
+def configure_handler(config: ServerBridgeConfig, db_manager: DatabaseManager,
+                      active_users: Optional[ActiveUserSet] = None, read_queue=None):
+    """핸들러 클래스에 db_manager와 설정 연결 (멀티 프로세스 모드에서는 워커마다 호출)"""
+    APIHandler.db = db_manager
+    APIHandler.metrics_enabled = config.metrics_enabled
+    APIHandler.import_enabled = config.import_enabled
+    APIHandler.active_users = active_users
+    APIHandler.read_queue = read_queue
+    APIHandler.rollup_minute_retention = config.rollup_minute_retention_hours * 3600
+    APIHandler.active_window_sec = config.active_window_sec
+    APIHandler.EXPORT_CHUNK = config.export_chunk
+    APIHandler.export_batch = config.export_batch
+    APIHandler.import_batch = config.import_batch
+
+def make_http_server(config: ServerBridgeConfig) -> HTTPServer:
+    """backlog를 적용해 바인드한 HTTP 서버 (멀티 프로세스 모드에서는 fork 전에 만들어 워커가 공유)"""
+    server = HTTPServer((config.host, config.http_port), APIHandler, bind_and_activate=False)
+    server.request_queue_size = config.http_backlog
+    try:
+        server.server_bind()
+        server.server_activate()
+    except OSError:
+        server.server_close()
+        raise
+    return server
+
+def db_file_sizes(db_path: str) -> dict:
+    """DB 본 파일 + WAL/SHM 크기 (없는 파일은 생략)"""
+    out = {}
+    for suffix in ("", "-wal", "-shm"):
+        path = db_path + suffix
+        if os.path.exists(path):
+            out[(suffix.lstrip("-") or "db",)] = os.path.getsize(path)
+    return out
+
 class HTTPAPIService:
     """HTTP API 서비스"""
     
-    def __init__(self, config: ServerBridgeConfig, db_manager: DatabaseManager):
+    def __init__(self, config: ServerBridgeConfig, db_manager: DatabaseManager,
+                 active_users: Optional[ActiveUserSet] = None):
         self.config = config
         self.db = db_manager
+        self.active_users = active_users
         self.server: Optional[HTTPServer] = None
         self._thread: Optional[threading.Thread] = None
 
     def start(self):
         """서비스 시작"""
-        # 핸들러 클래스에 db_manager 연결
-        APIHandler.db = self.db
-        
-        self.server = HTTPServer((self.config.host, self.config.http_port), APIHandler)
+        configure_handler(self.config, self.db, self.active_users)
+        self.server = make_http_server(self.config)
         self._thread = threading.Thread(target=self.server.serve_forever, name="http-api", daemon=True)
         self._thread.start()
-        print(f"[서버] HTTP API 서비스 시작 - http://{self.config.host}:{self.config.http_port}")
+        log.info("HTTP API 서비스 시작 - http://%s:%s", self.config.host, self.config.http_port)
 
     def stop(self):
         """서비스 중지"""
@@ -259,13 +731,18 @@ class ServerBridge:
     
     def __init__(self, config: ServerBridgeConfig):
         self.config = config
-        self.db = DatabaseManager(config.db_path)
-        self.collector = MessageCollectorService(config, self.db)
-        self.api_service = HTTPAPIService(config, self.db)
+        self.db = DatabaseManager(config.db_path, config.archive_dir,
+                                  archive_block_cache=config.archive_block_cache)
+        self.active_users = ActiveUserSet(config.active_window_sec)
+        self.active_users.load(self.db.get_active_users(config.active_window_sec / 60))
+        self.collector = MessageCollectorService(config, self.db, self.active_users)
+        self.api_service = HTTPAPIService(config, self.db, self.active_users)
+        metrics.DB_FILE_BYTES.set_function(lambda: db_file_sizes(config.db_path))
+        metrics.REASSEMBLY.set_function(lambda: dict(self.collector.reassembler.stats))
 
     def start(self):
         """서버 시작"""
-        print("[서버] TipOff 서버 브리지 시작")
+        log.info("TipOff 서버 브리지 시작")
         
         # 기본 룸 생성
         default_room = Room(room_id="lobby", name="로비")
@@ -275,20 +752,25 @@ class ServerBridge:
         self.collector.start()
         self.api_service.start()
         
-        print(f"[서버] 메시지 수집: UDP {self.config.udp_listen_port}")
-        print(f"[서버] API 서비스: HTTP {self.config.http_port}")
+        log.info("메시지 수집: UDP %s, API 서비스: HTTP %s", self.config.udp_listen_port, self.config.http_port)
 
     def stop(self):
         """서버 중지"""
-        print("[서버] 서버 중지 중...")
+        log.info("서버 중지 중...")
         self.collector.stop()
         self.api_service.stop()
-        print("[서버] 서버 중지 완료")
+        log.info("서버 중지 완료")
 
     def cleanup_old_data(self, days: int = 30):
         """오래된 데이터 정리"""
         self.db.cleanup_old_data(days)
-        print(f"[서버] {days}일 이상 된 데이터 정리 완료")
+        log.info("%d일 이상 된 데이터 정리 완료", days)
+
+    def archive_old_messages(self, days: float = 180):
+        """오래된 메시지를 콜드 스토리지로 이동"""
+        result = self.db.archive_older_than(days)
+        log.info("%g일 이전 메시지 %d건 아카이브", days, result["rows"])
+        return result
 
     def get_stats(self) -> dict:
         """서버 통계 조회"""
@@ -296,12 +778,13 @@ class ServerBridge:
 
 def main():
     """서버 단독 실행용"""
+    setup_logging(os.environ.get("LOG_LEVEL", "INFO"))
     config = ServerBridgeConfig()
     server = ServerBridge(config)
     
     try:
         server.start()
-        print("[서버] 서버가 실행 중입니다. Ctrl+C로 종료하세요.")
+        log.info("서버가 실행 중입니다. Ctrl+C로 종료하세요.")
         while True:
             time.sleep(1)
     except KeyboardInterrupt:
@@ -0,0 +1,241 @@
+"""
+서버 메트릭 - Prometheus 텍스트 노출 형식 (의존성 없이 직접 구현)
+- Counter / Gauge / Histogram, 라벨 지원, 스레드 안전
+- Gauge.set_function(): 스크레이프 시점에 값을 계산 (DB 파일 크기 등)
+- REGISTRY.render()가 /metrics 응답 본문
+
+    INGEST_DATAGRAMS.inc()
+    with DB_WRITE_SECONDS.time(op="save_message"):
+        db.save_message(m)
+"""
+from __future__ import annotations
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 밀리초~초 단위 지연용 기본 버킷 (초)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _escape(v: str) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt_value(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    if float(v).is_integer():
+        return str(int(v))
+    return repr(float(v))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines += self._samples()
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_fmt_labels(self.labelnames, k)} {_fmt_value(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._fn: Optional[Callable[[], object]] = None
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, fn: Callable[[], object]):
+        """
+        스크레이프 시 fn() 호출. 라벨 없는 게이지는 숫자,
+        라벨 있는 게이지는 {라벨값 튜플 또는 단일 값: 숫자} dict 반환
+        """
+        self._fn = fn
+
+    def _samples(self) -> List[str]:
+        if self._fn is not None:
+            try:
+                result = self._fn()
+            except Exception:
+                result = None
+            if isinstance(result, dict):
+                values = {(k if isinstance(k, tuple) else (str(k),)): float(v) for k, v in result.items()}
+            elif result is not None:
+                values = {(): float(result)}
+            else:
+                values = {}
+        else:
+            with self._lock:
+                values = dict(self._values)
+        return [f"{self.name}{_fmt_labels(self.labelnames, k)} {_fmt_value(v)}"
+                for k, v in sorted(values.items())]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._counts: Dict[Tuple[str, ...], List[int]] = {}
+        self._sums: Dict[Tuple[str, ...], float] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * len(self.buckets)
+                self._sums[key] = 0.0
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._sums[key] += value
+
+    @contextmanager
+    def time(self, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(c), self._sums[k]) for k, c in self._counts.items())
+        lines = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, c in zip(self.buckets, counts):
+                cumulative += c
+                le = 'le="' + _fmt_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _fmt_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_fmt_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(m.render() for m in self._metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+# === 수집 (UDP) ===
+INGEST_DATAGRAMS = REGISTRY.register(Counter(
+    "tipoff_ingest_datagrams_total", "UDP datagrams received by the message collector"))
+INGEST_MESSAGES = REGISTRY.register(Counter(
+    "tipoff_ingest_messages_total", "Messages decoded and stored", ["type"]))
+INGEST_DECODE_FAILURES = REGISTRY.register(Counter(
+    "tipoff_ingest_decode_failures_total", "Payloads that failed to decode"))
+INGEST_ERRORS = REGISTRY.register(Counter(
+    "tipoff_ingest_errors_total", "Receive or store errors in the collector", ["stage"]))
+REASSEMBLY = REGISTRY.register(Gauge(
+    "tipoff_reassembly_fragments", "Fragment reassembler counters", ["kind"]))
+
+# === DB ===
+DB_WRITE_SECONDS = REGISTRY.register(Histogram(
+    "tipoff_db_write_seconds", "DB write latency", ["op"]))
+DB_FILE_BYTES = REGISTRY.register(Gauge(
+    "tipoff_db_file_bytes", "SQLite database size on disk including WAL", ["file"]))
+
+# === HTTP API ===
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "tipoff_http_requests_total", "HTTP API requests", ["route", "status"]))
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "tipoff_http_request_seconds", "HTTP API request latency", ["route"]))
+HTTP_ACTIVE = REGISTRY.register(Gauge(
+    "tipoff_http_active_connections", "HTTP connections currently being handled"))
+
+# === 캐시 ===
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    "tipoff_cache_requests_total", "Server cache lookups", ["cache", "result"]))
+CACHE_HIT_RATIO = REGISTRY.register(Gauge(
+    "tipoff_cache_hit_ratio", "Cache hit ratio since start", ["cache"]))
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def _cache_ratios() -> dict:
+    with CACHE_REQUESTS._lock:
+        items = dict(CACHE_REQUESTS._values)
+    caches = {k[0] for k in items}
+    out = {}
+    for cache in caches:
+        hits = items.get((cache, "hit"), 0.0)
+        total = hits + items.get((cache, "miss"), 0.0)
+        out[(cache,)] = hits / total if total else 0.0
+    return out
+
+
+CACHE_HIT_RATIO.set_function(_cache_ratios)
@@ -0,0 +1,48 @@
+"""
+메시지 행 튜플 → JSON 응답 본문 직접 기록 (히스토리 API)
+- DB 행(transfer.EXPORT_COLUMNS 순서 튜플)을 Message/dict 객체 없이 바로 문자열로 만듦
+- 키와 값 형식은 APIHandler._message_to_dict와 같음, 공백 없는 compact JSON
+- 시각 형식: "iso"(기본, 기존 응답과 같음) 또는 "epoch"(float 초 그대로 - 변환 비용 없음)
+"""
+import json
+from datetime import datetime
+from json.encoder import encode_basestring  # C 구현 (ensure_ascii=False 출력과 같음)
+from typing import Iterable, Sequence
+
+TS_FORMATS = ("iso", "epoch")
+
+_ROW = ('{"id":%d,"msg_id":%s,"room_id":%s,"type":%s,"from":%s,"to":%s,'
+        '"nick":%s,"text":%s,"seq":%s,"sess":%s,"timestamp":%s,"created_at":%s}')
+
+
+def _seq(seq) -> str:
+    # seq는 INTEGER 컬럼이지만 예전 수집기/가져오기로 정수가 아닌 값이 저장됐을 수 있음
+    if type(seq) is int:
+        return "%d" % seq
+    return "null" if seq is None else json.dumps(seq, ensure_ascii=False)
+
+
+def _epoch(ts) -> str:
+    return repr(float(ts))
+
+
+def _iso(ts) -> str:
+    return '"' + datetime.fromtimestamp(ts).isoformat() + '"'
+
+
+def encode_messages(rows: Iterable[Sequence], ts_format: str = "iso") -> bytes:
+    """{"messages": [...]} 본문 (rows는 EXPORT_COLUMNS 순서)"""
+    fmt_ts = _epoch if ts_format == "epoch" else _iso
+    s = encode_basestring
+    parts = [
+        _ROW % (
+            mid, s(msg_id), s(room), s(mtype), s(frm),
+            "null" if to is None else s(to),
+            s(nick), s(text),
+            _seq(seq),
+            "null" if sess is None else s(sess),
+            fmt_ts(ts), fmt_ts(created),
+        )
+        for mid, msg_id, room, mtype, frm, to, nick, text, seq, sess, ts, created in rows
+    ]
+    return ('{"messages":[' + ",".join(parts) + "]}").encode("utf-8")
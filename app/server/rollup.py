@@ -0,0 +1,63 @@
+"""
+활동 집계 (분/시 단위) - 수집기가 메시지마다 DB에 쓰지 않고 메모리에 모았다가 주기적으로 더함
+- ActivityRollup: 수집기 스레드 전용 카운터. flush 주기마다 DatabaseManager.add_activity()로
+  한 트랜잭션에 upsert (실패하면 카운트를 버리지 않고 다음 주기에 다시 시도)
+- 분 단위는 보존 기간(기본 48시간)이 지나면 삭제 → 오래된 구간은 시간 단위로만 남음 (다운샘플링)
+- plan_series(): 요청 구간/간격에 맞춰 분/시 테이블과 버킷 간격 선택 (응답 점 수 MAX_POINTS 이하)
+"""
+import math
+from collections import Counter
+from typing import Optional, Tuple
+
+MINUTE = 60
+HOUR = 3600
+MAX_POINTS = 720
+
+
+class ActivityRollup:
+    def __init__(self):
+        self._minute: Counter = Counter()   # (bucket, room_id, message_type) -> 메시지 수
+        self._hour: Counter = Counter()     # (bucket, room_id, message_type) -> 메시지 수
+        self._talkers: Counter = Counter()  # (bucket, room_id, user_id) -> 메시지 수
+
+    def add(self, room_id: str, message_type: str, user_id: str, ts: float):
+        minute = int(ts // MINUTE) * MINUTE
+        hour = int(ts // HOUR) * HOUR
+        self._minute[(minute, room_id, message_type)] += 1
+        self._hour[(hour, room_id, message_type)] += 1
+        self._talkers[(hour, room_id, user_id)] += 1
+
+    def pending(self) -> int:
+        return sum(self._minute.values())
+
+    def flush(self, db) -> int:
+        """모은 카운트를 DB에 더하고 비움, 반영한 메시지 수 반환"""
+        if not self._minute:
+            return 0
+        n = self.pending()
+        db.add_activity(
+            [k + (v,) for k, v in self._minute.items()],
+            [k + (v,) for k, v in self._hour.items()],
+            [k + (v,) for k, v in self._talkers.items()],
+        )
+        self._minute.clear()
+        self._hour.clear()
+        self._talkers.clear()
+        return n
+
+
+def plan_series(since: float, until: float, step: Optional[int], minute_retention: float,
+                now: float) -> Tuple[str, int]:
+    """
+    (resolution, step) 선택.
+    분 단위 보존 기간보다 오래된 구간이 포함되거나 요청 간격이 1시간 이상이면 시간 단위 테이블.
+    간격은 해상도의 배수로 올리고, 점이 MAX_POINTS를 넘으면 더 넓힘.
+    """
+    minute_ok = since >= now - minute_retention and (step or MINUTE) < HOUR
+    resolution, base = ("minute", MINUTE) if minute_ok else ("hour", HOUR)
+    step = max(step or base, base)
+    step = -(-step // base) * base
+    span = max(until - since, 0)
+    if span / step > MAX_POINTS:
+        step = -(-math.ceil(span / MAX_POINTS) // base) * base
+    return resolution, step
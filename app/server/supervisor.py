@@ -0,0 +1,281 @@
+"""
+멀티 프로세스 운영 모드 - 수집기(쓰기) 프로세스 1개 + pre-fork HTTP API 워커 N개
+- 시작 시 슈퍼바이저가 마이그레이션 + WAL 전환을 끝내고 HTTP 리슨 소켓을 만든 뒤 fork
+  → 워커는 같은 리슨 소켓에서 accept (커널이 연결을 분배), GIL을 나눠 쓰지 않음
+- 수집기 프로세스: UDP 수집, 활동 집계, 룸 활성 갱신 + 워커가 넘긴 읽음 커서 반영 (유일한 쓰기 주체)
+- 워커: DB를 읽기 전용(mode=ro)으로 열어 조회만, /api/read는 결과만 계산하고 쓰기는 수집기로 넘김
+  메모리 활성 사용자 집합은 수집기 프로세스에만 있으므로 /api/users는 DB 조회로 응답
+  /api/import는 비활성 (대량 쓰기는 run_server.py import 사용), /metrics는 응답한 워커 기준
+- 수집/DB 쓰기 메트릭(tipoff_ingest_*, tipoff_db_write_seconds, 재조립)은 수집기 프로세스에만 있으므로
+  수집기가 별도 포트(collector_metrics_port)에서 /metrics를 노출 → 스크레이프 대상에 워커와 함께 추가
+- 죽은 프로세스는 restart_backoff 후 다시 띄움 (금방 다시 죽으면 간격을 2배씩, 최대 restart_backoff_max)
+- SIGTERM/SIGINT: 자식에게 SIGTERM → shutdown_timeout 안에 안 끝나면 SIGKILL
+
+    python run_server.py --workers 4
+"""
+import json
+import multiprocessing
+import select
+import signal
+import socket
+import threading
+import time
+from dataclasses import dataclass, replace
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Callable, Dict, Optional
+
+from app.db.database import DatabaseManager
+from app.db.models import Room
+from app.core.log import get_logger, shutdown_logging, RateLimitedLogger
+from . import metrics
+from .bridge import (ServerBridgeConfig, MessageCollectorService, configure_handler,
+                     make_http_server, db_file_sizes)
+
+log = get_logger("supervisor")
+read_log = RateLimitedLogger(log)
+
+# 워커를 fork로 띄워야 리슨 소켓/설정을 그대로 물려받음
+_mp = multiprocessing.get_context("fork")
+
+
+@dataclass
+class SupervisorConfig:
+    workers: int = 0  # API 워커 프로세스 수 (0이면 단일 프로세스 - 스레드 모드)
+    restart_backoff: float = 0.5  # 죽은 프로세스 재시작 대기 (초)
+    restart_backoff_max: float = 30.0  # 연속 재시작 시 최대 대기 (초)
+    stable_after: float = 10.0  # 이만큼 살아 있었으면 재시작 대기를 초기화 (초)
+    shutdown_timeout: float = 5.0  # 종료 시 자식 대기 (초)
+    collector_metrics_port: int = 9091  # 수집기 프로세스 /metrics 포트 (0이면 비활성)
+
+
+def _child_signals(on_term: Callable[[], None]):
+    # Ctrl+C는 프로세스 그룹 전체에 가므로 자식은 무시하고 슈퍼바이저의 SIGTERM만 따름
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *_: on_term())
+
+
+class ReadCursorChannel:
+    """
+    워커 → 수집기 읽음 커서 전달 (슈퍼바이저가 만든 유닉스 datagram 소켓 쌍을 자식이 물려받음)
+    - multiprocessing.Queue와 달리 공유 잠금이 없어 수집기가 강제 종료돼도 다음 수집기가 이어서 읽음
+    - 아직 읽지 않은 항목은 소켓 버퍼에 남아 재시작한 수집기가 반영
+    - 버퍼가 가득 차면(수집기가 오래 멈춤) 워커를 막지 않고 버림 - 커서는 다음 /api/read에서 다시 전진
+    """
+    def __init__(self):
+        self._recv, self._send = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+
+    def put(self, item):
+        try:
+            self._send.send(json.dumps(item).encode(), socket.MSG_DONTWAIT)
+        except OSError as e:
+            read_log.warning("send", "읽음 커서 전달 실패 (버림): %s", e)
+
+    def get(self, timeout: float):
+        """항목 하나 (timeout 동안 없으면 None)"""
+        r, _, _ = select.select([self._recv], [], [], timeout)
+        if not r:
+            return None
+        try:
+            return json.loads(self._recv.recv(65536))
+        except (BlockingIOError, ValueError):
+            return None
+
+    def close(self):
+        self._recv.close()
+        self._send.close()
+
+
+def _drain_reads(db: DatabaseManager, channel: ReadCursorChannel, stop: threading.Event):
+    """워커가 넘긴 읽음 커서 갱신 (user_id, conv_id, read_seq) 반영"""
+    while not stop.is_set():
+        item = channel.get(timeout=0.5)
+        if item is None:
+            continue
+        try:
+            db.mark_read(*item)
+        except Exception as e:
+            read_log.error("apply", "읽음 커서 반영 오류: %s", e)
+
+
+class _CollectorMetricsHandler(BaseHTTPRequestHandler):
+    """수집기 프로세스 전용 - GET /metrics만 응답"""
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", metrics.CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _start_metrics_server(host: str, port: int) -> Optional[HTTPServer]:
+    """수집기 /metrics 리스너 (포트를 못 열면 경고만 하고 수집은 계속)"""
+    try:
+        server = HTTPServer((host, port), _CollectorMetricsHandler)
+    except OSError as e:
+        log.warning("수집기 메트릭 포트 %s 열기 실패: %s", port, e)
+        return None
+    threading.Thread(target=server.serve_forever, name="collector-metrics", daemon=True).start()
+    log.info("수집기 메트릭: HTTP %s:%s/metrics", host, port)
+    return server
+
+
+def run_collector(config: ServerBridgeConfig, read_queue: ReadCursorChannel, metrics_port: int = 0):
+    """수집기(쓰기) 프로세스 본체"""
+    stop = threading.Event()
+    _child_signals(stop.set)
+    db = DatabaseManager(config.db_path, config.archive_dir,
+                         archive_block_cache=config.archive_block_cache)
+    collector = MessageCollectorService(config, db)
+    metrics_server = None
+    if config.metrics_enabled and metrics_port:
+        metrics.DB_FILE_BYTES.set_function(lambda: db_file_sizes(config.db_path))
+        metrics.REASSEMBLY.set_function(lambda: dict(collector.reassembler.stats))
+        metrics_server = _start_metrics_server(config.host, metrics_port)
+    collector.start()
+    drain = threading.Thread(target=_drain_reads, args=(db, read_queue, stop), name="read-cursors", daemon=True)
+    drain.start()
+    stop.wait()
+    collector.stop()  # 남은 활동 집계 반영
+    drain.join(timeout=1.0)
+    if metrics_server is not None:
+        metrics_server.shutdown()
+        metrics_server.server_close()
+    log.info("수집기 프로세스 종료")
+    shutdown_logging()
+
+
+def run_worker(config: ServerBridgeConfig, server, read_queue: ReadCursorChannel):
+    """API 워커 본체 - 상속받은 리슨 소켓으로 서비스"""
+    _child_signals(lambda: threading.Thread(target=server.shutdown, daemon=True).start())
+    db = DatabaseManager(config.db_path, config.archive_dir, read_only=True,
+                         archive_block_cache=config.archive_block_cache)
+    metrics.DB_FILE_BYTES.set_function(lambda: db_file_sizes(config.db_path))
+    configure_handler(config, db, read_queue=read_queue)
+    server.serve_forever()
+    server.server_close()
+    shutdown_logging()
+
+
+class _Slot:
+    """감시 대상 프로세스 하나 (이름, 띄우는 함수, 재시작 대기)"""
+    def __init__(self, name: str, spawn: Callable[[], multiprocessing.Process], backoff: float):
+        self.name = name
+        self.spawn = spawn
+        self.proc: Optional[multiprocessing.Process] = None
+        self.started = 0.0
+        self.backoff = backoff
+        self.restart_at = 0.0
+        self.restarts = 0
+
+
+class Supervisor:
+    def __init__(self, config: ServerBridgeConfig, sup: SupervisorConfig):
+        if config.import_enabled:
+            log.warning("멀티 프로세스 모드에서는 /api/import를 지원하지 않음 (run_server.py import 사용)")
+        self.config = replace(config, import_enabled=False)
+        self.sup = sup
+        self._stop = threading.Event()
+        self._slots: Dict[str, _Slot] = {}
+        self.server = None
+        self.read_queue = None
+
+    def prepare(self):
+        """fork 전 준비: 마이그레이션, WAL 전환, 기본 룸, 리슨 소켓"""
+        db = DatabaseManager(self.config.db_path, self.config.archive_dir)
+        mode = db.enable_wal()
+        if mode.lower() != "wal":
+            raise RuntimeError(f"WAL 모드 전환 실패 (journal_mode={mode})")
+        db.save_room(Room(room_id="lobby", name="로비"))
+        self.server = make_http_server(self.config)
+        # 여러 워커가 같은 소켓을 기다리므로 accept를 놓친 워커가 다음 연결까지 막히지 않도록
+        self.server.socket.setblocking(False)
+        self.read_queue = ReadCursorChannel()
+
+    def _spawn(self, name: str, target, args) -> Callable[[], multiprocessing.Process]:
+        def _start():
+            p = _mp.Process(target=target, args=args, name=name, daemon=False)
+            p.start()
+            return p
+        return _start
+
+    def start(self):
+        self.prepare()
+        self._slots["collector"] = _Slot(
+            "collector", self._spawn("tipoff-collector", run_collector,
+                                     (self.config, self.read_queue, self.sup.collector_metrics_port)),
+            self.sup.restart_backoff)
+        for i in range(self.sup.workers):
+            name = f"worker-{i}"
+            self._slots[name] = _Slot(
+                name, self._spawn(f"tipoff-{name}", run_worker, (self.config, self.server, self.read_queue)),
+                self.sup.restart_backoff)
+        for slot in self._slots.values():
+            self._launch(slot)
+        log.info("멀티 프로세스 모드 시작 - 수집기 1 + API 워커 %d, HTTP %s:%s, UDP %s",
+                 self.sup.workers, self.config.host, self.config.http_port, self.config.udp_listen_port)
+
+    def _launch(self, slot: _Slot):
+        slot.proc = slot.spawn()
+        slot.started = time.monotonic()
+        log.info("%s 시작 (pid %s, 재시작 %d회)", slot.name, slot.proc.pid, slot.restarts)
+
+    def _check(self, slot: _Slot, now: float):
+        if slot.proc is not None:
+            if slot.proc.is_alive():
+                return
+            code = slot.proc.exitcode
+            slot.proc.join()
+            slot.proc = None
+            # 금방 죽었으면 재시작 간격을 늘림 (시작하자마자 죽는 설정 오류에서 fork 폭주 방지)
+            if now - slot.started >= self.sup.stable_after:
+                slot.backoff = self.sup.restart_backoff
+            slot.restart_at = now + slot.backoff
+            log.error("%s 비정상 종료 (exitcode %s) - %.1f초 후 재시작", slot.name, code, slot.backoff)
+            slot.backoff = min(slot.backoff * 2, self.sup.restart_backoff_max)
+        elif now >= slot.restart_at:
+            slot.restarts += 1
+            self._launch(slot)
+
+    def run(self):
+        """자식 감시 루프 (stop()이나 SIGTERM/SIGINT까지)"""
+        while not self._stop.wait(0.2):
+            now = time.monotonic()
+            for slot in self._slots.values():
+                self._check(slot, now)
+        self._shutdown()
+
+    def stop(self):
+        self._stop.set()
+
+    def _shutdown(self):
+        procs = [s.proc for s in self._slots.values() if s.proc is not None and s.proc.is_alive()]
+        for p in procs:
+            p.terminate()
+        deadline = time.monotonic() + self.sup.shutdown_timeout
+        for p in procs:
+            p.join(max(0.0, deadline - time.monotonic()))
+            if p.is_alive():
+                log.warning("%s 종료 시간 초과 - 강제 종료", p.name)
+                p.kill()
+                p.join()
+        if self.server is not None:
+            self.server.server_close()
+        if self.read_queue is not None:
+            self.read_queue.close()
+        log.info("멀티 프로세스 모드 종료")
+
+
+def serve_multiprocess(config: ServerBridgeConfig, sup: SupervisorConfig):
+    """슈퍼바이저 실행 (메인 스레드에서 호출, SIGTERM/SIGINT로 종료)"""
+    supervisor = Supervisor(config, sup)
+    signal.signal(signal.SIGTERM, lambda *_: supervisor.stop())
+    signal.signal(signal.SIGINT, lambda *_: supervisor.stop())
+    supervisor.start()
+    supervisor.run()
@@ -1,7 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime
-from typing import Optional, Dict, Any, Callable
+from typing import Optional, Dict, Any, Callable, List
 from app.core.state import AppState
 
 class MainWindow:
@@ -11,14 +11,22 @@ class MainWindow:
     - 메시지 렌더: [시간] [이름] [채팅] 모두 좌측 정렬
       * Lobby: 이름=내 anon 닉(내 메시지), 상대 anon 닉(수신)
       * DM: 이름="me"(내 메시지), "@상대ID"(수신)
+    - 안 읽은 수는 탭 제목 배지로 표시 ("Lobby (3)"), 탭을 보면 지우고 read_cb 호출
     """
     def __init__(self, root: tk.Tk, state: AppState,
                  send_lobby_cb: Callable[[str], None],
-                 send_dm_cb: Callable[[str, str], None]):
+                 send_dm_cb: Callable[[str, str], None],
+                 dm_open_cb: Optional[Callable[[str], None]] = None,
+                 dm_scroll_top_cb: Optional[Callable[[str], None]] = None,
+                 read_cb: Optional[Callable[[Optional[str]], None]] = None):
         self.root = root
         self.state = state
         self.send_lobby_cb = send_lobby_cb
         self.send_dm_cb = send_dm_cb
+        self.dm_open_cb = dm_open_cb              # DM 탭 생성 시 (히스토리 지연 로드)
+        self.dm_scroll_top_cb = dm_scroll_top_cb  # DM 탭 맨 위 도달 시 (이전 페이지)
+        self.read_cb = read_cb                    # 탭을 봤을 때 (서버 읽음 커서 이동)
+        self.unread: Dict[Optional[str], int] = {}
 
         self.state.upsert_self()
 
@@ -75,23 +83,32 @@ class MainWindow:
         self.refresh_roster()
 
     # ---------- 탭 유틸 ----------
-    def _ensure_tab(self, target: Optional[str], title: Optional[str] = None):
+    def _ensure_tab(self, target: Optional[str], title: Optional[str] = None, select: bool = True):
         if target in self.chat_tabs:
             idx = self._index_of_tab(target)
-            if idx is not None: self.nb.select(idx)
+            if idx is not None and select: self.nb.select(idx)
             return
         frame = ttk.Frame(self.nb)
-        self.nb.add(frame, text=(title or (f"@{target}" if target else "Lobby")))
-        self.nb.select(self.nb.index("end") - 1)
+        self.nb.add(frame, text=(title or self._tab_title(target)))
+        if select: self.nb.select(self.nb.index("end") - 1)
         canvas = tk.Canvas(frame, highlightthickness=0)
         scrollbar = ttk.Scrollbar(frame, orient="vertical", command=canvas.yview)
         msg_frame = ttk.Frame(canvas)
         msg_frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
         canvas.create_window((0,0), window=msg_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
+        canvas.configure(yscrollcommand=lambda first, last: self._on_yscroll(target, scrollbar, first, last))
         canvas.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
-        self.chat_tabs[target] = {"frame": frame, "canvas": canvas, "msg_frame": msg_frame, "scrollbar": scrollbar}
+        self.chat_tabs[target] = {"frame": frame, "canvas": canvas, "msg_frame": msg_frame, "scrollbar": scrollbar,
+                                  "oldest_history": None, "first_live": None}
+        if target is not None and self.dm_open_cb:
+            self.dm_open_cb(target)
+
+    def _on_yscroll(self, target: Optional[str], scrollbar, first: str, last: str):
+        scrollbar.set(first, last)
+        # 내용이 넘칠 때 맨 위에 도달하면 이전 DM 페이지 요청
+        if target is not None and self.dm_scroll_top_cb and float(first) <= 0.0 and float(last) < 1.0:
+            self.dm_scroll_top_cb(target)
 
     def _index_of_tab(self, target: Optional[str]) -> Optional[int]:
         if target not in self.chat_tabs: return None
@@ -116,6 +133,34 @@ class MainWindow:
                 return target
         return None
 
+    # ---------- 안 읽은 수 배지 ----------
+    def _tab_title(self, target: Optional[str]) -> str:
+        base = f"@{target}" if target else "Lobby"
+        n = self.unread.get(target, 0)
+        return f"{base} ({n})" if n else base
+
+    def _refresh_tab_title(self, target: Optional[str]):
+        if target in self.chat_tabs:
+            self.nb.tab(self.chat_tabs[target]["frame"], text=self._tab_title(target))
+
+    def set_unread(self, target: Optional[str], count: int):
+        """배지 설정 (DM 탭이 없으면 선택하지 않고 생성)"""
+        self.unread[target] = max(0, int(count))
+        self._ensure_tab(target, select=False)
+        self._refresh_tab_title(target)
+
+    def bump_unread(self, target: Optional[str]):
+        """보고 있지 않은 탭에 메시지가 오면 배지 +1"""
+        if target in self.chat_tabs and target != self._active_target():
+            self.unread[target] = self.unread.get(target, 0) + 1
+            self._refresh_tab_title(target)
+
+    def _mark_read(self, target: Optional[str]):
+        if self.unread.pop(target, 0):
+            self._refresh_tab_title(target)
+        if self.read_cb:
+            self.read_cb(target)
+
     def _view_for(self, target: Optional[str]) -> Dict[str, Any]:
         self._ensure_tab(target)
         return self.chat_tabs[target]
@@ -137,19 +182,29 @@ class MainWindow:
             # DM: 상대 라우팅은 메인에서 처리(콜백으로 위임)
             self.send_dm_cb(target, text)
             self.add_message(text, mine=True, target=target)
+        if self.unread.pop(target, 0):  # 보낸 대화는 서버에서도 읽음 처리됨
+            self._refresh_tab_title(target)
         self.entry.delete("1.0", "end")
 
     # ---------- 메시지 렌더 (시간 · 이름 · 채팅) ----------
     def add_message(self, text: str, mine: bool = False, meta_hint: bool=False,
                     target: Optional[str] = None, meta_nick: Optional[str] = None,
-                    from_uid: Optional[str] = None, is_history: bool = False):
+                    from_uid: Optional[str] = None, is_history: bool = False,
+                    ts: Optional[datetime] = None, before: Optional[tk.Widget] = None,
+                    scroll: bool = True, recovered: bool = False) -> ttk.Frame:
         view = self._view_for(target)
-        row = ttk.Frame(view["msg_frame"]); row.pack(fill="x", anchor="w", pady=3)
+        row = ttk.Frame(view["msg_frame"])
+        if before is not None:
+            row.pack(fill="x", anchor="w", pady=3, before=before)
+        else:
+            row.pack(fill="x", anchor="w", pady=3)
+        if not (is_history or meta_hint) and view["first_live"] is None:
+            view["first_live"] = row
 
         if meta_hint:
             hhmm, name = "--:--", "tips"
         else:
-            hhmm = datetime.now().strftime("%H:%M")
+            hhmm = (ts or datetime.now()).strftime("%H:%M")
             if target is None:
                 # Lobby: 내 메시지는 내 anon, 수신은 상대 anon(meta_nick)
                 name = meta_nick if (meta_nick and not mine) else self.state.anon_nick
@@ -160,6 +215,8 @@ class MainWindow:
         # 히스토리 메시지 표시
         if is_history:
             name = f"[히스토리] {name}"
+        elif recovered:
+            name = f"[복구] {name}"  # 서버에서 채운 빠진 메시지 (도착 순서가 원래 순서와 다를 수 있음)
 
         # [시간]
         time_color = "#999" if is_history else "#666"
@@ -181,7 +238,54 @@ class MainWindow:
         row.grid_columnconfigure(1, weight=0)
         row.grid_columnconfigure(2, weight=1)
 
-        self.root.after(10, lambda: view["canvas"].yview_moveto(1.0))
+        if scroll:
+            self.root.after(10, lambda: view["canvas"].yview_moveto(1.0))
+        return row
+
+    def add_history_page(self, messages: List[Dict[str, Any]], target: Optional[str] = None,
+                         older: bool = True):
+        """
+        히스토리 한 페이지(시간 오름차순)를 삽입.
+        - older=True: 과거 페이지 → '가장 오래된 히스토리' 앞에 끼워 넣음
+        - older=False: 증분 동기화로 받은 더 새로운 페이지 → 히스토리 블록 끝(첫 실시간 메시지 앞)
+        - 앵커가 없으면 맨 끝에 삽입
+        """
+        if not messages:
+            return
+        if target is not None and target not in self.chat_tabs:
+            return  # 로드 중에 닫힌 DM 탭
+        view = self._view_for(target)
+        canvas = view["canvas"]
+        # 스크롤백(기존 히스토리 위에 추가)이면 현재 보던 위치 유지
+        keep_position = older and view["oldest_history"] is not None
+        old_height = view["msg_frame"].winfo_height()
+        if older:
+            anchor = view["oldest_history"] or view["first_live"]
+        else:
+            anchor = view["first_live"]
+        first_row = None
+        for msg in messages:
+            mine = (msg.get("from_uid") == self.state.user_id)
+            try:
+                ts = datetime.fromisoformat(msg.get("timestamp") or "")
+            except ValueError:
+                ts = None
+            row = self.add_message(
+                msg.get("text", ""), mine=mine, target=target,
+                meta_nick=msg.get("nick"), from_uid=msg.get("from_uid"),
+                is_history=True, ts=ts, before=anchor, scroll=False,
+            )
+            if first_row is None:
+                first_row = row
+        if older or view["oldest_history"] is None:
+            view["oldest_history"] = first_row
+        if keep_position:
+            self.root.update_idletasks()
+            new_height = view["msg_frame"].winfo_height()
+            if new_height > 0:
+                canvas.yview_moveto((new_height - old_height) / new_height)
+        else:
+            self.root.after(10, lambda: canvas.yview_moveto(1.0))
 
     # ---------- 로스터 ----------
     def refresh_roster(self):
@@ -216,6 +320,8 @@ class MainWindow:
         else:
             self.header_right.config(text=f"DM to @{target}")
         self._update_close_btn_state(target)
+        if target in self.chat_tabs:
+            self._mark_read(target)
     def _update_close_btn_state(self, target: Optional[str]):
         self.close_btn.state(["disabled"] if target is None else ["!disabled"])
     def _on_tab_right_click(self, event):
@@ -231,6 +337,7 @@ class MainWindow:
         self._close_dm_tab(self._rclick_target); self._rclick_target = None
     def _close_dm_tab(self, target: str):
         parts = self.chat_tabs.pop(target, None)
+        self.unread.pop(target, None)
         if parts: self.nb.forget(parts["frame"])
         lobby_idx = self._index_of_tab(None)
         if lobby_idx is not None: self.nb.select(lobby_idx)
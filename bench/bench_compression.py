@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+페이로드 압축 벤치마크 - 임계값/레벨별 CPU 비용 대비 바이트 절감
+
+실제 채팅에 가까운 코퍼스(한국어 짧은 대화, 영어 대화, 코드/로그 붙여넣기,
+URL 위주, 긴 한국어 문단)를 만들어 encode_message/decode_message를 측정한다.
+
+    python bench/bench_compression.py
+    python bench/bench_compression.py --json > bench_output.txt
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.net.codec import encode_message, decode_message
+from app.net.frag import fragment, DEFAULT_MTU
+
+KO_WORDS = ["오늘", "회의", "몇시", "에", "하나요", "점심", "뭐", "먹을까", "배포", "끝났습니다",
+            "확인", "부탁드려요", "네", "알겠습니다", "서버", "로그", "다시", "올려주세요", "감사합니다",
+            "내일", "오전", "까지", "정리", "해서", "공유", "드릴게요", "혹시", "이슈", "있으면", "말씀해주세요"]
+EN_WORDS = ["the", "deploy", "is", "done", "can", "you", "check", "logs", "lunch", "meeting", "at",
+            "noon", "thanks", "please", "review", "my", "pr", "server", "restart", "again", "tomorrow"]
+CODE = '''def handle(self, req):
+    try:
+        data = json.loads(req.body)
+    except ValueError as e:
+        log.warning("bad request: %s", e)
+        return Response(status=400)
+    return self.service.process(data)
+'''
+LOG = "2025-01-01 12:00:{:02d} INFO [worker-{}] processed batch id={} rows={} elapsed={}ms\n"
+
+
+def _sentence(rng, words, lo, hi):
+    return " ".join(rng.choice(words) for _ in range(rng.randint(lo, hi)))
+
+
+def make_corpora(seed: int = 42, n: int = 500) -> dict:
+    rng = random.Random(seed)
+    return {
+        "ko_short": [_sentence(rng, KO_WORDS, 2, 12) for _ in range(n)],
+        "en_short": [_sentence(rng, EN_WORDS, 3, 15) for _ in range(n)],
+        "ko_long": [" ".join(_sentence(rng, KO_WORDS, 8, 20) + "." for _ in range(rng.randint(10, 40)))
+                    for _ in range(n // 5)],
+        "code_paste": [CODE * rng.randint(2, 20) for _ in range(n // 5)],
+        "log_paste": ["".join(LOG.format(i % 60, rng.randint(1, 8), rng.randint(1000, 9999),
+                                         rng.randint(1, 500), rng.randint(1, 90))
+                              for i in range(rng.randint(10, 200))) for _ in range(n // 5)],
+        "urls": [" ".join(f"https://example.com/{uuid.UUID(int=rng.getrandbits(128)).hex}"
+                          for _ in range(rng.randint(1, 4))) for _ in range(n)],
+    }
+
+
+def _wrap(text: str) -> dict:
+    return {"type": "chat", "room_id": "lobby", "from": "bench", "nick": "bench", "text": text,
+            "msg_id": str(uuid.uuid4()), "ts": time.time(), "seq": 1, "sess": "bench"}
+
+
+def run_case(messages, threshold: int, level: int) -> dict:
+    raw_bytes = sum(len(json.dumps(m, ensure_ascii=False).encode("utf-8")) for m in messages)
+    t0 = time.perf_counter()
+    encoded = [encode_message(m, threshold, level) for m in messages]
+    t_enc = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for e in encoded:
+        decode_message(e)
+    t_dec = time.perf_counter() - t0
+    wire = sum(len(e) for e in encoded)
+    raw_frags = sum(len(fragment(json.dumps(m, ensure_ascii=False).encode("utf-8"))) for m in messages)
+    frags = sum(len(fragment(e)) for e in encoded)
+    return {
+        "threshold": threshold,
+        "level": level,
+        "messages": len(messages),
+        "raw_bytes": raw_bytes,
+        "wire_bytes": wire,
+        "ratio": round(wire / raw_bytes, 4),
+        "raw_datagrams": raw_frags,
+        "datagrams": frags,
+        "encode_us_per_msg": round(t_enc / len(messages) * 1e6, 2),
+        "decode_us_per_msg": round(t_dec / len(messages) * 1e6, 2),
+    }
+
+
+def main():
+    p = argparse.ArgumentParser(description="TipOff payload compression benchmark")
+    p.add_argument("--thresholds", default="0,256,512,1024")
+    p.add_argument("--levels", default="1,6,9")
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--json", action="store_true", help="결과를 JSON 한 줄씩 출력")
+    args = p.parse_args()
+
+    thresholds = [int(x) for x in args.thresholds.split(",")]
+    levels = [int(x) for x in args.levels.split(",")]
+    corpora = make_corpora(args.seed)
+
+    if not args.json:
+        print(f"MTU={DEFAULT_MTU}")
+        print(f"{'corpus':<11} {'thr':>5} {'lvl':>3} {'raw KB':>8} {'wire KB':>8} {'ratio':>6} "
+              f"{'dgrams':>11} {'enc us':>7} {'dec us':>7}")
+    for name, texts in corpora.items():
+        messages = [_wrap(t) for t in texts]
+        for threshold in thresholds:
+            for level in (levels if threshold > 0 else levels[:1]):
+                r = run_case(messages, threshold, level)
+                r["corpus"] = name
+                if args.json:
+                    print(json.dumps(r))
+                else:
+                    print(f"{name:<11} {threshold:>5} {level:>3} {r['raw_bytes'] / 1024:>8.1f} "
+                          f"{r['wire_bytes'] / 1024:>8.1f} {r['ratio']:>6.3f} "
+                          f"{r['raw_datagrams']:>5}->{r['datagrams']:<5} "
+                          f"{r['encode_us_per_msg']:>7.1f} {r['decode_us_per_msg']:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
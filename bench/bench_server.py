@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+서버 벤치마크 - 합성 DB 크기별 수집/조회/정리 비용
+
+크기마다 bench/gen_db.py로 DB를 만들어(--data-dir에 캐시) 다음을 측정한다.
+- ingest.direct: MessageCollectorService._process_message 호출 (소켓 없이 디코딩+저장)
+- ingest.udp:    실제 UDP로 --ingest-rate 속도로 보내고 전부 저장될 때까지 (msgs/sec, 유실)
+- db.*:          DatabaseManager 조회 메서드별 p50/p99
+- api.*:         APIHandler 라우트별 p50/p99 (HTTP 왕복 포함)
+- maint.get_stats / maint.cleanup_old_data: 데이터 크기에 따른 비용 (cleanup은 복사본에서)
+
+결과는 JSON 한 줄씩 (--out 파일에 추가), --compare로 이전 결과와 비교
+    python bench/bench_server.py --sizes 1000000 --out bench_results.jsonl
+    python bench/bench_server.py --sizes 1000000,10000000,50000000 --data-dir /data/tipoff-bench
+    python bench/bench_server.py --db tipoff.db --skip ingest,maint
+    python bench/bench_server.py --sizes 1000000 --compare bench_results.jsonl
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+import urllib.request
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.database import DatabaseManager
+from app.net.codec import encode_message
+from app.server.bridge import HTTPAPIService, MessageCollectorService, ServerBridgeConfig
+from gen_db import generate
+
+
+def _commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def _free_port(kind=socket.SOCK_DGRAM) -> int:
+    with socket.socket(socket.AF_INET, kind) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def summarize(samples: list) -> dict:
+    s = sorted(samples)
+    pick = lambda q: s[min(len(s) - 1, int(len(s) * q))]
+    return {"iters": len(s), "p50_ms": round(pick(0.50) * 1000, 4), "p99_ms": round(pick(0.99) * 1000, 4),
+            "mean_ms": round(sum(s) / len(s) * 1000, 4), "max_ms": round(s[-1] * 1000, 4)}
+
+
+def timed(fn, iters: int, warmup: int = 3) -> dict:
+    for _ in range(min(warmup, iters)):
+        fn()
+    samples = []
+    for _ in range(iters):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return summarize(samples)
+
+
+class Fixture:
+    """벤치 대상 DB에서 실제로 존재하는 룸/사용자/DM 쌍/시각/seq 구간 표본"""
+    def __init__(self, db_path: str, seed: int):
+        self.rng = random.Random(seed)
+        conn = sqlite3.connect(db_path)
+        try:
+            self.rooms = [r[0] for r in conn.execute("SELECT room_id FROM rooms")]
+            self.users = [r[0] for r in conn.execute("SELECT user_id FROM users LIMIT 5000")]
+            self.max_id = conn.execute("SELECT MAX(id) FROM messages").fetchone()[0] or 0
+            lo, hi = conn.execute("SELECT MIN(timestamp), MAX(timestamp) FROM messages").fetchone()
+            self.ts_range = (lo or time.time(), hi or time.time())
+            self.pairs = conn.execute(
+                "SELECT from_user_id, to_user_id FROM messages WHERE message_type = 'dm' "
+                "AND id > ? LIMIT 2000", (max(0, self.max_id - 200000),)).fetchall()
+            self.seq_rows = conn.execute(
+                "SELECT room_id, from_user_id, sess, seq FROM messages WHERE message_type = 'lobby' "
+                "AND sess IS NOT NULL AND id > ? LIMIT 2000", (max(0, self.max_id - 200000),)).fetchall()
+        finally:
+            conn.close()
+
+    def room(self):
+        return self.rng.choice(self.rooms) if self.rooms else "lobby"
+
+    def user(self):
+        return self.rng.choice(self.users) if self.users else "nobody"
+
+    def pair(self):
+        return self.rng.choice(self.pairs) if self.pairs else ("a", "b")
+
+    def before(self) -> datetime:
+        lo, hi = self.ts_range
+        return datetime.fromtimestamp(self.rng.uniform(lo, hi))
+
+    def after_id(self) -> int:
+        return max(0, self.max_id - self.rng.randint(10, 500))
+
+    def seq_range(self):
+        if not self.seq_rows:
+            return "lobby", "a", "s", 1, 5
+        room, uid, sess, seq = self.rng.choice(self.seq_rows)
+        return room, uid, sess, max(1, seq - 5), seq
+
+
+def bench_db(db: DatabaseManager, fx: Fixture, iters: int) -> dict:
+    cases = {
+        "db.get_lobby_messages": lambda: db.get_lobby_messages(fx.room(), 50),
+        "db.get_lobby_messages.before": lambda: db.get_lobby_messages(fx.room(), 50, fx.before()),
+        "db.get_lobby_messages_after": lambda: db.get_lobby_messages_after(fx.room(), fx.after_id(), 50),
+        "db.get_lobby_messages_by_seq": lambda: db.get_lobby_messages_by_seq(*fx.seq_range()),
+        "db.get_dm_messages": lambda: db.get_dm_messages(*fx.pair(), 50),
+        "db.get_dm_messages.before": lambda: db.get_dm_messages(*fx.pair(), 50, fx.before()),
+        "db.get_recent_messages": lambda: db.get_recent_messages(fx.room(), 50),
+        "db.get_room_users": lambda: db.get_room_users(fx.room()),
+        "db.get_user": lambda: db.get_user(fx.user()),
+        "db.get_room": lambda: db.get_room(fx.room()),
+    }
+    return {name: timed(fn, iters) for name, fn in cases.items()}
+
+
+def bench_api(db: DatabaseManager, fx: Fixture, iters: int) -> dict:
+    port = _free_port(socket.SOCK_STREAM)
+    service = HTTPAPIService(ServerBridgeConfig(db_path=db.db_path, http_port=port, host="127.0.0.1"), db)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        service.start()
+    base = f"http://127.0.0.1:{port}"
+
+    def get(path):
+        return lambda: urllib.request.urlopen(base + path(), timeout=30).read()
+
+    def seq_path():
+        room, uid, sess, lo, hi = fx.seq_range()
+        return f"/api/messages/lobby?room_id={room}&from={uid}&sess={sess}&seq_from={lo}&seq_to={hi}"
+
+    cases = {
+        "api.lobby": get(lambda: f"/api/messages/lobby?room_id={fx.room()}&limit=50"),
+        "api.lobby.before": get(lambda: f"/api/messages/lobby?room_id={fx.room()}&limit=50"
+                                        f"&before={fx.before().timestamp()}"),
+        "api.lobby.after_id": get(lambda: f"/api/messages/lobby?room_id={fx.room()}&limit=50"
+                                          f"&after_id={fx.after_id()}"),
+        "api.lobby.seq": get(seq_path),
+        # 큰 페이지: 행 → JSON 직렬화 비용 (ISO 시각 / epoch 숫자)
+        "api.lobby.page1000": get(lambda: f"/api/messages/lobby?room_id={fx.room()}&limit=1000"),
+        "api.lobby.page1000.epoch": get(lambda: f"/api/messages/lobby?room_id={fx.room()}&limit=1000&ts=epoch"),
+        "api.dm": get(lambda: "/api/messages/dm?user1={}&user2={}&limit=50".format(*fx.pair())),
+        "api.users": get(lambda: f"/api/users?room_id={fx.room()}"),
+        "api.stats": get(lambda: "/api/stats"),
+        "api.health": get(lambda: "/health"),
+    }
+    try:
+        out = {}
+        for name, fn in cases.items():
+            out[name] = timed(fn, max(3, iters // 10) if name == "api.stats" else iters)
+        return out
+    finally:
+        service.stop()
+
+
+def _ingest_payloads(n: int, rooms: list) -> list:
+    rng = random.Random(7)
+    sess = uuid.uuid4().hex[:12]
+    out = []
+    for i in range(n):
+        msg = {"type": "chat", "room_id": rng.choice(rooms), "from": f"bench{i % 50}",
+               "nick": "bench", "text": "ingest benchmark message " * rng.randint(1, 4),
+               "msg_id": str(uuid.uuid4()), "ts": time.time(), "seq": i + 1, "sess": sess}
+        out.append(encode_message(msg))
+    return out
+
+
+def bench_ingest(db: DatabaseManager, fx: Fixture, count: int, rate: float) -> dict:
+    out = {}
+    config = ServerBridgeConfig(db_path=db.db_path, udp_listen_port=_free_port(), host="127.0.0.1")
+    collector = MessageCollectorService(config, db)
+
+    # 소켓 없이 디코딩 + 저장 경로만
+    payloads = _ingest_payloads(count, fx.rooms or ["lobby"])
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        t0 = time.perf_counter()
+        for p in payloads:
+            collector._process_message(p, ("127.0.0.1", 0))
+        elapsed = time.perf_counter() - t0
+    out["ingest.direct"] = {"messages": count, "elapsed_sec": round(elapsed, 4),
+                            "msgs_per_sec": round(count / elapsed, 1)}
+
+    # 실제 UDP 수집기: rate(msgs/s, 0이면 최대 속도)로 보낸 뒤 저장 건수가 더 늘지 않을 때까지 대기
+    # 수집기가 rate를 못 따라가면 수신 버퍼가 넘쳐 loss로 드러남
+    payloads = _ingest_payloads(count, fx.rooms or ["lobby"])
+    before = db.get_stats()["total_messages"]
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        collector.start()
+        time.sleep(0.2)
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            t0 = time.perf_counter()
+            for i, p in enumerate(payloads):
+                if rate > 0:
+                    ahead = t0 + i / rate - time.perf_counter()
+                    if ahead > 0:
+                        time.sleep(ahead)
+                s.sendto(p, ("127.0.0.1", config.udp_listen_port))
+            t_sent = time.perf_counter()
+            stored, last_change, t_last = before, time.perf_counter(), t0
+            while time.perf_counter() - last_change < 1.0 and stored - before < count:
+                time.sleep(0.05)
+                n = db.get_stats()["total_messages"]
+                if n != stored:
+                    stored, last_change, t_last = n, time.perf_counter(), time.perf_counter()
+        collector.stop()
+    got = stored - before
+    elapsed = max(1e-9, t_last - t0)
+    out["ingest.udp"] = {"messages": count, "send_rate": round(count / max(1e-9, t_sent - t0), 1),
+                         "stored": got, "loss": round(1 - got / count, 5),
+                         "elapsed_sec": round(elapsed, 4), "msgs_per_sec": round(got / elapsed, 1)}
+    return out
+
+
+def bench_maint(db: DatabaseManager, stats_iters: int) -> dict:
+    out = {"maint.get_stats": timed(db.get_stats, stats_iters, warmup=1)}
+    # cleanup은 파괴적이므로 복사본에서 1회
+    copy_path = db.db_path + ".cleanup"
+    shutil.copyfile(db.db_path, copy_path)
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            copy = DatabaseManager(copy_path)
+        before = copy.get_stats()["total_messages"]
+        t0 = time.perf_counter()
+        copy.cleanup_old_data(30)
+        elapsed = time.perf_counter() - t0
+        after = copy.get_stats()["total_messages"]
+        out["maint.cleanup_old_data"] = {"elapsed_sec": round(elapsed, 4), "deleted": before - after,
+                                         "remaining": after}
+    finally:
+        os.remove(copy_path)
+    return out
+
+
+def run_size(args, db_path: str, size: int) -> list:
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        db = DatabaseManager(db_path)
+    fx = Fixture(db_path, args.seed)
+    results = {}
+    if "db" not in args.skip:
+        results.update(bench_db(db, fx, args.iters))
+    if "api" not in args.skip:
+        results.update(bench_api(db, fx, args.iters))
+    if "maint" not in args.skip:
+        results.update(bench_maint(db, args.stats_iters))
+    if "ingest" not in args.skip:
+        results.update(bench_ingest(db, fx, args.ingest_count, args.ingest_rate))
+    meta = {"size": size, "commit": args.commit, "ts": time.time(),
+            "db_bytes": os.path.getsize(db_path)}
+    return [{"bench": name, **meta, **r} for name, r in results.items()]
+
+
+def _key(r: dict) -> tuple:
+    return r["bench"], r["size"]
+
+
+def _metric(r: dict):
+    """비교 지표: 지연은 p50, 처리량은 msgs/sec, 일회성 작업은 elapsed"""
+    for k in ("p50_ms", "msgs_per_sec", "elapsed_sec"):
+        if r.get(k) is not None:
+            return k, r[k]
+    return None, None
+
+
+def compare(results: list, baseline_path: str):
+    base = {}
+    with open(baseline_path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                r = json.loads(line)
+                base[_key(r)] = r  # 같은 키는 마지막 실행 기준
+    print(f"\n{'bench':<34} {'size':>10} {'metric':<12} {'base':>10} {'now':>10} {'ratio':>7}")
+    for r in results:
+        b = base.get(_key(r))
+        k, now = _metric(r)
+        if not b or k is None or not b.get(k):
+            continue
+        ratio = now / b[k]
+        flag = ""
+        if k == "msgs_per_sec":
+            flag = " !!" if ratio < 0.9 else ""
+        elif ratio > 1.1:
+            flag = " !!"
+        print(f"{r['bench']:<34} {r['size']:>10} {k:<12} {b[k]:>10} {now:>10} {ratio:>7.2f}{flag}")
+
+
+def main():
+    p = argparse.ArgumentParser(description="TipOff server benchmark suite")
+    p.add_argument("--sizes", default="1000000", help="메시지 수 목록 (쉼표 구분)")
+    p.add_argument("--db", default=None, help="생성 대신 기존 DB 사용 (복사본에서 측정)")
+    p.add_argument("--data-dir", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+    p.add_argument("--rooms", type=int, default=50)
+    p.add_argument("--users", type=int, default=2000)
+    p.add_argument("--dm-pairs", type=int, default=5000)
+    p.add_argument("--iters", type=int, default=200)
+    p.add_argument("--stats-iters", type=int, default=5)
+    p.add_argument("--ingest-count", type=int, default=5000)
+    p.add_argument("--ingest-rate", type=float, default=500.0, help="UDP 수집 송신 속도(msgs/s), 0이면 최대")
+    p.add_argument("--skip", default="", help="건너뛸 그룹: db,api,ingest,maint")
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--out", default=None, help="결과 JSON lines를 추가할 파일")
+    p.add_argument("--compare", default=None, help="이전 결과 파일과 비교")
+    p.add_argument("--regen", action="store_true", help="캐시된 DB가 있어도 다시 생성")
+    args = p.parse_args()
+    args.skip = {s for s in args.skip.split(",") if s}
+    args.commit = _commit()
+
+    results = []
+    if args.db:
+        work = os.path.join(args.data_dir, "bench-copy.db")
+        os.makedirs(args.data_dir, exist_ok=True)
+        shutil.copyfile(args.db, work)
+        size = sqlite3.connect(work).execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+        targets = [(work, size, True)]
+    else:
+        os.makedirs(args.data_dir, exist_ok=True)
+        targets = []
+        for size in (int(x) for x in args.sizes.split(",")):
+            path = os.path.join(args.data_dir,
+                                f"tipoff-{size}-r{args.rooms}-u{args.users}-p{args.dm_pairs}-s{args.seed}.db")
+            if args.regen or not os.path.exists(path):
+                print(f"[bench] 합성 DB 생성: {path}", file=sys.stderr)
+                generate(path, size, args.rooms, args.users, args.dm_pairs, seed=args.seed)
+            targets.append((path, size, False))
+
+    for path, size, temporary in targets:
+        work = path
+        if not temporary and "ingest" not in args.skip:
+            # 수집 벤치가 행을 추가하므로 캐시 DB는 그대로 두고 복사본에서 측정
+            work = path + ".run"
+            shutil.copyfile(path, work)
+        try:
+            print(f"[bench] size={size:,} ({os.path.getsize(work) / 1e6:.0f} MB)", file=sys.stderr)
+            rows = run_size(args, work, size)
+        finally:
+            if work != path or temporary:
+                os.remove(work)
+        results.extend(rows)
+        for r in rows:
+            line = json.dumps(r, ensure_ascii=False)
+            print(line)
+            if args.out:
+                with open(args.out, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+합성 tipoff.db 생성기 - 서버 벤치마크용 (1M~50M 메시지)
+
+- 스키마는 app.db.migrations로 만들고, 보조 인덱스는 적재 후 다시 생성 (적재 속도)
+- 로비 메시지는 여러 룸에 분산, 송신자 세션별 seq/sess 포함
+- DM은 고정된 사용자 쌍 집합에서 양방향으로 생성
+- timestamp는 최근 --days일에 고르게 분포 → cleanup_old_data(30) 대상이 절반 정도
+- 활동 집계(activity_minute/activity_hour/talker_hour)는 적재 후 마이그레이션 008과 같은 방식으로 채움
+- 같은 인자 + seed면 같은 DB
+
+    python bench/gen_db.py /tmp/tipoff-1m.db --messages 1000000
+    python bench/gen_db.py /tmp/tipoff-50m.db --messages 50000000 --rooms 500 --users 20000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.migrations import backfill_rollups, migrate
+
+WORDS = ["오늘", "회의", "몇시", "점심", "배포", "확인", "부탁드려요", "네", "서버", "로그",
+         "deploy", "done", "check", "lunch", "review", "thanks", "please", "restart", "ok", "lgtm"]
+
+
+def _text_pool(rng: random.Random, n: int = 4096) -> list:
+    """길이 분포가 다른 본문 후보 (대부분 짧고 가끔 긴 메시지)"""
+    pool = []
+    for _ in range(n):
+        k = rng.choice((2, 3, 5, 8, 12, 20, 60))
+        pool.append(" ".join(rng.choice(WORDS) for _ in range(k)))
+    return pool
+
+
+def generate(path: str, messages: int, rooms: int = 50, users: int = 2000, dm_pairs: int = 5000,
+             dm_ratio: float = 0.2, days: float = 60.0, seed: int = 42, batch: int = 50000,
+             verbose: bool = True) -> dict:
+    """path에 합성 DB 생성 (이미 있으면 덮어씀), 생성 통계 반환"""
+    if os.path.exists(path):
+        os.remove(path)
+    rng = random.Random(seed)
+    texts = _text_pool(rng)
+    room_ids = ["lobby"] + [f"room{i:04d}" for i in range(1, rooms)]
+    user_ids = [f"u{i:06d}" for i in range(users)]
+    user_room = {u: rng.choice(room_ids) for u in user_ids}
+    pairs = [tuple(rng.sample(user_ids, 2)) for _ in range(dm_pairs)]
+    seqs = {u: 0 for u in user_ids}
+
+    now = time.time()
+    t0 = now - days * 86400
+    step = (now - t0) / max(1, messages)
+
+    conn = sqlite3.connect(path)
+    migrate(conn)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    # 보조 인덱스는 적재 후 생성 (정의는 migrations 결과에서 그대로 가져옴)
+    index_sql = [r[0] for r in conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type='index' AND tbl_name='messages' AND sql IS NOT NULL")]
+    for name, in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='messages' AND sql IS NOT NULL").fetchall():
+        conn.execute(f"DROP INDEX {name}")
+
+    conn.executemany("INSERT INTO rooms (room_id, name, created_at) VALUES (?, ?, ?)",
+                     [(r, r, t0) for r in room_ids])
+    conn.executemany(
+        "INSERT INTO users (user_id, anon_nick, last_seen, ip, dm_port, room_id) VALUES (?, ?, ?, ?, ?, ?)",
+        [(u, f"nick-{u}", now - rng.random() * days * 86400, "127.0.0.1", 5002, user_room[u]) for u in user_ids])
+    conn.commit()
+
+    started = time.perf_counter()
+    sql = ("INSERT INTO messages (msg_id, room_id, message_type, from_user_id, to_user_id, nick, text, "
+           "timestamp, created_at, seq, sess) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+    n_dm = 0
+    for start in range(0, messages, batch):
+        rows = []
+        for i in range(start, min(messages, start + batch)):
+            ts = t0 + i * step
+            if rng.random() < dm_ratio:
+                a, b = rng.choice(pairs)
+                if rng.random() < 0.5:
+                    a, b = b, a
+                rows.append((f"m{i:012x}", user_room[a], "dm", a, b, a, rng.choice(texts),
+                             ts, ts + 0.002, None, None))
+                n_dm += 1
+            else:
+                u = rng.choice(user_ids)
+                seqs[u] += 1
+                rows.append((f"m{i:012x}", user_room[u], "lobby", u, None, u, rng.choice(texts),
+                             ts, ts + 0.002, seqs[u], f"s-{u}"))
+        conn.executemany(sql, rows)
+        conn.commit()
+        if verbose:
+            done = start + len(rows)
+            rate = done / (time.perf_counter() - started)
+            print(f"\r[gen] {done:,}/{messages:,} ({rate:,.0f} rows/s)", end="", file=sys.stderr)
+
+    t_idx = time.perf_counter()
+    for stmt in index_sql:
+        conn.execute(stmt)
+    backfill_rollups(conn)
+    conn.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+    if verbose:
+        print(f"\n[gen] 인덱스 생성 + 집계 {time.perf_counter() - t_idx:.1f}s", file=sys.stderr)
+    return {"path": path, "messages": messages, "dm_messages": n_dm, "rooms": len(room_ids),
+            "users": users, "dm_pairs": dm_pairs, "days": days, "seed": seed,
+            "elapsed_sec": round(time.perf_counter() - started, 2),
+            "size_bytes": os.path.getsize(path)}
+
+
+def main():
+    p = argparse.ArgumentParser(description="TipOff synthetic database generator")
+    p.add_argument("path")
+    p.add_argument("--messages", type=int, default=1_000_000)
+    p.add_argument("--rooms", type=int, default=50)
+    p.add_argument("--users", type=int, default=2000)
+    p.add_argument("--dm-pairs", type=int, default=5000)
+    p.add_argument("--dm-ratio", type=float, default=0.2)
+    p.add_argument("--days", type=float, default=60.0)
+    p.add_argument("--seed", type=int, default=42)
+    args = p.parse_args()
+    info = generate(args.path, args.messages, args.rooms, args.users, args.dm_pairs,
+                    args.dm_ratio, args.days, args.seed)
+    print(info)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+시뮬레이션 피어 부하 생성기 - Tk 없이 loopback에서 피어 N개를 띄워 종단 간 측정
+
+피어마다 presence/로비/DM 서비스(app/net/aio.py)를 돌리고
+설정한 속도(포아송 도착)와 크기로 로비/DM 메시지를 보낸다.
+브로드캐스트는 127.255.255.255로 보내므로 같은 포트에 바인드한 모든 피어가 받는다.
+--transport multicast면 loopback(127.0.0.1) 인터페이스의 멀티캐스트 그룹으로 주고받는다.
+
+측정 항목
+- 전달 처리량(msgs/s, KB/s), 유실률 (로비: 보낸 수 × (N-1), DM: 보낸 수 기준)
+- 종단 간 지연 p50/p90/p99/max (송신 ts → 수신 시각, 같은 호스트라 시계 공유)
+- presence 수렴 (모든 피어를 로스터에 올린 피어 비율)
+- 서버 수집: 저장 건수, 수집 지연(created_at - timestamp) 백분위수
+
+    python bench/loadgen.py --peers 50 --duration 10
+    python bench/loadgen.py --peers 200 --procs 4 --spawn-server --json
+    python bench/loadgen.py --peers 20 --server-db tipoff.db --server-udp-port 5002   # 실행 중인 서버
+    python bench/loadgen.py --peers 50 --transport multicast
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import multiprocessing
+import os
+import random
+import sqlite3
+import string
+import sys
+import tempfile
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.net.aio import AsyncPresenceService, AsyncLobbyService, AsyncDmService
+from app.net.presence import PresenceConfig
+from app.net.lobby import LobbyConfig
+from app.net.dm import DmConfig
+
+ROOM = "loadgen"
+UID_PREFIX = "sim"
+ALPHABET = string.ascii_letters + string.digits + "가나다라마바사아자차카타파하 "
+
+
+def percentiles(samples, ps=(50, 90, 99)) -> dict:
+    if not samples:
+        return {f"p{p}": None for p in ps} | {"max": None}
+    s = sorted(samples)
+    out = {f"p{p}": round(s[min(len(s) - 1, int(len(s) * p / 100))] * 1000, 3) for p in ps}
+    out["max"] = round(s[-1] * 1000, 3)
+    return out
+
+
+class _PeerSink:
+    """서비스 이벤트를 큐 없이 바로 집계 (EventBus와 같은 post 인터페이스)"""
+    def __init__(self, peer: "SimPeer"):
+        self.peer = peer
+
+    def post(self, evt: str, **ev):
+        p = self.peer
+        if evt == "presence_seen":
+            p.roster[ev["user_id"]] = (ev["ip"], ev["dm_port"])
+            return
+        now = time.time()
+        if evt == "lobby_chat":
+            p.stats["recv_lobby"] += 1
+            p.stats["recv_bytes"] += len(ev.get("text", ""))
+            if ev.get("ts"):
+                p.lat_lobby.append(now - ev["ts"])
+        elif evt == "dm_chat":
+            p.stats["recv_dm"] += 1
+            p.stats["recv_bytes"] += len(ev.get("text", ""))
+            if ev.get("ts"):
+                p.lat_dm.append(now - ev["ts"])
+        elif evt == "dm_failed":
+            p.stats["dm_failed"] += 1
+
+
+class SimPeer:
+    def __init__(self, idx: int, args, rng: random.Random):
+        self.idx = idx
+        self.args = args
+        self.rng = rng
+        self.uid = f"{UID_PREFIX}{idx:04d}"
+        self.roster: dict = {}
+        self.lat_lobby: list = []
+        self.lat_dm: list = []
+        self.stats = {"sent_lobby": 0, "sent_dm": 0, "recv_lobby": 0, "recv_dm": 0,
+                      "recv_bytes": 0, "dm_no_route": 0, "dm_failed": 0}
+        sink = _PeerSink(self)
+        server = dict(enable_server=args.server_udp_port is not None,
+                      server_host=args.server_host,
+                      server_http_port=args.server_http_port or 0,
+                      server_udp_port=args.server_udp_port or 0,
+                      compress_threshold=args.compress_threshold)
+        transport = dict(transport=args.transport, mcast_group=args.mcast_group,
+                         mcast_ttl=0, mcast_iface=args.mcast_iface)  # TTL 0: 호스트 밖으로 안 나감
+        dm_port = args.base_port + 100 + idx
+        self.presence = AsyncPresenceService(PresenceConfig(
+            self.uid, ROOM, self.uid, args.broadcast_ip, args.base_port, dm_port,
+            interval_sec=args.presence_interval, **transport), events=sink)
+        self.lobby = AsyncLobbyService(LobbyConfig(
+            self.uid, ROOM, self.uid, args.broadcast_ip, args.base_port + 1, **server, **transport),
+            events=sink)
+        self.dm = AsyncDmService(DmConfig(
+            self.uid, ROOM, self.uid, dm_port, reliable=args.dm_reliable, **server), events=sink)
+
+    async def start(self):
+        for svc in (self.presence, self.lobby, self.dm):
+            await svc.start()
+
+    async def stop(self):
+        for svc in (self.presence, self.lobby, self.dm):
+            await svc.stop()
+
+    def _text(self) -> str:
+        size = self.rng.choice(self.args.sizes)
+        return "".join(self.rng.choices(ALPHABET, k=size))
+
+    async def _send_loop(self, rate: float, send, t_stop: float):
+        if rate <= 0:
+            return
+        while True:
+            await asyncio.sleep(self.rng.expovariate(rate))
+            if time.time() >= t_stop:
+                return
+            await send()
+
+    async def _send_lobby(self):
+        await self.lobby.send(self._text())
+        self.stats["sent_lobby"] += 1
+
+    async def _send_dm(self):
+        peers = [uid for uid in self.roster if uid != self.uid]
+        if not peers:
+            self.stats["dm_no_route"] += 1
+            return
+        uid = self.rng.choice(peers)
+        ip, port = self.roster[uid]
+        await self.dm.send(ip, port, self._text(), uid)
+        self.stats["sent_dm"] += 1
+
+    async def run(self, t_start: float, t_stop: float):
+        await asyncio.sleep(max(0.0, t_start - time.time()))
+        await asyncio.gather(
+            self._send_loop(self.args.lobby_rate, self._send_lobby, t_stop),
+            self._send_loop(self.args.dm_rate, self._send_dm, t_stop),
+        )
+
+
+async def _run_worker(args, indices, t_start: float, t_stop: float) -> dict:
+    peers = [SimPeer(i, args, random.Random(args.seed * 100003 + i)) for i in indices]
+    for p in peers:
+        await p.start()
+    await asyncio.gather(*(p.run(t_start, t_stop) for p in peers))
+    await asyncio.sleep(max(0.0, t_stop + args.drain - time.time()))
+
+    out = {k: 0 for k in peers[0].stats} if peers else {}
+    out.update(lat_lobby=[], lat_dm=[], roster_complete=0, retransmits=0, dm_lost=0)
+    for p in peers:
+        for k, v in p.stats.items():
+            out[k] += v
+        out["lat_lobby"].extend(p.lat_lobby)
+        out["lat_dm"].extend(p.lat_dm)
+        if len(p.roster) >= args.peers - 1:
+            out["roster_complete"] += 1
+        s = p.dm.stats()
+        out["retransmits"] += s["retransmits"]
+        out["dm_lost"] += s["lost"]
+        await p.stop()
+    return out
+
+
+def _worker(args, indices, t_start, t_stop) -> dict:
+    return asyncio.run(_run_worker(args, indices, t_start, t_stop))
+
+
+def _run_server(db_path: str, http_port: int, udp_port: int):
+    """수집 서버를 별도 프로세스에서 실행 (메시지별 로그는 버림)"""
+    from app.server.bridge import ServerBridge, ServerBridgeConfig
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        server = ServerBridge(ServerBridgeConfig(db_path=db_path, http_port=http_port,
+                                                 udp_listen_port=udp_port, host="127.0.0.1"))
+        server.start()
+        while True:
+            time.sleep(1)
+
+
+def _wait_http(port: int, timeout: float = 10.0) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=0.5).read()
+            return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def server_ingest(db_path: str, since: float, sent: int) -> dict:
+    """서버 DB에서 이번 실행의 sim 피어 메시지를 읽어 저장 건수와 수집 지연 계산"""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute(
+            "SELECT created_at - timestamp FROM messages WHERE from_user_id LIKE ? AND timestamp >= ?",
+            (UID_PREFIX + "%", since)).fetchall()
+    finally:
+        conn.close()
+    lags = [r[0] for r in rows]
+    return {"stored": len(lags), "sent": sent,
+            "loss": round(1 - len(lags) / sent, 5) if sent else None,
+            "lag_ms": percentiles(lags)}
+
+
+def main():
+    p = argparse.ArgumentParser(description="TipOff simulated-peer load generator")
+    p.add_argument("--peers", type=int, default=20)
+    p.add_argument("--procs", type=int, default=1, help="피어를 나눠 돌릴 프로세스 수")
+    p.add_argument("--duration", type=float, default=10.0, help="송신 시간(초)")
+    p.add_argument("--warmup", type=float, default=1.5, help="presence 수렴 대기(초)")
+    p.add_argument("--drain", type=float, default=2.0, help="송신 종료 후 수신 대기(초)")
+    p.add_argument("--lobby-rate", type=float, default=0.5, help="피어당 로비 메시지/초")
+    p.add_argument("--dm-rate", type=float, default=0.2, help="피어당 DM/초")
+    p.add_argument("--sizes", default="32,128,512", help="메시지 본문 길이(문자) 후보")
+    p.add_argument("--presence-interval", type=float, default=1.0)
+    p.add_argument("--dm-reliable", action="store_true")
+    p.add_argument("--compress-threshold", type=int, default=512)
+    p.add_argument("--broadcast-ip", default="127.255.255.255")
+    p.add_argument("--transport", choices=["broadcast", "multicast"], default="broadcast")
+    p.add_argument("--mcast-group", default="239.255.77.200")
+    p.add_argument("--mcast-iface", default="127.0.0.1", help="멀티캐스트 인터페이스 주소")
+    p.add_argument("--base-port", type=int, default=46000,
+                   help="presence=base, 로비=base+1, DM=base+100+i")
+    p.add_argument("--spawn-server", action="store_true", help="임시 DB로 수집 서버를 띄워 함께 측정")
+    p.add_argument("--server-host", default="127.0.0.1")
+    p.add_argument("--server-udp-port", type=int, default=None)
+    p.add_argument("--server-http-port", type=int, default=None)
+    p.add_argument("--server-db", default=None, help="수집 지연 계산에 읽을 서버 DB 경로")
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--json", action="store_true", help="결과를 JSON 한 줄로 출력")
+    args = p.parse_args()
+    args.sizes = [int(x) for x in args.sizes.split(",")]
+
+    server_proc = None
+    if args.spawn_server:
+        args.server_udp_port = args.server_udp_port or args.base_port + 2
+        args.server_http_port = args.server_http_port or args.base_port + 80
+        args.server_db = os.path.join(tempfile.mkdtemp(prefix="tipoff-loadgen-"), "tipoff.db")
+        server_proc = multiprocessing.Process(
+            target=_run_server, args=(args.server_db, args.server_http_port, args.server_udp_port), daemon=True)
+        server_proc.start()
+        if not _wait_http(args.server_http_port):
+            sys.exit("서버 시작 실패")
+
+    procs = max(1, min(args.procs, args.peers))
+    groups = [list(range(args.peers))[i::procs] for i in range(procs)]
+    t_start = time.time() + args.warmup
+    t_stop = t_start + args.duration
+    try:
+        if procs == 1:
+            results = [_worker(args, groups[0], t_start, t_stop)]
+        else:
+            with multiprocessing.Pool(procs) as pool:
+                results = pool.starmap(_worker, [(args, g, t_start, t_stop) for g in groups])
+        ingest = None
+        if args.server_db:
+            time.sleep(0.5)  # 수집기 큐 비우기
+            sent = sum(r["sent_lobby"] + r["sent_dm"] for r in results)
+            ingest = server_ingest(args.server_db, t_start - 1, sent)
+    finally:
+        if server_proc:
+            server_proc.terminate()
+
+    total = {k: sum(r[k] for r in results) for k in results[0] if not k.startswith("lat_")}
+    lat_lobby = [x for r in results for x in r["lat_lobby"]]
+    lat_dm = [x for r in results for x in r["lat_dm"]]
+    exp_lobby = total["sent_lobby"] * (args.peers - 1)
+    exp_dm = total["sent_dm"]
+    report = {
+        "peers": args.peers, "procs": procs, "duration": args.duration,
+        "lobby_rate": args.lobby_rate, "dm_rate": args.dm_rate, "sizes": args.sizes,
+        "dm_reliable": args.dm_reliable, "transport": args.transport,
+        "lobby": {"sent": total["sent_lobby"], "expected": exp_lobby, "delivered": total["recv_lobby"],
+                  "loss": round(1 - total["recv_lobby"] / exp_lobby, 5) if exp_lobby else None,
+                  "latency_ms": percentiles(lat_lobby)},
+        "dm": {"sent": exp_dm, "delivered": total["recv_dm"], "no_route": total["dm_no_route"],
+               "failed": total["dm_failed"], "retransmits": total["retransmits"],
+               "loss": round(1 - total["recv_dm"] / exp_dm, 5) if exp_dm else None,
+               "latency_ms": percentiles(lat_dm)},
+        "throughput": {"msgs_per_sec": round((total["recv_lobby"] + total["recv_dm"]) / args.duration, 1),
+                       "kb_per_sec": round(total["recv_bytes"] / 1024 / args.duration, 1)},
+        "presence": {"roster_complete": total["roster_complete"], "of": args.peers},
+        "server": ingest,
+    }
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False))
+        return
+    print(f"peers={args.peers} procs={procs} duration={args.duration}s "
+          f"lobby={args.lobby_rate}/s dm={args.dm_rate}/s sizes={args.sizes}")
+    for kind in ("lobby", "dm"):
+        r = report[kind]
+        lat = r["latency_ms"]
+        loss = "-" if r["loss"] is None else f"{r['loss'] * 100:.2f}%"
+        print(f"{kind:<6} sent={r['sent']:<7} delivered={r['delivered']:<8} loss={loss:<8} "
+              f"p50={lat['p50']}ms p90={lat['p90']}ms p99={lat['p99']}ms max={lat['max']}ms")
+    print(f"throughput {report['throughput']['msgs_per_sec']} msgs/s, {report['throughput']['kb_per_sec']} KB/s")
+    print(f"presence roster complete {total['roster_complete']}/{args.peers}")
+    if ingest:
+        lag = ingest["lag_ms"]
+        print(f"server stored={ingest['stored']}/{ingest['sent']} "
+              f"ingest lag p50={lag['p50']}ms p99={lag['p99']}ms max={lag['max']}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,16 @@
 #!/usr/bin/env python3
 """
 TipOff 서버 실행 스크립트
+
+    python run_server.py                                   # 서버 실행 (단일 프로세스)
+    python run_server.py --workers 4 --http-port 8080      # 수집기 1 + API 워커 4 프로세스
+    TIPOFF_WORKERS=4 TIPOFF_ARCHIVE_BLOCK_CACHE=64 python run_server.py   # 같은 설정을 ENV로
+    python run_server.py export -o dump.ndjson --room lobby --since 2024-01-01
+    python run_server.py import dump.ndjson [--db other.db]
+    python run_server.py archive --older-than-days 180    # 오래된 메시지를 콜드 스토리지로
+
+서버 설정(ServerBridgeConfig, SupervisorConfig)의 모든 필드는 --필드-이름 옵션과
+TIPOFF_필드_이름 환경변수로 바꿀 수 있음 (우선순위: CLI > ENV > 기본값, python run_server.py -h)
 """
 import sys
 import os
@@ -9,21 +19,65 @@ import os
 project_root = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, project_root)
 
+from dataclasses import fields
+from typing import Optional, get_type_hints
+
 from app.server.bridge import ServerBridge, ServerBridgeConfig
+from app.server.supervisor import SupervisorConfig, serve_multiprocess
+from app.core.log import setup_logging
+
+ENV_PREFIX = "TIPOFF_"
+# 별도 옵션(--db, --enable-import)으로 받는 필드
+_SPECIAL_FIELDS = {"db_path", "import_enabled"}
+
+def _str2bool(v: str) -> bool:
+    s = str(v).strip().lower()
+    if s in ("1", "true", "yes", "on"):
+        return True
+    if s in ("0", "false", "no", "off"):
+        return False
+    raise ValueError(f"bool 값이 아님: {v}")
+_str2bool.__name__ = "bool"  # argparse 오류 메시지용
+
+def _env_default(name: str, conv, default):
+    raw = os.environ.get(ENV_PREFIX + name.upper())
+    if raw is None or raw == "":
+        return default
+    try:
+        return conv(raw)
+    except ValueError:
+        raise SystemExit(f"{ENV_PREFIX}{name.upper()}={raw!r}: {conv.__name__} 값이 아님")
+
+def _add_config_options(p, cls):
+    """dataclass 설정 필드를 --필드-이름 옵션으로 추가 (기본값은 TIPOFF_필드_이름 ENV > 필드 기본값)"""
+    g = p.add_argument_group(cls.__name__)
+    hints = get_type_hints(cls)
+    for f in fields(cls):
+        if f.name in _SPECIAL_FIELDS:
+            continue
+        tp = hints[f.name]
+        if tp == Optional[str]:
+            tp = str
+        conv = _str2bool if tp is bool else tp
+        g.add_argument("--" + f.name.replace("_", "-"), dest=f.name, type=conv,
+                       default=_env_default(f.name, conv, f.default), metavar=tp.__name__.upper(),
+                       help=f"(ENV {ENV_PREFIX}{f.name.upper()}, 기본: %(default)s)")
+
+def _build_config(args, cls, **extra):
+    return cls(**{f.name: getattr(args, f.name) for f in fields(cls) if f.name not in _SPECIAL_FIELDS}, **extra)
+
+def serve(args):
+    config = _build_config(args, ServerBridgeConfig, db_path=args.db, import_enabled=args.enable_import)
+    sup = _build_config(args, SupervisorConfig)
+    if sup.workers > 0:
+        # 수집기 1 + API 워커 N 프로세스 (SIGTERM/Ctrl+C로 종료)
+        print(f"=== TipOff 서버 시작 (멀티 프로세스: API 워커 {sup.workers}) ===")
+        serve_multiprocess(config, sup)
+        return
 
-def main():
     print("=== TipOff 서버 시작 ===")
-    
-    # 서버 설정
-    config = ServerBridgeConfig(
-        db_path="tipoff.db",
-        http_port=8080,
-        udp_listen_port=5002,
-        host="0.0.0.0"
-    )
-    
     server = ServerBridge(config)
-    
+
     try:
         server.start()
         print("\n서버가 실행 중입니다.")
@@ -31,16 +85,102 @@ def main():
         print("- HTTP API:", f"http://{config.host}:{config.http_port}")
         print("- UDP 수집:", f"{config.host}:{config.udp_listen_port}")
         print("\nCtrl+C로 서버를 종료할 수 있습니다.")
-        
+
         # 무한 대기
         while True:
             import time
             time.sleep(1)
-            
+
     except KeyboardInterrupt:
         print("\n\n서버를 종료합니다...")
         server.stop()
         print("서버 종료 완료")
 
+def export(args):
+    """DB에서 직접 NDJSON으로 내보내기 (서버 실행 여부와 무관)"""
+    from app.db.database import DatabaseManager
+    from app.db import transfer
+    db = DatabaseManager(args.db)
+    filters = dict(
+        room_id=args.room,
+        since=transfer.parse_time(args.since),
+        until=transfer.parse_time(args.until),
+        types=transfer.parse_types(args.type),
+        after_id=args.after_id,
+        limit=args.limit,
+    )
+    if args.output == "-":
+        n = transfer.export_ndjson(db, sys.stdout.buffer, **filters)
+    else:
+        with open(args.output, "wb") as f:
+            n = transfer.export_ndjson(db, f, **filters)
+    print(f"{n}개 메시지 내보냄", file=sys.stderr)
+
+def import_(args):
+    """NDJSON 파일을 DB로 일괄 가져오기 (msg_id 중복은 건너뜀)"""
+    from app.db.database import DatabaseManager
+    from app.db import transfer
+    db = DatabaseManager(args.db)
+    if args.input == "-":
+        result = transfer.import_ndjson(db, sys.stdin.buffer, batch=args.batch)
+    else:
+        with open(args.input, "rb") as f:
+            result = transfer.import_ndjson(db, f, batch=args.batch)
+    print(f"읽음 {result['read']}, 저장 {result['inserted']}, 중복 {result['duplicates']}, "
+          f"오류 {result['invalid']} ({result['elapsed_ms']:.0f}ms)", file=sys.stderr)
+
+def archive_(args):
+    """오래된 메시지를 압축 세그먼트로 이동 (히스토리 조회는 자동으로 아카이브까지 확인)"""
+    from app.db.database import DatabaseManager
+    db = DatabaseManager(args.db, archive_dir=args.archive_dir)
+    result = db.archive_older_than(args.older_than_days)
+    if result["segment"] is None:
+        print("아카이브할 메시지 없음", file=sys.stderr)
+    else:
+        print(f"{result['segment']}: {result['rows']}건, {result['bytes'] / 1e6:.1f}MB "
+              f"({result['elapsed_ms']:.0f}ms)", file=sys.stderr)
+
+def parse_args(argv=None):
+    import argparse
+    p = argparse.ArgumentParser(description="TipOff 서버")
+    p.add_argument("--db", default=_env_default("db", str, "tipoff.db"), help="DB 파일 경로 (ENV TIPOFF_DB)")
+    p.add_argument("--enable-import", action="store_true",
+                   default=_env_default("enable_import", _str2bool, False),
+                   help="POST /api/import 허용 (ENV TIPOFF_ENABLE_IMPORT, 단일 프로세스 모드만)")
+    _add_config_options(p, ServerBridgeConfig)
+    _add_config_options(p, SupervisorConfig)
+    sub = p.add_subparsers(dest="command")
+
+    ex = sub.add_parser("export", help="메시지를 NDJSON으로 내보내기")
+    ex.add_argument("-o", "--output", default="-", help="출력 파일 (기본: stdout)")
+    ex.add_argument("--room", help="룸 ID")
+    ex.add_argument("--since", help="시작 시각 (epoch 또는 ISO, 포함)")
+    ex.add_argument("--until", help="끝 시각 (epoch 또는 ISO, 제외)")
+    ex.add_argument("--type", help="메시지 타입 (lobby,dm)")
+    ex.add_argument("--after-id", type=int, default=0, help="이 id 이후부터 (이어받기)")
+    ex.add_argument("--limit", type=int, help="최대 메시지 수")
+
+    im = sub.add_parser("import", help="NDJSON 메시지 가져오기")
+    im.add_argument("input", help="입력 파일 (-: stdin)")
+    im.add_argument("--batch", type=int, default=ServerBridgeConfig.import_batch, help="트랜잭션당 행 수")
+
+    ar = sub.add_parser("archive", help="오래된 메시지를 콜드 스토리지로 이동")
+    ar.add_argument("--older-than-days", type=float, required=True)
+    ar.add_argument("--archive-dir", help="세그먼트 디렉터리 (기본: <db>.archive)")
+    return p.parse_args(argv)
+
+def main():
+    args = parse_args()
+    # LOG_LEVEL=DEBUG면 메시지별 저장 로그(초당 제한)까지 출력
+    setup_logging(os.environ.get("LOG_LEVEL", "INFO"))
+    if args.command == "export":
+        export(args)
+    elif args.command == "import":
+        import_(args)
+    elif args.command == "archive":
+        archive_(args)
+    else:
+        serve(args)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,36 @@
+import json
+from datetime import datetime
+
+from app.db.models import User
+from app.server.active import ActiveUserSet
+
+
+def _user(uid, room, ts):
+    return User(user_id=uid, anon_nick=uid, last_seen=datetime.fromtimestamp(ts), room_id=room)
+
+
+def test_unknown_rooms_leave_no_entries():
+    s = ActiveUserSet(window_sec=60)
+    for i in range(1000):
+        assert json.loads(s.response(f"room{i}")) == {"users": []}
+    assert s._cache == {} and s._expires == {} and s._rooms == {}
+
+
+def test_room_entries_dropped_when_last_member_expires(monkeypatch):
+    s = ActiveUserSet(window_sec=60)
+    now = 1_700_000_000.0
+    monkeypatch.setattr("app.server.active.time.time", lambda: now)
+    s.touch(_user("a", "dev", now))
+    assert [u["user_id"] for u in json.loads(s.response("dev"))["users"]] == ["a"]
+    assert "dev" in s._cache
+
+    now += 61
+    assert json.loads(s.response("dev")) == {"users": []}
+    assert s._cache == {} and s._expires == {} and s._rooms == {} and s._room_of == {}
+
+
+def test_moving_out_of_room_drops_it():
+    s = ActiveUserSet(window_sec=60)
+    s.touch(_user("a", "dev", 1_700_000_000.0))
+    s.touch(_user("a", "ops", 1_700_000_001.0))
+    assert set(s._rooms) == {"ops"}
@@ -0,0 +1,27 @@
+import threading
+
+from app.net.server_client import CircuitBreaker
+
+
+def test_opens_at_threshold_and_probe_closes():
+    healthy = threading.Event()
+    probed = threading.Event()
+
+    def probe():
+        probed.set()
+        return healthy.is_set()
+
+    br = CircuitBreaker(threshold=3, probe_interval=0.01, probe=probe)
+    br.record_failure()
+    br.record_failure()
+    assert br.allow()
+    br.record_success()  # 성공하면 연속 실패 카운트 초기화
+    br.record_failure()
+    br.record_failure()
+    assert br.allow()
+    br.record_failure()
+    assert not br.allow() and br.is_open
+    assert probed.wait(1.0) and br.is_open  # 서버가 아직 죽어 있으면 계속 열림
+    healthy.set()
+    br._probe_th.join(1.0)
+    assert br.allow() and not br.is_open
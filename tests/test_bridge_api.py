@@ -0,0 +1,74 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from app.db.database import DatabaseManager
+from app.server.bridge import ServerBridgeConfig, configure_handler, make_http_server
+
+
+@pytest.fixture(scope="module")
+def api(tmp_path_factory):
+    db = DatabaseManager(str(tmp_path_factory.mktemp("api") / "tipoff.db"))
+    config = ServerBridgeConfig(host="127.0.0.1", http_port=0)
+    configure_handler(config, db)
+    server = make_http_server(config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _status(url, body=None):
+    data = None if body is None else json.dumps(body).encode()
+    try:
+        with urllib.request.urlopen(url, data) as r:
+            json.loads(r.read())
+            return r.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+@pytest.mark.parametrize("qs", [
+    "limit=abc", "limit=0", "before=yesterday", "before_id=x", "before_id=999",
+    "after_id=-1", "from=a&sess=s&seq_from=x", "from=a&sess=s&seq_from=1&seq_to=5000",
+    "from=a&sess=s&seq_from=5&seq_to=1",
+])
+def test_lobby_bad_params_are_400(api, qs):
+    assert _status(f"{api}/api/messages/lobby?room_id=lobby&{qs}") == 400
+
+
+def test_dm_bad_params_are_400(api):
+    assert _status(f"{api}/api/messages/dm?user1=a&user2=b&limit=x") == 400
+    assert _status(f"{api}/api/messages/dm?user1=a&user2=b&before=nope") == 400
+
+
+def test_good_params_are_200(api):
+    assert _status(f"{api}/api/messages/lobby?room_id=lobby&limit=10&before=1700000000") == 200
+    assert _status(f"{api}/api/messages/lobby?room_id=lobby&from=a&sess=s&seq_from=1&seq_to=256") == 200
+
+
+@pytest.mark.parametrize("qs", ["limit=-1", "after_id=-5", "limit=x"])
+def test_export_bad_params_are_400(api, qs):
+    assert _status(f"{api}/api/export?{qs}") == 400
+
+
+@pytest.mark.parametrize("seq", ["x", 1.9, True, -1, [1]])
+def test_read_bad_seq_is_400(api, seq):
+    assert _status(f"{api}/api/read", {"user_id": "a", "room_id": "lobby", "seq": seq}) == 400
+
+
+def test_read_ok(api):
+    assert _status(f"{api}/api/read", {"user_id": "a", "room_id": "lobby", "seq": 0}) == 200
+    assert _status(f"{api}/api/read", {"user_id": "a", "room_id": "lobby"}) == 200
+
+
+@pytest.mark.parametrize("limit", ["-1", "0", "101", "1000000"])
+def test_top_talkers_bad_limit_is_400(api, limit):
+    assert _status(f"{api}/api/analytics?view=top_talkers&limit={limit}") == 400
+
+
+def test_top_talkers_ok(api):
+    assert _status(f"{api}/api/analytics?view=top_talkers&limit=100") == 200
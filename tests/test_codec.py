@@ -0,0 +1,24 @@
+import zlib
+
+from app.net.codec import ZMAGIC, decode_message, encode_message
+
+MSG = {"type": "lobby", "room_id": "lobby", "text": "반복되는 긴 본문 " * 200}
+
+
+def test_default_sends_plain_json():
+    # 구버전 피어 호환 - 기본값은 압축하지 않음
+    assert encode_message(MSG)[:1] == b"{"
+
+
+def test_compressed_roundtrip():
+    data = encode_message(MSG, threshold=512)
+    assert data.startswith(ZMAGIC)
+    assert decode_message(data) == MSG
+    assert decode_message(encode_message({"a": 1}, threshold=512)) == {"a": 1}
+
+
+def test_decode_rejects_bomb_and_garbage():
+    bomb = ZMAGIC + zlib.compress(b"{" + b" " * (4 << 20) + b"}")
+    assert decode_message(bomb) is None
+    assert decode_message(ZMAGIC + b"not zlib") is None
+    assert decode_message(b"[1, 2]") is None
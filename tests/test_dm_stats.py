@@ -0,0 +1,24 @@
+import pytest
+
+from app.net.aio import AsyncDmService
+from app.net.dm import DmConfig, RttEstimator, dm_stats
+
+KEYS = {"sent", "acked", "retransmits", "lost", "duplicates", "pending",
+        "srtt_ms", "rttvar_ms", "rto_ms", "loss_rate", "retransmit_rate"}
+
+
+def test_dm_stats_keys_and_rates():
+    rtt = RttEstimator(0.2, 3.0)
+    empty = dm_stats({"sent": 0, "acked": 0, "retransmits": 0, "lost": 0, "duplicates": 0}, 0, rtt)
+    assert set(empty) == KEYS and empty["loss_rate"] == 0.0 and empty["rttvar_ms"] is None
+    rtt.sample(0.1)
+    out = dm_stats({"sent": 10, "acked": 6, "retransmits": 5, "lost": 2, "duplicates": 1}, 2, rtt)
+    assert out["loss_rate"] == 0.25 and out["retransmit_rate"] == 0.5
+    assert out["srtt_ms"] == pytest.approx(100) and out["rttvar_ms"] == pytest.approx(50)
+    assert out["rto_ms"] == pytest.approx(300)
+
+
+def test_async_dm_service_reports_same_keys():
+    svc = AsyncDmService(DmConfig(user_id="a", room_id="lobby", anon_nick="n", listen_port=0,
+                                  enable_server=False, reliable=True))
+    assert set(svc.stats()) == KEYS
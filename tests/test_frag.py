@@ -0,0 +1,53 @@
+import random
+
+from app.net import frag
+from app.net.frag import HEADER, MAGIC, VERSION, Reassembler
+
+PEER = ("10.0.0.1", 5000)
+
+
+def _packet(frag_id, total, offset, body):
+    return HEADER.pack(MAGIC, VERSION, frag_id, total, offset) + body
+
+
+def test_roundtrip_out_of_order_with_duplicates():
+    payload = bytes(random.Random(1).getrandbits(8) for _ in range(5000))
+    packets = frag.fragment(payload, mtu=300)
+    assert len(packets) > 1
+    shuffled = packets + packets[:3]
+    random.Random(2).shuffle(shuffled)
+    r = Reassembler()
+    done = [out for out in (r.feed(p, PEER, now=0.0) for p in shuffled) if out is not None]
+    assert [bytes(d) for d in done] == [payload]
+    assert r.stats["completed"] == 1
+
+
+def test_small_payload_passes_through():
+    assert Reassembler().feed(b'{"type":"lobby"}', PEER) == b'{"type":"lobby"}'
+
+
+def test_overlapping_fragments_do_not_complete_with_hole():
+    r = Reassembler()
+    fid = b"A" * 8
+    # 0..60, 40..100 → received가 total(100)에 도달하지만 실제로는 겹쳐서 채워짐
+    assert r.feed(_packet(fid, 100, 0, b"a" * 60), PEER, now=0.0) is None
+    assert r.feed(_packet(fid, 100, 40, b"b" * 60), PEER, now=0.0) is None
+    assert r.stats["dropped"] == 1 and r.stats["completed"] == 0
+    # 빈 구간을 정확히 채우면 완성
+    out = r.feed(_packet(fid, 100, 60, b"c" * 40), PEER, now=0.0)
+    assert bytes(out) == b"a" * 60 + b"c" * 40
+
+
+def test_hostile_fragments_are_dropped():
+    r = Reassembler(max_message=1000)
+    fid = b"B" * 8
+    assert r.feed(_packet(fid, 5000, 0, b"x" * 10), PEER, now=0.0) is None      # 상한 초과
+    assert r.feed(_packet(fid, 100, 95, b"x" * 10), PEER, now=0.0) is None      # 범위 밖
+    assert r.feed(_packet(fid, 100, 0, b""), PEER, now=0.0) is None             # 빈 본문
+    assert r.feed(_packet(fid, 100, 10, b"x" * 80), PEER, now=0.0) is None
+    assert r.feed(_packet(fid, 100, 0, b"y" * 20), PEER, now=0.0) is None       # 앞 구간과 겹침
+    assert r.feed(_packet(fid, 100, 85, b"y" * 15), PEER, now=0.0) is None      # 뒤 구간과 겹침
+    assert r.stats["dropped"] == 5 and r.stats["completed"] == 0
+    # 미완성 메시지는 timeout 후 폐기
+    r.feed(_packet(b"C" * 8, 50, 0, b"z" * 10), PEER, now=10.0)
+    assert r.stats["expired"] == 1
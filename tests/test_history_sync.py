@@ -0,0 +1,74 @@
+import json
+import time
+import uuid
+from datetime import datetime
+
+from app.core.history import HistoryManager
+from app.core.store import LocalHistoryStore, lobby_conv
+from app.db.models import Message, MessageType
+from app.server.msgjson import encode_messages
+
+
+class FakeBus:
+    def __init__(self):
+        self.events = []
+
+    def post(self, evt, **ev):
+        self.events.append((evt, ev))
+
+    def pages(self):
+        return [ev for evt, ev in self.events if evt == "history_page"]
+
+
+class DbClient:
+    """ServerClient.get_lobby_messages와 같은 응답을 DatabaseManager에서 바로 만듦"""
+    def __init__(self, db):
+        self.db = db
+
+    def get_lobby_messages(self, room_id, limit=50, before=None, after_id=None, before_id=None):
+        if after_id is not None:
+            rows = self.db.get_lobby_rows_after(room_id, after_id, limit)
+        else:
+            before = datetime.fromisoformat(before).timestamp() if before else None
+            rows = self.db.get_lobby_rows(room_id, limit, before, before_id)
+        return json.loads(encode_messages(rows))["messages"]
+
+
+def _save(db, n, t0):
+    for i in range(n):
+        db.save_message(Message(msg_id=uuid.uuid4().hex, room_id="lobby", message_type=MessageType.LOBBY,
+                                from_user_id="alice", nick="a", text=f"m{i}",
+                                timestamp=datetime.fromtimestamp(t0 + i)))
+
+
+def test_incremental_sync_pages_past_limit(db, tmp_path):
+    store = LocalHistoryStore(str(tmp_path / "history.db"))
+    hm = HistoryManager(DbClient(db), store)
+    _save(db, 30, 1_700_000_000)
+    hm._load_lobby_pages(FakeBus(), "lobby", 10, 5, time.perf_counter())
+    synced = store.last_synced_id(lobby_conv("lobby"))
+
+    # 오프라인 동안 limit(10)보다 훨씬 많은 메시지가 쌓임
+    _save(db, 37, 1_700_001_000)
+    bus = FakeBus()
+    hm._load_lobby_pages(bus, "lobby", 10, 5, time.perf_counter())
+    new = [m for ev in bus.pages() if not ev["older"] for m in ev["messages"]]
+    assert len(new) == 37
+    ids = [m["id"] for m in new]
+    assert ids == sorted(ids) and ids[0] == synced + 1
+    assert store.last_synced_id(lobby_conv("lobby")) == ids[-1]
+
+
+def test_live_only_cache_is_merged_in_order(db, tmp_path):
+    store = LocalHistoryStore(str(tmp_path / "history.db"))
+    _save(db, 20, 1_700_000_000)
+    # 지난 세션에 실시간으로만 받은 메시지 (server_id 없음)
+    store.add_messages(lobby_conv("lobby"), [
+        {"msg_id": "live-1", "from_uid": "bob", "nick": "b", "text": "old live", "ts": 1_600_000_000.0},
+    ])
+    bus = FakeBus()
+    HistoryManager(DbClient(db), store)._load_lobby_pages(bus, "lobby", 10, 5, time.perf_counter())
+    pages = bus.pages()
+    assert len(pages) == 1
+    stamps = [m["timestamp"] for m in pages[0]["messages"]]
+    assert stamps == sorted(stamps) and len(stamps) == 10
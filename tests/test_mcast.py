@@ -0,0 +1,76 @@
+import select
+import socket
+import time
+
+import pytest
+
+from app.net import mcast
+from app.net.lobby import LobbyConfig, LobbyService
+
+GROUPS = "dev=239.255.77.11,ops=239.255.77.12"
+
+
+class FakeBus:
+    def __init__(self):
+        self.events = []
+
+    def post(self, evt, **ev):
+        self.events.append((evt, ev))
+
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _cfg(user_id, room_id, port):
+    return LobbyConfig(user_id=user_id, room_id=room_id, anon_nick=user_id, broadcast_ip="127.255.255.255",
+                       port=port, enable_server=False, transport="multicast",
+                       mcast_group=mcast.room_group(room_id, room_groups=GROUPS), mcast_iface="127.0.0.1")
+
+
+def _wait(pred, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not pred() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return pred()
+
+
+def test_room_group_mapping():
+    assert mcast.room_group("dev", room_groups=GROUPS) == "239.255.77.11"
+    assert mcast.room_group("x", span=1) == mcast.DEFAULT_GROUP
+    assert mcast.room_group("x") == mcast.room_group("x")
+    with pytest.raises(ValueError):
+        mcast.parse_room_groups("dev=10.0.0.1")
+
+
+def test_two_rooms_share_a_port_without_crosstalk():
+    port = _free_port()
+    try:
+        probe = mcast.open_socket(_cfg("probe", "ops", port), port=port)
+    except OSError as e:
+        pytest.skip(f"127.0.0.1 멀티캐스트 미지원: {e}")
+    dev_bus, ops_bus = FakeBus(), FakeBus()
+    dev = LobbyService(_cfg("r-dev", "dev", port), dev_bus)
+    ops = LobbyService(_cfg("r-ops", "ops", port), ops_bus)
+    sender = LobbyService(_cfg("s-dev", "dev", port), FakeBus())
+    dev.start()
+    ops.start()
+    try:
+        sender.send_lobby("hello dev")
+        assert _wait(lambda: dev_bus.events)
+        (evt, ev), = dev_bus.events
+        assert evt == "lobby_chat" and ev["text"] == "hello dev" and not ev["recovered"]
+        # 다른 그룹에 가입한 소켓에는 패킷 자체가 오지 않음 (room_id 필터 이전 단계)
+        assert select.select([probe], [], [], 0.3)[0] == []
+        assert ops_bus.events == []
+        # 같은 포트의 ops 그룹은 정상 수신
+        LobbyService(_cfg("s-ops", "ops", port), FakeBus()).send_lobby("hello ops")
+        assert _wait(lambda: ops_bus.events)
+        assert ops_bus.events[0][1]["text"] == "hello ops" and len(dev_bus.events) == 1
+        assert select.select([probe], [], [], 1.0)[0] == [probe]
+    finally:
+        dev.stop()
+        ops.stop()
+        probe.close()
@@ -0,0 +1,46 @@
+import sqlite3
+
+from app.db import migrations
+from app.db.migrations import MIGRATIONS, SCHEMA_VERSION, audit_query_plans, get_version, migrate
+
+
+def test_fresh_db_reaches_latest_and_passes_audit(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "t.db"))
+    assert migrate(conn) == SCHEMA_VERSION == MIGRATIONS[-1][0]
+    assert audit_query_plans(conn) == []
+    assert migrate(conn) == SCHEMA_VERSION  # 다시 실행해도 변화 없음
+
+
+def test_failed_step_rolls_back_and_resumes(tmp_path, monkeypatch):
+    path = str(tmp_path / "t.db")
+    conn = sqlite3.connect(path)
+
+    def boom(c):
+        c.execute("CREATE TABLE half_done (x)")
+        raise RuntimeError("중간 실패")
+    broken = [m if m[0] != 5 else (5, m[1], boom) for m in MIGRATIONS]
+    monkeypatch.setattr(migrations, "MIGRATIONS", broken)
+    try:
+        migrate(conn)
+    except RuntimeError:
+        pass
+    assert get_version(conn) == 4
+    assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'half_done'").fetchone() is None
+
+    monkeypatch.setattr(migrations, "MIGRATIONS", MIGRATIONS)
+    assert migrate(conn) == SCHEMA_VERSION
+
+
+def test_rollup_backfill_on_upgrade(tmp_path, monkeypatch):
+    conn = sqlite3.connect(str(tmp_path / "t.db"))
+    monkeypatch.setattr(migrations, "MIGRATIONS", MIGRATIONS[:7])
+    migrate(conn)
+    rows = [(f"m{i}", "lobby", "lobby", f"u{i % 3}", "n", "t", 7200.0 + i * 60, 0.0) for i in range(90)]
+    with conn:
+        conn.executemany("INSERT INTO messages (msg_id, room_id, message_type, from_user_id, nick, text, "
+                         "timestamp, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    monkeypatch.setattr(migrations, "MIGRATIONS", MIGRATIONS)
+    migrate(conn)
+    assert conn.execute("SELECT SUM(messages) FROM activity_hour").fetchone()[0] == 90
+    assert conn.execute("SELECT SUM(messages) FROM activity_minute").fetchone()[0] == 90
+    assert conn.execute("SELECT COUNT(*), SUM(messages) FROM talker_hour").fetchone() == (6, 90)
@@ -0,0 +1,40 @@
+import json
+import time
+
+from app.db.transfer import row_from_record
+from app.server.bridge import MessageCollectorService, ServerBridgeConfig
+from app.server.msgjson import encode_messages
+
+
+def _row(seq, mid=1):
+    return (mid, f"m{mid}", "lobby", "lobby", "alice", None, "nick", "hi \"there\"", seq, "s1",
+            1700000000.5, 1700000001.0)
+
+
+def test_encode_matches_json_dumps():
+    body = json.loads(encode_messages([_row(3), _row(None, 2)]))
+    assert [m["seq"] for m in body["messages"]] == [3, None]
+    assert body["messages"][0]["text"] == 'hi "there"'
+
+
+def test_encode_non_int_seq():
+    # 예전에 저장된 정수가 아닌 seq가 있어도 페이지 전체가 실패하지 않음
+    body = json.loads(encode_messages([_row("oops"), _row(1.5, 2)], ts_format="epoch"))
+    assert [m["seq"] for m in body["messages"]] == ["oops", 1.5]
+    assert body["messages"][0]["timestamp"] == 1700000000.5
+
+
+def test_collector_drops_non_int_seq(db):
+    collector = MessageCollectorService(ServerBridgeConfig(), db)
+    collector._save_message_to_db({"type": "chat", "msg_id": "x1", "room_id": "lobby", "from": "alice",
+                                   "nick": "a", "text": "hi", "ts": time.time(), "seq": "oops",
+                                   "sess": "s"}, ("127.0.0.1", 1))
+    rows = db.get_lobby_rows("lobby", 10)
+    assert len(rows) == 1 and rows[0][8] is None
+    assert json.loads(encode_messages(rows))["messages"][0]["seq"] is None
+
+
+def test_import_drops_non_int_seq():
+    row = row_from_record({"msg_id": "x", "type": "lobby", "seq": "oops"}, now=1.0)
+    assert row[9] is None
+    assert row_from_record({"msg_id": "x", "type": "lobby", "seq": 7}, now=1.0)[9] == 7
@@ -0,0 +1,45 @@
+import time
+
+from app.db.models import Message, MessageType
+from datetime import datetime
+
+
+def _save_burst(db, n, ts, room="lobby", dm=False):
+    # 같은 timestamp에 n개 - 페이지 경계가 같은 시각 메시지 사이에 걸리도록
+    for i in range(n):
+        db.save_message(Message(
+            msg_id=f"{'d' if dm else 'l'}{ts}-{i}", room_id=room,
+            message_type=MessageType.DM if dm else MessageType.LOBBY,
+            from_user_id="alice" if i % 2 else "bob", to_user_id=("bob" if i % 2 else "alice") if dm else None,
+            nick="n", text=str(i), timestamp=datetime.fromtimestamp(ts)))
+
+
+def _walk(fetch, limit):
+    seen, before, before_id = [], None, None
+    while True:
+        rows = fetch(limit, before, before_id)
+        seen = [r[0] for r in rows] + seen
+        if len(rows) < limit:
+            return seen
+        before, before_id = rows[0][10], rows[0][0]
+
+
+def test_keyset_paging_keeps_timestamp_ties(db):
+    t0 = time.time() - 3600
+    _save_burst(db, 7, t0)
+    _save_burst(db, 5, t0 + 1)
+    _save_burst(db, 6, t0, dm=True)
+    lobby = _walk(lambda n, b, bid: db.get_lobby_rows("lobby", n, b, bid), 4)
+    assert len(lobby) == 12 and len(set(lobby)) == 12
+    dm = _walk(lambda n, b, bid: db.get_dm_rows("alice", "bob", n, b, bid), 4)
+    assert len(dm) == 6 and len(set(dm)) == 6
+
+
+def test_keyset_paging_across_archive(db):
+    t0 = time.time() - 40 * 86400
+    _save_burst(db, 9, t0)
+    _save_burst(db, 3, time.time() - 60)
+    db.archive_older_than(30)
+    # 아카이브로 옮긴 행은 hot에서 timestamp를 찾을 수 없으므로 before를 함께 넘김
+    lobby = _walk(lambda n, b, bid: db.get_lobby_rows("lobby", n, b, bid), 4)
+    assert len(lobby) == 12 and len(set(lobby)) == 12
@@ -0,0 +1,19 @@
+from datetime import datetime, timedelta
+
+from app.db.models import Room, User
+from app.server.bridge import MessageCollectorService, ServerBridgeConfig
+
+
+def _active(db, room_id="lobby"):
+    return {r.room_id: r.active_users for r in db.get_rooms()}.get(room_id)
+
+
+def test_room_activity_uses_configured_window(db):
+    db.save_room(Room(room_id="lobby", name="로비"))
+    db.save_user(User(user_id="u1", anon_nick="n", last_seen=datetime.now() - timedelta(minutes=20)))
+    db.save_user(User(user_id="u2", anon_nick="n", last_seen=datetime.now()))
+
+    MessageCollectorService(ServerBridgeConfig(active_window_sec=900), db)._refresh_room_activity()
+    assert _active(db) == 1
+    MessageCollectorService(ServerBridgeConfig(active_window_sec=1800), db)._refresh_room_activity()
+    assert _active(db) == 2
@@ -0,0 +1,36 @@
+from app.net.seq import MAX_GAP_SPAN, ReorderBuffer
+
+KEY = ("alice", "s1")
+
+
+def _texts(msgs):
+    return [m["t"] for m in msgs]
+
+
+def test_reorders_within_wait():
+    buf = ReorderBuffer(wait_sec=1.0)
+    assert _texts(buf.push(KEY, 1, {"t": 1}, now=0.0)) == [1]
+    assert buf.push(KEY, 3, {"t": 3}, now=0.1) == []
+    assert buf.push(KEY, 1, {"t": 1}, now=0.1) == []  # 중복
+    assert _texts(buf.push(KEY, 2, {"t": 2}, now=0.2)) == [2, 3]
+    assert buf.next_deadline() is None
+
+
+def test_gap_reported_after_wait():
+    buf = ReorderBuffer(wait_sec=1.0)
+    buf.push(KEY, 1, {"t": 1}, now=0.0)
+    buf.push(KEY, 4, {"t": 4}, now=0.5)
+    assert buf.next_deadline() == 1.5
+    assert buf.expire(now=1.0) == ([], [])
+    ready, gaps = buf.expire(now=1.5)
+    assert _texts(ready) == [4] and gaps == [(KEY, 2, 3)]
+    assert buf.push(KEY, 2, {"t": 2}, now=2.0) == []  # gap 처리 후 늦은 도착은 버림
+
+
+def test_huge_gap_is_capped():
+    buf = ReorderBuffer(wait_sec=1.0)
+    buf.push(KEY, 1, {"t": 1}, now=0.0)
+    buf.push(KEY, 10_000_000, {"t": "x"}, now=0.0)
+    _, gaps = buf.expire(now=2.0)
+    (_, lo, hi), = gaps
+    assert hi == 9_999_999 and hi - lo + 1 == MAX_GAP_SPAN
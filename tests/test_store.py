@@ -0,0 +1,61 @@
+from app.core.store import LocalHistoryStore, lobby_conv
+
+
+def _msg(i, server_id=None):
+    return {"id": server_id, "msg_id": f"m{i}", "text": f"t{i}", "nick": "n", "from_uid": "alice",
+            "type": "lobby", "ts": 1_700_000_000 + i}
+
+
+def test_add_dedupes_and_updates_server_id(tmp_path):
+    store = LocalHistoryStore(str(tmp_path / "h.db"))
+    conv = lobby_conv("lobby")
+    assert len(store.add_messages(conv, [_msg(1), _msg(2)])) == 2
+    assert store.last_synced_id(conv) is None
+    # 실시간으로 먼저 받은 메시지가 서버 동기화로 다시 오면 server_id만 채움
+    assert store.add_messages(conv, [_msg(2, server_id=42), _msg(3, server_id=43)]) == [_msg(3, 43)]
+    assert store.last_synced_id(conv) == 43
+    assert [m["msg_id"] for m in store.get_recent(conv, 2)] == ["m2", "m3"]
+
+
+def test_evicts_oldest_over_max(tmp_path):
+    store = LocalHistoryStore(str(tmp_path / "h.db"), max_messages=5)
+    conv = lobby_conv("lobby")
+    store.add_messages(conv, [_msg(i) for i in range(8)])
+    assert [m["msg_id"] for m in store.get_recent(conv, 10)] == [f"m{i}" for i in range(3, 8)]
+
+
+def test_eviction_is_batched(tmp_path):
+    store = LocalHistoryStore(str(tmp_path / "h.db"), max_messages=100)
+    conv = lobby_conv("lobby")
+    store.add_messages(conv, [_msg(i) for i in range(110)])
+    assert len(store.get_recent(conv, 1000)) == 110  # 여유분(10%) 안에서는 삭제하지 않음
+    store.add_messages(conv, [_msg(110)])
+    assert [m["msg_id"] for m in store.get_recent(conv, 1000)][:1] == ["m11"]
+    assert len(store.get_recent(conv, 1000)) == 100
+    # 다시 열어도 개수를 이어서 셈
+    again = LocalHistoryStore(str(tmp_path / "h.db"), max_messages=100)
+    assert again._count == 100
+
+
+def test_record_live_writes_off_caller_thread(tmp_path):
+    import threading
+    from app.core.history import HistoryManager
+
+    store = LocalHistoryStore(str(tmp_path / "h.db"))
+    writers = set()
+    orig = store.add_messages
+
+    def spy(conv, msgs):
+        writers.add(threading.current_thread().name)
+        return orig(conv, msgs)
+    store.add_messages = spy
+    hm = HistoryManager(None, store)
+    for i in range(20):
+        hm.record_live({"type": "chat", "room_id": "lobby", "from": "bob", "nick": "b",
+                        "text": f"t{i}", "msg_id": f"live{i}", "ts": 1_700_000_000 + i})
+    hm.record_live({"type": "dm", "from": "bob", "to": "alice", "text": "hi", "msg_id": "dm1",
+                    "ts": 1_700_000_100})
+    hm.close()
+    assert writers == {"history-writer"}
+    assert len(store.get_recent(lobby_conv("lobby"), 100)) == 20
+    assert [m["msg_id"] for m in store.get_recent("dm:alice:bob")] == ["dm1"]
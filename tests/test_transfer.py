@@ -0,0 +1,56 @@
+import io
+import json
+import time
+
+from app.db import transfer
+
+
+def _ndjson(records):
+    return io.BytesIO(b"".join((r if isinstance(r, bytes) else json.dumps(r).encode()) + b"\n"
+                               for r in records))
+
+
+def test_import_counts_ignore_trigger_writes(db):
+    recs = [{"msg_id": f"m{i}", "type": "lobby", "room_id": f"r{i % 3}", "from": "alice",
+             "text": "hi", "timestamp": 1_700_000_000 + i} for i in range(9)]
+    recs += [{"msg_id": f"d{i}", "type": "dm", "from": "alice", "to": "bob", "text": "hi",
+              "timestamp": 1_700_000_100 + i} for i in range(2)]
+    recs += [recs[0], recs[9]]   # 중복 2
+    recs += [b"{not json"]       # 오류 1
+    result = transfer.import_ndjson(db, _ndjson(recs), batch=4)
+    assert (result["read"], result["inserted"], result["duplicates"], result["invalid"]) == (14, 11, 2, 1)
+
+    again = transfer.import_ndjson(db, _ndjson(recs), batch=4)
+    assert (again["inserted"], again["duplicates"], again["invalid"]) == (0, 13, 1)
+
+
+def test_export_includes_archived_rows(db):
+    now = time.time()
+    # 오래된 행과 최근 행을 번갈아 넣어 hot/아카이브 id가 섞이도록
+    recs = [{"msg_id": f"m{i}", "type": "lobby", "room_id": f"r{i % 2}", "from": "alice",
+             "text": f"hi {i}", "timestamp": now - (40 if i % 3 else 1) * 86400 + i} for i in range(60)]
+    transfer.import_ndjson(db, _ndjson(recs))
+    moved = db.archive_older_than(30)
+    assert moved["rows"] == 40
+
+    ids = [row[0] for row in db.iter_export(batch=7)]
+    assert len(ids) == 60 and ids == sorted(ids)
+
+    r0 = list(db.iter_export(room_id="r0", since=now - 45 * 86400, until=now - 30 * 86400))
+    assert [row[1] for row in r0] == [f"m{i}" for i in range(60) if i % 2 == 0 and i % 3]
+
+    # after_id로 이어받기 + limit
+    head = list(db.iter_export(limit=25, batch=4))
+    tail = list(db.iter_export(after_id=head[-1][0], batch=4))
+    assert [row[0] for row in head + tail] == ids
+
+
+def test_import_bad_timestamps_count_as_invalid(db):
+    recs = [{"msg_id": "ok1", "type": "lobby", "text": "a", "timestamp": 1_700_000_000},
+            {"msg_id": "bad1", "type": "lobby", "text": "b", "timestamp": "yesterday"},
+            {"msg_id": "bad2", "type": "lobby", "text": "c", "timestamp": [1, 2]},
+            {"msg_id": "bad3", "type": "lobby", "text": "d", "created_at": {"x": 1}},
+            {"msg_id": "ok2", "type": "lobby", "text": "e", "timestamp": "2024-01-01T00:00:00"}]
+    result = transfer.import_ndjson(db, _ndjson(recs), batch=1)
+    assert (result["read"], result["inserted"], result["invalid"]) == (5, 2, 3)
+    assert sorted(row[1] for row in db.iter_export()) == ["ok1", "ok2"]